@@ -0,0 +1,478 @@
+"""
+Servidor HTTP/JSON local sobre o TaskRepository, para scripts e outras
+ferramentas. Usa apenas a biblioteca padrão (asyncio) e não importa tkinter.
+
+Rotas:
+    GET    /tasks              lista paginada; filtros title, tag, tags (separadas por
+                               vírgula; all_tags=1 exige todas), status, text,
+                               from, to (DD/MM/YYYY) e order_by, limit, offset
+    POST   /tasks              cria uma tarefa (objeto JSON)
+    GET    /tasks/<id>
+    PUT    /tasks/<id>         substitui os campos da tarefa
+    DELETE /tasks/<id>
+    POST   /tasks/import       importa tarefas em NDJSON (um objeto por linha)
+    GET    /tasks/export       exporta as tarefas filtradas em NDJSON, em blocos; se a
+                               leitura falhar no meio, a última linha é {"error": ...}
+    GET    /stats              totais por status, prioridade, tag e prazo
+    GET    /search?q=...       busca textual, por relevância
+    GET    /tags?prefix=...    nomes de tags que começam pelo prefixo (autocompletar)
+
+As leituras rodam em um grupo de threads, cada uma com a sua conexão (somente
+leitura) e o seu cache; as escritas passam por uma única thread com uma única
+conexão, de modo que nunca disputam o lock de escrita do SQLite entre si.
+
+Uso: python api_server.py [--db tasks.db] [--host 127.0.0.1] [--port 8765] [--readers 4]
+"""
+import argparse
+import asyncio
+import json
+import re
+import sqlite3
+import sys
+import threading
+from collections.abc import AsyncIterator, Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import date
+from http import HTTPStatus
+from urllib.parse import parse_qsl, urlsplit
+
+from config import (API_DEFAULT_PORT, API_MAX_BODY_BYTES, API_MAX_PAGE_SIZE,
+                    API_READER_THREADS, TAG_SUGGESTION_LIMIT, TASK_STATUS)
+from database import DatabaseInitializer, TaskRepository, SORT_KEYS, to_storage_date, validate_task
+from models import Task
+from task_cache import CachedTaskRepository
+from task_io import row_to_dict, task_from_dict
+
+# Marca o fim de uma exportação na fila entre a thread do banco e o asyncio
+_END = object()
+
+class _StreamAborted(Exception):
+    """Resposta em blocos interrompida por um erro; a conexão é encerrada"""
+
+class HttpError(Exception):
+    """Erro que vira uma resposta HTTP com corpo {"error": mensagem}"""
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+@dataclass(slots=True)
+class Request:
+    method: str
+    path: str
+    query: dict[str, str]
+    headers: dict[str, str]
+    body: bytes = b''
+    keep_alive: bool = True
+
+@dataclass(slots=True)
+class Response:
+    status: int
+    payload: object = None
+    # Blocos do corpo enviados com Transfer-Encoding: chunked (exportação)
+    chunks: AsyncIterator[bytes] | None = None
+    content_type: str = "application/json; charset=utf-8"
+    headers: dict[str, str] = field(default_factory=dict)
+
+class ConnectionPool:
+    """
+    Conexões SQLite do servidor: um grupo de threads de leitura e uma única
+    thread de escrita, cada thread com a sua conexão (sqlite3 não compartilha
+    conexões entre threads). As funções recebem o repositório da thread.
+    """
+    def __init__(self, db_path: str, readers: int = API_READER_THREADS):
+        self.db_path = db_path
+        self.readers = readers
+        self._local = threading.local()
+        self._read_executor = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="api-read",
+                                                 initializer=self._open, initargs=(True,))
+        self._write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="api-write",
+                                                  initializer=self._open, initargs=(False,))
+
+    async def read(self, func: Callable[[TaskRepository], object]):
+        """Executa func(repo) em uma das threads de leitura"""
+        return await asyncio.get_running_loop().run_in_executor(self._read_executor, self._call, func)
+
+    async def write(self, func: Callable[[TaskRepository], object]):
+        """Executa func(repo) na thread de escrita, uma operação por vez"""
+        return await asyncio.get_running_loop().run_in_executor(self._write_executor, self._call, func)
+
+    async def stream(self, func: Callable[[TaskRepository], Iterator[bytes]],
+                     max_pending: int = 4) -> AsyncIterator[bytes]:
+        """
+        Percorre, em uma thread de leitura, os blocos gerados por func(repo) e os
+        entrega ao asyncio. A fila limitada faz a leitura do banco esperar quando
+        o cliente consome mais devagar; se o cliente desconectar, a leitura para.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        stopped = threading.Event()
+
+        def produce(repo: TaskRepository) -> None:
+            try:
+                for chunk in func(repo):
+                    if stopped.is_set():
+                        return
+                    asyncio.run_coroutine_threadsafe(queue.put(chunk), loop).result()
+            finally:
+                asyncio.run_coroutine_threadsafe(queue.put(_END), loop).result()
+
+        future = asyncio.ensure_future(self.read(produce))
+        try:
+            while (chunk := await queue.get()) is not _END:
+                yield chunk
+            await future  # Propaga erros da leitura
+        finally:
+            stopped.set()
+            # Libera o produtor, se estiver esperando espaço na fila
+            while not queue.empty():
+                queue.get_nowait()
+
+    def close(self) -> None:
+        """Aguarda as operações em andamento e fecha as conexões de cada thread"""
+        barrier = threading.Barrier(self.readers)
+        for _ in range(self.readers):
+            # A barreira garante que cada thread de leitura execute um fechamento
+            self._read_executor.submit(self._close, barrier)
+        self._read_executor.shutdown(wait=True)
+        self._write_executor.submit(self._close)
+        self._write_executor.shutdown(wait=True)
+
+    def _call(self, func: Callable[[TaskRepository], object]):
+        return func(self._local.repo)
+
+    def _open(self, read_only: bool) -> None:
+        db_init = DatabaseInitializer(self.db_path)
+        repo = TaskRepository(db_init)
+        if read_only:
+            db_init.connect().execute("PRAGMA query_only = ON")
+            repo = CachedTaskRepository(repo)
+        self._local.db_init = db_init
+        self._local.repo = repo
+
+    def _close(self, barrier: threading.Barrier | None = None) -> None:
+        if barrier is not None:
+            barrier.wait()
+        self._local.db_init.close()
+
+def _int_param(query: dict, name: str, default: int, minimum: int, maximum: int | None = None) -> int:
+    """Lê um parâmetro inteiro da URL, dentro dos limites informados"""
+    value = query.get(name)
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise HttpError(400, f"Parâmetro '{name}' deve ser um número inteiro") from None
+    if number < minimum or (maximum is not None and number > maximum):
+        limits = f"entre {minimum} e {maximum}" if maximum is not None else f"a partir de {minimum}"
+        raise HttpError(400, f"Parâmetro '{name}' deve estar {limits}")
+    return number
+
+def _date_param(query: dict, name: str) -> date | None:
+    """Lê uma data da URL (DD/MM/YYYY ou YYYY-MM-DD)"""
+    value = query.get(name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(to_storage_date(value))
+    except ValueError:
+        raise HttpError(400, f"Parâmetro '{name}' não é uma data válida: '{value}' (use DD/MM/YYYY)") from None
+
+def _filters(query: dict) -> dict:
+    """Filtros da lista de tarefas a partir dos parâmetros da URL (os mesmos do CLI)"""
+    status = query.get("status")
+    if status and status not in TASK_STATUS:
+        raise HttpError(400, f"Status inválido: '{status}'")
+    return {
+        "title_contains": query.get("title"),
+        "tag_contains": query.get("tag"),
+        "tags": query.get("tags"),
+        "all_tags": query.get("all_tags") in ("1", "true"),
+        "status": status,
+        "text": query.get("text"),
+        "due_from": _date_param(query, "from"),
+        "due_to": _date_param(query, "to")
+    }
+
+def _order_by(query: dict, default: str = "due_date") -> str:
+    order_by = query.get("order_by", default)
+    if order_by not in SORT_KEYS:
+        raise HttpError(400, f"Ordenação inválida: '{order_by}' (use {', '.join(SORT_KEYS)})")
+    return order_by
+
+def _json_body(request: Request):
+    try:
+        return json.loads(request.body)
+    except (UnicodeDecodeError, ValueError):
+        raise HttpError(400, "Corpo da requisição não é um JSON válido") from None
+
+def _task_body(request: Request, task_id: int | None = None) -> Task:
+    """Lê e valida a tarefa enviada no corpo da requisição"""
+    try:
+        task = task_from_dict(_json_body(request), task_id)
+    except ValueError as e:
+        raise HttpError(400, str(e)) from None
+    error = validate_task(task)
+    if error:
+        raise HttpError(400, error)
+    return task
+
+def _ndjson_tasks(body: bytes) -> tuple[list[Task], list[int]]:
+    """
+    Converte um corpo NDJSON em tarefas, ignorando linhas em branco
+    :return: Tarefas e o número da linha de cada uma
+    """
+    tasks, lines = [], []
+    for number, line in enumerate(body.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            tasks.append(task_from_dict(json.loads(line)))
+        except (UnicodeDecodeError, ValueError) as e:
+            raise HttpError(400, f"Linha {number}: {e}") from None
+        lines.append(number)
+    return tasks, lines
+
+class ApiServer:
+    """Rotas da API e o protocolo HTTP/1.1 (keep-alive, corpo por Content-Length)"""
+    def __init__(self, db_path: str, readers: int = API_READER_THREADS):
+        self.pool = ConnectionPool(db_path, readers)
+        self.routes: list[tuple[str, re.Pattern, Callable]] = [
+            ("GET", re.compile(r"/tasks"), self.list_tasks),
+            ("POST", re.compile(r"/tasks"), self.create_task),
+            ("GET", re.compile(r"/tasks/export"), self.export_tasks),
+            ("POST", re.compile(r"/tasks/import"), self.import_tasks),
+            ("GET", re.compile(r"/tasks/(\d+)"), self.get_task),
+            ("PUT", re.compile(r"/tasks/(\d+)"), self.update_task),
+            ("DELETE", re.compile(r"/tasks/(\d+)"), self.delete_task),
+            ("GET", re.compile(r"/stats"), self.stats),
+            ("GET", re.compile(r"/search"), self.search),
+            ("GET", re.compile(r"/tags"), self.tags),
+        ]
+
+    async def list_tasks(self, request: Request) -> Response:
+        filters = _filters(request.query)
+        order_by = _order_by(request.query)
+        limit = _int_param(request.query, "limit", 100, 1, API_MAX_PAGE_SIZE)
+        offset = _int_param(request.query, "offset", 0, 0)
+
+        def run(repo: TaskRepository) -> dict:
+            rows, _ = repo.page_rows(limit=limit, offset=offset, order_by=order_by, **filters)
+            return {"total": repo.count(**filters), "tasks": [row_to_dict(row) for row in rows]}
+        return Response(200, await self.pool.read(run))
+
+    async def get_task(self, request: Request, task_id: str) -> Response:
+        task = await self.pool.read(lambda repo: repo.get(int(task_id)))
+        if task is None:
+            raise HttpError(404, "Tarefa não encontrada")
+        return Response(200, asdict(task))
+
+    async def create_task(self, request: Request) -> Response:
+        task = _task_body(request)
+        task.id = await self.pool.write(lambda repo: repo.add(task))
+        if task.id < 0:
+            raise HttpError(500, "Erro ao gravar a tarefa")
+        return Response(201, asdict(task), headers={"Location": f"/tasks/{task.id}"})
+
+    async def update_task(self, request: Request, task_id: str) -> Response:
+        task = _task_body(request, int(task_id))
+        if not await self.pool.write(lambda repo: repo.update(task)):
+            raise HttpError(404, "Tarefa não encontrada")
+        return Response(200, asdict(task))
+
+    async def delete_task(self, request: Request, task_id: str) -> Response:
+        if not await self.pool.write(lambda repo: repo.delete(int(task_id))):
+            raise HttpError(404, "Tarefa não encontrada")
+        return Response(204)
+
+    async def import_tasks(self, request: Request) -> Response:
+        def run(repo: TaskRepository) -> dict:
+            # A conversão roda fora do loop de eventos, junto com a gravação
+            tasks, lines = _ndjson_tasks(request.body)
+            report = repo.add_many(tasks)
+            return {
+                "inserted": report.inserted,
+                "errors": [{"line": lines[number - 1], "error": message} for number, message in report.errors],
+            }
+        return Response(200, await self.pool.write(run))
+
+    async def export_tasks(self, request: Request) -> Response:
+        filters = _filters(request.query)
+        order_by = _order_by(request.query, default="id")
+
+        def lines(repo: TaskRepository) -> Iterator[bytes]:
+            for rows in repo.iter_display_rows(order_by=order_by, **filters):
+                yield "".join(json.dumps(row_to_dict(row), ensure_ascii=False) + "\n" for row in rows).encode()
+        return Response(200, chunks=self.pool.stream(lines), content_type="application/x-ndjson; charset=utf-8")
+
+    async def stats(self, request: Request) -> Response:
+        filters = _filters(request.query)
+        return Response(200, await self.pool.read(lambda repo: repo.stats(**filters)))
+
+    async def search(self, request: Request) -> Response:
+        text = request.query.get("q", "")
+        limit = _int_param(request.query, "limit", 50, 1, API_MAX_PAGE_SIZE)
+        results = await self.pool.read(lambda repo: repo.search(text, limit))
+        return Response(200, [{"id": task_id, "snippet": snippet} for task_id, snippet in results])
+
+    async def tags(self, request: Request) -> Response:
+        prefix = request.query.get("prefix", "")
+        limit = _int_param(request.query, "limit", TAG_SUGGESTION_LIMIT, 1, API_MAX_PAGE_SIZE)
+        return Response(200, await self.pool.read(lambda repo: repo.tag_names(prefix, limit)))
+
+    async def dispatch(self, request: Request) -> Response:
+        """Encontra a rota da requisição e converte erros em respostas JSON"""
+        allowed = []
+        for method, pattern, handler in self.routes:
+            match = pattern.fullmatch(request.path)
+            if not match:
+                continue
+            if method != request.method:
+                allowed.append(method)
+                continue
+            try:
+                return await handler(request, *match.groups())
+            except HttpError as e:
+                return Response(e.status, {"error": e.message})
+            except ValueError as e:
+                return Response(400, {"error": str(e)})
+            except sqlite3.OperationalError as e:
+                # Banco ocupado por outro processo além do busy_timeout
+                return Response(503, {"error": str(e)})
+            except sqlite3.Error as e:
+                return Response(500, {"error": str(e)})
+        if allowed:
+            return Response(405, {"error": "Método não permitido"}, headers={"Allow": ", ".join(allowed)})
+        return Response(404, {"error": "Rota não encontrada"})
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Atende uma conexão, com várias requisições em sequência (keep-alive)"""
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HttpError as e:
+                    await self._send(writer, Response(e.status, {"error": e.message}), keep_alive=False)
+                    break
+                if request is None:
+                    break
+                response = await self.dispatch(request)
+                await self._send(writer, response, request.keep_alive)
+                if not request.keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # Cliente desconectou
+        except _StreamAborted:
+            pass  # Exportação interrompida por erro (já registrado e informado ao cliente)
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Request | None:
+        """Lê a linha de requisição, os cabeçalhos e o corpo; None se a conexão terminou"""
+        try:
+            line = await reader.readline()
+            if not line:
+                return None
+            try:
+                method, target, version = line.decode("latin-1").split()
+            except ValueError:
+                raise HttpError(400, "Linha de requisição inválida") from None
+            headers = {}
+            while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+        except (asyncio.LimitOverrunError, ValueError):
+            raise HttpError(431, "Cabeçalhos muito grandes") from None
+
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise HttpError(411, "Envie o corpo com Content-Length")
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise HttpError(400, "Content-Length inválido") from None
+        if length > API_MAX_BODY_BYTES:
+            raise HttpError(413, f"Corpo maior que {API_MAX_BODY_BYTES} bytes")
+        body = await reader.readexactly(length) if length else b""
+
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        url = urlsplit(target)
+        return Request(method.upper(), url.path.rstrip("/") or "/", dict(parse_qsl(url.query)),
+                       headers, body, keep_alive)
+
+    async def _send(self, writer: asyncio.StreamWriter, response: Response, keep_alive: bool) -> None:
+        """Escreve a resposta; exportações são enviadas em blocos (chunked)"""
+        headers = {"Content-Type": response.content_type, **response.headers,
+                   "Connection": "keep-alive" if keep_alive else "close"}
+        body = b""
+        if response.chunks is not None:
+            headers["Transfer-Encoding"] = "chunked"
+        else:
+            if response.payload is not None:
+                body = json.dumps(response.payload, ensure_ascii=False).encode()
+            headers["Content-Length"] = str(len(body))
+        phrase = HTTPStatus(response.status).phrase
+        head = f"HTTP/1.1 {response.status} {phrase}\r\n"
+        head += "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+        writer.write(head.encode("latin-1") + b"\r\n" + body)
+
+        if response.chunks is not None:
+            try:
+                async for chunk in response.chunks:
+                    writer.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+                    await writer.drain()
+            except ConnectionError:
+                raise
+            except Exception as e:
+                # O status 200 já foi enviado: o erro vai na última linha, o corpo é
+                # encerrado normalmente e a conexão é fechada
+                print(f"Erro durante o envio da resposta em blocos: {e!r}", file=sys.stderr, flush=True)
+                line = json.dumps({"error": f"Exportação interrompida: {e}"}, ensure_ascii=False).encode() + b"\n"
+                writer.write(f"{len(line):x}\r\n".encode() + line + b"\r\n0\r\n\r\n")
+                await writer.drain()
+                raise _StreamAborted() from e
+            finally:
+                await response.chunks.aclose()  # Interrompe a leitura se o cliente desconectou
+            writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    def close(self) -> None:
+        self.pool.close()
+
+async def serve(db_path: str, host: str, port: int, readers: int) -> None:
+    api = ApiServer(db_path, readers)
+    server = await asyncio.start_server(api.handle, host, port)
+    try:
+        address = server.sockets[0].getsockname()
+        print(f"Servidor em http://{address[0]}:{address[1]}", file=sys.stderr, flush=True)
+        async with server:
+            await server.serve_forever()
+    finally:
+        api.close()
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", help="arquivo do banco de dados")
+    parser.add_argument("--host", default="127.0.0.1", help="endereço de escuta (padrão: apenas local)")
+    parser.add_argument("--port", type=int, default=API_DEFAULT_PORT, help="porta (0 escolhe uma livre)")
+    parser.add_argument("--readers", type=int, default=API_READER_THREADS, help="conexões de leitura")
+    args = parser.parse_args(argv)
+
+    db_init = DatabaseInitializer(args.db)
+    db_init.initialize_schema()
+    TaskRepository(db_init).compact_changes_if_due()
+    db_init.close()
+    try:
+        asyncio.run(serve(db_init.db_path, args.host, args.port, args.readers))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
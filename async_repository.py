@@ -0,0 +1,107 @@
+import threading
+from collections.abc import Callable
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+
+from database import DatabaseInitializer, TaskRepository
+from task_cache import CachedTaskRepository
+
+class AsyncTaskRepository:
+    """
+    Fachada assíncrona sobre TaskRepository.
+    As operações rodam em uma thread dedicada, com conexão sqlite3 própria e
+    cache de leitura (CachedTaskRepository), e retornam Futures. Os resultados voltam para a thread do Tk por polling com
+    root.after, de modo que o mainloop nunca espera pelo banco de dados.
+    """
+    def __init__(self, db_path: str, root, poll_interval: int = 20):
+        """
+        :param db_path: Caminho do banco de dados (o mesmo do DatabaseInitializer principal)
+        :param root: Janela Tk usada para agendar a entrega dos resultados
+        :param poll_interval: Intervalo, em ms, entre as verificações de resultados prontos
+        """
+        self.db_path = db_path
+        self.root = root
+        self.poll_interval = poll_interval
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="planner-db",
+                                            initializer=self._open)
+        self._pending: list[tuple[Future, Callable, str | None, int]] = []
+        self._generations: dict[str, int] = {}
+        self._channel_futures: dict[str, Future] = {}
+        self._polling = False
+
+    def submit(self, func: Callable[[TaskRepository], object], channel: str | None = None) -> Future:
+        """
+        Agenda func(repo) na thread do banco de dados
+        :param func: Função que recebe o TaskRepository da thread do banco
+        :param channel: Nome do canal; uma nova chamada no mesmo canal cancela a
+                        anterior (se ainda não começou) e descarta seu resultado
+        :return: Future com o resultado de func
+        """
+        if channel is not None:
+            self._generations[channel] = self._generations.get(channel, 0) + 1
+            previous = self._channel_futures.get(channel)
+            if previous is not None:
+                previous.cancel()
+        future = self._executor.submit(self._call, func)
+        if channel is not None:
+            self._channel_futures[channel] = future
+        return future
+
+    def run(self, func: Callable[[TaskRepository], object],
+            callback: Callable[[object, BaseException | None], None],
+            channel: str | None = None) -> Future:
+        """
+        Como submit(), entregando o resultado na thread do Tk
+        :param callback: Chamado com (resultado, exceção ou None) na thread do Tk;
+                         não é chamado se o resultado ficou obsoleto no canal
+        """
+        future = self.submit(func, channel)
+        generation = self._generations.get(channel, 0) if channel is not None else 0
+        self._pending.append((future, callback, channel, generation))
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_interval, self._poll)
+        return future
+
+    def close(self) -> None:
+        """Descarta operações pendentes e fecha a conexão da thread do banco"""
+        for future, _, _, _ in self._pending:
+            future.cancel()
+        self._pending.clear()
+        self._executor.submit(self._close)
+        self._executor.shutdown(wait=True)
+
+    def _poll(self):
+        """Entrega, na thread do Tk, os resultados das operações concluídas"""
+        # Callbacks podem agendar novas operações, que entram na lista nova
+        pending, self._pending = self._pending, []
+        for entry in pending:
+            future, callback, channel, generation = entry
+            if not future.done():
+                self._pending.append(entry)
+                continue
+            if future.cancelled():
+                continue
+            if channel is not None and self._generations.get(channel) != generation:
+                continue  # Resultado obsoleto: já existe uma chamada mais nova no canal
+            try:
+                result, error = future.result(), None
+            except (CancelledError, Exception) as e:
+                result, error = None, e
+            callback(result, error)
+
+        if self._pending:
+            self.root.after(self.poll_interval, self._poll)
+        else:
+            self._polling = False
+
+    def _open(self):
+        """Abre a conexão própria da thread do banco de dados"""
+        self._local.db_init = DatabaseInitializer(self.db_path)
+        self._local.repo = CachedTaskRepository(TaskRepository(self._local.db_init))
+
+    def _call(self, func):
+        return func(self._local.repo)
+
+    def _close(self):
+        self._local.db_init.close()
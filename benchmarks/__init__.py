@@ -0,0 +1 @@
+"""Benchmarks de desempenho do Planner (executados sem interface gráfica)"""
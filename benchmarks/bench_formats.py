@@ -0,0 +1,82 @@
+"""
+Benchmark dos formatos de exportação/importação e da cópia de segurança.
+Sobre um banco com tarefas sintéticas (1 milhão por padrão) mede:
+- exportação em CSV e em JSON Lines (iter_display_rows, como a janela de exportação)
+- importação de cada arquivo gerado em um banco vazio (add_many)
+- snapshot com a API de backup do SQLite (DatabaseInitializer.backup), em
+  passos de BACKUP_PAGES_PER_STEP páginas, contra uma cópia simples do arquivo
+  (que só é segura com o aplicativo fechado)
+
+Uso: python -m benchmarks.bench_formats [--rows 1000000]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import BACKUP_PAGES_PER_STEP
+from database import DatabaseInitializer, TaskRepository
+from task_io import read_csv_tasks, read_jsonl_tasks, write_csv_rows, write_jsonl_rows
+from benchmarks.generator import populate
+
+FORMATS = [("CSV", ".csv", write_csv_rows, read_csv_tasks),
+           ("JSON Lines", ".jsonl", write_jsonl_rows, read_jsonl_tasks)]
+
+def timed(func) -> tuple[float, object]:
+    """Tempo, em segundos, e resultado de func()"""
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+def export_file(repo, path: str, write_rows) -> int:
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        return write_rows(file, repo.iter_display_rows())
+
+def import_file(path: str, db_path: str, read_tasks) -> int:
+    """Importa o arquivo em um banco novo; devolve o número de tarefas incluídas"""
+    db_init = DatabaseInitializer(db_path)
+    db_init.initialize_schema()
+    try:
+        with open(path, newline="", encoding="utf-8") as file:
+            return TaskRepository(db_init).add_many(read_tasks(file)).inserted
+    finally:
+        db_init.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="tarefas no banco de origem")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_init = DatabaseInitializer(os.path.join(tmp, "origem.db"))
+        db_init.initialize_schema()
+        populate(db_init.connect(), args.rows)
+        repo = TaskRepository(db_init)
+
+        print(f"{args.rows} tarefas")
+        print(f"{'formato':<14}{'exportação (s)':>16}{'importação (s)':>16}{'tamanho (MB)':>14}")
+        for name, extension, write_rows, read_tasks in FORMATS:
+            path = os.path.join(tmp, "tarefas" + extension)
+            export_time, written = timed(lambda: export_file(repo, path, write_rows))
+            import_time, imported = timed(lambda: import_file(path, os.path.join(tmp, f"importado{extension}.db"),
+                                                              read_tasks))
+            if imported != written:
+                raise RuntimeError(f"{name}: {written} exportadas, {imported} importadas")
+            print(f"{name:<14}{export_time:>16.2f}{import_time:>16.2f}{os.path.getsize(path) / 2 ** 20:>14.1f}")
+
+        db_init.connect().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        size = os.path.getsize(db_init.db_path) / 2 ** 20
+        backup_time, _ = timed(lambda: db_init.backup(os.path.join(tmp, "snapshot.db")))
+        copy_time, _ = timed(lambda: shutil.copyfile(db_init.db_path, os.path.join(tmp, "copia.db")))
+        db_init.close()
+
+    print(f"Banco de {size:.1f} MB")
+    print(f"{f'snapshot ({BACKUP_PAGES_PER_STEP} páginas/passo)':<34}{backup_time:>8.2f} s")
+    print(f"{'cópia do arquivo':<34}{copy_time:>8.2f} s")
+
+if __name__ == "__main__":
+    main()
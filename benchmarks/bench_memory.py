@@ -0,0 +1,106 @@
+"""
+Benchmark de memória e vazão da leitura de tarefas.
+Compara três representações de uma tarefa em memória:
+- dataclass sem slots (a Task original, com __dict__ por instância)
+- Task atual (dataclass com slots=True)
+- tupla no formato exibido (TaskRepository.page_rows, usado pela lista)
+e mede bytes por tarefa (tracemalloc) e linhas por segundo lidas do banco.
+
+Uso: python benchmarks/bench_memory.py [--rows 1000000] [--page 200]
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseInitializer, TaskRepository, TASK_COLUMNS
+from models import Task
+from benchmarks.generator import populate
+
+@dataclass
+class DictTask:
+    """Task como era antes de slots=True, para comparação"""
+    id: int | None
+    titulo: str
+    description: str
+    status: str = "não iniciado"
+    tag: str | None = None
+    due_date: str | None = None
+    priority: str = "média"
+
+def measure(load):
+    """
+    Executa load() duas vezes: uma cronometrada e outra sob tracemalloc
+    (que deixa as alocações bem mais lentas)
+    :return: (quantidade de itens, segundos, bytes alocados que continuam vivos)
+    """
+    gc.collect()
+    start = time.perf_counter()
+    count = len(load())
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    tracemalloc.start()
+    result = load()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return count, elapsed, size
+
+def load_dict_tasks(repo):
+    rows = repo.conn.execute(f"SELECT {TASK_COLUMNS} FROM tasks")
+    return [DictTask(*row) for row in rows]
+
+def load_tasks(repo):
+    # Mesma montagem de load_dict_tasks, para isolar o efeito de slots=True
+    rows = repo.conn.execute(f"SELECT {TASK_COLUMNS} FROM tasks")
+    return [Task(*row) for row in rows]
+
+def load_rows(repo):
+    return repo.conn.execute(f"SELECT {TASK_COLUMNS} FROM tasks").fetchall()
+
+def scroll(fetch, total, page):
+    """Percorre a lista inteira página a página, como a rolagem da lista de tarefas"""
+    items, keys = fetch(limit=page)
+    read = len(items)
+    start = time.perf_counter()
+    while keys and read < total:
+        items, keys = fetch(after=keys[-1], limit=page)
+        read += len(items)
+    return read, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--page", type=int, default=200, help="tamanho da página na rolagem")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_init = DatabaseInitializer(os.path.join(tmp, "bench.db"))
+        db_init.initialize_schema()
+        populate(db_init.connect(), args.rows)
+        repo = TaskRepository(db_init)
+
+        print(f"{args.rows} tarefas carregadas de uma vez")
+        print(f"{'representação':<28}{'bytes/tarefa':>14}{'linhas/s':>14}")
+        for name, load in (("dataclass sem slots", load_dict_tasks),
+                           ("Task (slots=True)", load_tasks),
+                           ("tupla", load_rows)):
+            count, elapsed, size = measure(lambda: load(repo))
+            print(f"{name:<28}{size / count:>14.0f}{count / elapsed:>14,.0f}")
+
+        print(f"\nRolagem completa em páginas de {args.page} (ordem por data limite, melhor de 3)")
+        print(f"{'caminho':<28}{'linhas/s':>14}")
+        for name, fetch in (("page() -> Task", repo.page), ("page_rows() -> tupla", repo.page_rows)):
+            read, elapsed = min((scroll(fetch, args.rows, args.page) for _ in range(3)),
+                                key=lambda result: result[1])
+            print(f"{name:<28}{read / elapsed:>14,.0f}")
+        db_init.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark do perfil de conexão SQLite (DB_PROFILE do config).
+Compara os padrões do SQLite com o perfil configurado em duas cargas:
+- escrita: tarefas adicionadas uma a uma com TaskRepository.add() (um commit cada)
+- leitura: consultas filtradas, paginação e contagens sobre a tabela
+
+Uso: python benchmarks/bench_pragmas.py [--writes 2000] [--rows 200000]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import DB_PROFILE
+from database import DatabaseInitializer, TaskRepository
+from models import Task
+from benchmarks.generator import populate
+
+def write_workload(repo, writes):
+    """Adições individuais, cada uma com seu commit"""
+    start = time.perf_counter()
+    for i in range(writes):
+        repo.add(Task(id=None, titulo=f"Nova {i}", description="Inserida pelo benchmark",
+                      status="em andamento", tag="benchmark", due_date="15/08/2025", priority="alta"))
+    return time.perf_counter() - start
+
+def read_workload(repo, rounds):
+    """Mistura de consultas usadas pela lista de tarefas, com pouco trabalho em Python"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        repo.count(status="em andamento")
+        repo.count(tag_contains="desenv")
+        repo.count(title_contains="99", status="concluído")
+        repo.query(status="concluído", order_by="priority", limit=200)
+        tasks, keys = repo.page(limit=200)
+        for _ in range(20):
+            tasks, keys = repo.page(after=keys[-1], limit=200)
+    return time.perf_counter() - start
+
+def run(profile, args, path):
+    """Executa as duas cargas sobre uma cópia do banco com o perfil informado"""
+    db_init = DatabaseInitializer(path, profile=profile)
+    repo = TaskRepository(db_init)
+    write_time = write_workload(repo, args.writes)
+    read_workload(repo, 1)  # Aquece o cache antes de medir
+    read_time = min(read_workload(repo, args.rounds) for _ in range(3))
+    db_init.close()
+    return write_time, read_time
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000, help="tarefas pré-carregadas")
+    parser.add_argument("--writes", type=int, default=2_000, help="adições individuais")
+    parser.add_argument("--rounds", type=int, default=5, help="rodadas da carga de leitura")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        template = os.path.join(tmp, "base.db")
+        db_init = DatabaseInitializer(template, profile={})
+        db_init.initialize_schema()
+        populate(db_init.connect(), args.rows)
+        db_init.close()
+
+        results = {}
+        for name, profile in (("padrão", {}), ("perfil", DB_PROFILE)):
+            path = os.path.join(tmp, f"{name}.db")
+            shutil.copyfile(template, path)
+            results[name] = run(profile, args, path)
+
+    (default_write, default_read), (tuned_write, tuned_read) = results["padrão"], results["perfil"]
+    print(f"{args.rows} tarefas pré-carregadas")
+    print(f"{'carga':<34}{'padrão (s)':>12}{'perfil (s)':>12}{'ganho':>9}")
+    print(f"{f'escrita ({args.writes} commits)':<34}{default_write:>12.3f}{tuned_write:>12.3f}"
+          f"{default_write / tuned_write:>8.1f}x")
+    print(f"{f'leitura ({args.rounds} rodadas)':<34}{default_read:>12.3f}{tuned_read:>12.3f}"
+          f"{default_read / tuned_read:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark dos filtros da lista de tarefas.
+Compara o caminho antigo (get_all() + filtros e ordenação em Python)
+com TaskRepository.query(), que leva filtros e ordenação para o SQLite.
+
+Uso: python benchmarks/bench_query.py [--rows 200000] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseInitializer, TaskRepository
+from benchmarks.generator import populate
+
+def python_filter(repo, title, tag, status, sort_by):
+    """Reproduz o caminho antigo de PlannerGUI._apply_filters"""
+    tasks = repo.get_all()
+    if title:
+        tasks = [t for t in tasks if title in t.titulo.lower()]
+    if tag:
+        tasks = [t for t in tasks if t.tag and tag in t.tag.lower()]
+    if status:
+        tasks = [t for t in tasks if t.status == status]
+    if sort_by == "due_date":
+        def get_date(task):
+            if not task.due_date:
+                return datetime.max
+            try:
+                return datetime.strptime(task.due_date, '%d/%m/%Y')
+            except ValueError:
+                return datetime.max
+        tasks.sort(key=get_date)
+    elif sort_by == "priority":
+        priority_map = {"baixa": 0, "média": 1, "alta": 2}
+        tasks.sort(key=lambda t: priority_map.get(t.priority, -1), reverse=True)
+    elif sort_by == "status":
+        status_map = {"não iniciado": 0, "em andamento": 1, "concluído": 2}
+        tasks.sort(key=lambda t: status_map.get(t.status, -1))
+    return tasks
+
+def sql_filter(repo, title, tag, status, sort_by):
+    """Caminho novo, com filtros e ordenação no banco de dados"""
+    return repo.query(title_contains=title, tag_contains=tag, status=status, order_by=sort_by)
+
+def best_of(func, repeat, *args):
+    """Retorna o menor tempo (em segundos) e o número de linhas retornadas"""
+    best = float("inf")
+    count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = len(func(*args))
+        best = min(best, time.perf_counter() - start)
+    return best, count
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    scenarios = [
+        ("sem filtro, por data", None, None, None, "due_date"),
+        ("status, por prioridade", None, None, "em andamento", "priority"),
+        ("tag + status, por data", None, "desenv", "não iniciado", "due_date"),
+        ("título, por status", "mensal 12", None, None, "status"),
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_init = DatabaseInitializer(os.path.join(tmp, "bench.db"))
+        db_init.initialize_schema()
+        populate(db_init.connect(), args.rows)
+        repo = TaskRepository(db_init)
+
+        print(f"{args.rows} tarefas, melhor de {args.repeat} execuções")
+        print(f"{'cenário':<28}{'python (ms)':>14}{'sql (ms)':>12}{'ganho':>9}{'linhas':>10}")
+        for name, title, tag, status, sort_by in scenarios:
+            py_time, py_count = best_of(python_filter, args.repeat, repo, title, tag, status, sort_by)
+            sql_time, sql_count = best_of(sql_filter, args.repeat, repo, title, tag, status, sort_by)
+            assert py_count == sql_count, f"{name}: {py_count} != {sql_count}"
+            print(f"{name:<28}{py_time * 1000:>14.1f}{sql_time * 1000:>12.1f}"
+                  f"{py_time / sql_time:>8.1f}x{sql_count:>10}")
+        db_init.close()
+
+if __name__ == "__main__":
+    main()
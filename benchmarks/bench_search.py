@@ -0,0 +1,51 @@
+"""
+Benchmark da busca textual (FTS5).
+Mede TaskRepository.search() e o filtro text= de TaskRepository.query()
+contra a busca por substring (LIKE) equivalente.
+
+Uso: python benchmarks/bench_search.py [--rows 1000000] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseInitializer, TaskRepository
+from benchmarks.generator import populate
+from benchmarks.bench_query import best_of
+
+def like_search(repo, text, limit):
+    """Busca por substring em título, descrição e tag, sem índice"""
+    pattern = f"%{text}%"
+    return repo.conn.execute(
+        "SELECT id FROM tasks WHERE titulo LIKE ? OR description LIKE ? OR tag LIKE ? LIMIT ?",
+        (pattern, pattern, pattern, limit)
+    ).fetchall()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    terms = ["relatorio 4242", "reunioes", "manutencao", "relatorio cliente"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_init = DatabaseInitializer(os.path.join(tmp, "bench.db"))
+        db_init.initialize_schema()
+        populate(db_init.connect(), args.rows)
+        repo = TaskRepository(db_init)
+
+        print(f"{args.rows} tarefas, melhor de {args.repeat} execuções (50 resultados)")
+        print(f"{'termo':<16}{'search (ms)':>13}{'query text= (ms)':>18}{'LIKE (ms)':>12}")
+        for term in terms:
+            search_time, _ = best_of(repo.search, args.repeat, term, 50)
+            query_time, _ = best_of(lambda t: repo.query(text=t, order_by="id", limit=50), args.repeat, term)
+            like_time, _ = best_of(like_search, args.repeat, repo, term, 50)
+            print(f"{term:<16}{search_time * 1000:>13.1f}{query_time * 1000:>18.1f}{like_time * 1000:>12.1f}")
+        db_init.close()
+
+if __name__ == "__main__":
+    main()
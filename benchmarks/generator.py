@@ -0,0 +1,79 @@
+"""
+Gerador de tarefas sintéticas para os benchmarks.
+As tarefas seguem o formato de exemplo_tarefas.csv: títulos e descrições em
+português, status e prioridades válidos, tags do mesmo vocabulário, algumas
+tarefas sem tag ou sem data limite e datas espalhadas em torno de 2025.
+A geração é determinística (semente fixa), para que resultados de commits
+diferentes sejam comparáveis.
+"""
+import csv
+import random
+from collections.abc import Iterator
+from datetime import date, timedelta
+from typing import TextIO
+
+from config import TASK_STATUS, TASK_PRIORITIES
+from task_io import CSV_HEADERS
+
+# Tamanhos padrão dos conjuntos de dados (rótulo -> número de tarefas)
+SIZES = {"10k": 10_000, "100k": 100_000, "1M": 1_000_000}
+
+TAGS = ["financeiro", "reuniões", "desenvolvimento", "manutenção", "recursos humanos",
+        "estratégia", "infraestrutura", "marketing"]
+VERBS = ["Revisar", "Preparar", "Atualizar", "Organizar", "Definir", "Documentar",
+         "Testar", "Planejar", "Apresentar", "Corrigir"]
+SUBJECTS = ["relatório mensal", "reunião com cliente", "site da empresa", "backup do sistema",
+            "treinamento da equipe", "código do projeto", "metas do trimestre",
+            "servidores de produção", "evento de marketing", "documentação da API"]
+DETAILS = ["antes da entrega", "com a equipe de {tag}", "conforme combinado na última reunião",
+           "e enviar para aprovação", "para o cliente XYZ", "do projeto principal"]
+
+# Pesos aproximados de uma lista de tarefas em uso (mesma ordem de config)
+STATUS_WEIGHTS = [40, 25, 35]
+PRIORITY_WEIGHTS = [30, 50, 20]
+
+BASE_DATE = date(2025, 6, 1)
+
+def generate_rows(rows: int, seed: int = 42) -> Iterator[tuple]:
+    """
+    Gera tarefas como tuplas (titulo, description, status, tag, due_date, priority),
+    com due_date em ISO (YYYY-MM-DD) ou None, prontas para inserir na tabela
+    :param rows: Número de tarefas
+    :param seed: Semente do gerador pseudoaleatório
+    """
+    rnd = random.Random(seed)
+    for i in range(1, rows + 1):
+        verb, subject = rnd.choice(VERBS), rnd.choice(SUBJECTS)
+        tag = rnd.choice(TAGS) if rnd.random() < 0.9 else None
+        detail = rnd.choice(DETAILS).format(tag=tag or "operações")
+        due_date = None
+        if rnd.random() < 0.95:
+            due_date = (BASE_DATE + timedelta(days=rnd.randint(-365, 365))).isoformat()
+        yield (
+            f"{verb} {subject} {i}",
+            f"{verb} {subject} {detail}",
+            rnd.choices(TASK_STATUS, STATUS_WEIGHTS)[0],
+            tag,
+            due_date,
+            rnd.choices(TASK_PRIORITIES, PRIORITY_WEIGHTS)[0]
+        )
+
+def populate(conn, rows: int, seed: int = 42) -> None:
+    """Insere tarefas sintéticas diretamente na tabela, em uma única transação"""
+    conn.executemany(
+        "INSERT INTO tasks (titulo, description, status, tag, due_date, priority) VALUES (?, ?, ?, ?, ?, ?)",
+        generate_rows(rows, seed)
+    )
+    conn.commit()
+
+def write_csv(file: TextIO, rows: int, seed: int = 42, with_ids: bool = True) -> None:
+    """
+    Escreve as tarefas sintéticas no formato de exportação do aplicativo (datas DD/MM/YYYY)
+    :param with_ids: Se False, a coluna ID fica vazia (importação pelo hash do conteúdo)
+    """
+    writer = csv.writer(file)
+    writer.writerow(CSV_HEADERS)
+    for i, (titulo, description, status, tag, due_date, priority) in enumerate(generate_rows(rows, seed), 1):
+        if due_date:
+            due_date = f"{due_date[8:10]}/{due_date[5:7]}/{due_date[:4]}"
+        writer.writerow((i if with_ids else '', titulo, description, status, tag or '', due_date or '', priority))
@@ -0,0 +1,184 @@
+"""
+Teste de carga da API HTTP (api_server.py).
+Sem --url, cria um banco temporário com tarefas sintéticas (100 mil por padrão),
+inicia o servidor em outro processo e o encerra ao final. Cada cliente mantém
+uma conexão keep-alive e envia requisições em sequência, numa mistura de
+leituras (lista filtrada, tarefa por id, busca textual, estatísticas) e
+escritas (criação e alteração de status). Ao final mostra requisições por
+segundo e as latências p50/p95/p99, no total e por tipo de requisição.
+
+Uso: python -m benchmarks.load_test [--tasks 100000] [--clients 32] [--duration 10]
+                                    [--readers 4] [--writes 0.1] [--url http://127.0.0.1:8765]
+                                    [--output resultados.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import quote, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import TASK_STATUS
+from database import DatabaseInitializer
+from benchmarks.generator import SUBJECTS, TAGS, populate
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Leituras: (tipo, peso relativo)
+READ_MIX = [("lista", 50), ("tarefa", 25), ("busca", 15), ("stats", 5), ("lista_tag", 5)]
+WRITE_MIX = [("status", 70), ("criação", 30)]
+
+def percentile(values: list[float], fraction: float) -> float:
+    """Percentil por posição (values já ordenados)"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def build_request(kind: str, rnd: random.Random, max_id: int) -> tuple[str, str, bytes]:
+    """Monta (método, caminho, corpo) de uma requisição do tipo informado"""
+    if kind == "lista":
+        order_by = rnd.choice(["due_date", "priority", "status"])
+        return "GET", f"/tasks?limit=50&order_by={order_by}&offset={rnd.randint(0, 20) * 50}", b""
+    if kind == "lista_tag":
+        return "GET", f"/tasks?limit=50&tag={quote(rnd.choice(TAGS))}&status={quote(rnd.choice(TASK_STATUS))}", b""
+    if kind == "tarefa":
+        return "GET", f"/tasks/{rnd.randint(1, max_id)}", b""
+    if kind == "busca":
+        return "GET", f"/search?q={quote(rnd.choice(SUBJECTS).split()[0])}&limit=20", b""
+    if kind == "stats":
+        return "GET", "/stats", b""
+    task = {
+        "titulo": f"Tarefa de carga {rnd.randint(1, 10 ** 9)}",
+        "description": "Criada pelo teste de carga",
+        "status": rnd.choice(TASK_STATUS),
+        "tag": rnd.choice(TAGS),
+        "due_date": f"{rnd.randint(1, 28):02d}/{rnd.randint(1, 12):02d}/2025",
+    }
+    body = json.dumps(task).encode()
+    if kind == "status":
+        return "PUT", f"/tasks/{rnd.randint(1, max_id)}", body
+    return "POST", "/tasks", body
+
+async def request(reader, writer, host: str, method: str, path: str, body: bytes) -> int:
+    """Envia uma requisição na conexão aberta e lê a resposta inteira; devolve o status"""
+    head = f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Length: {len(body)}\r\n"
+    if body:
+        head += "Content-Type: application/json\r\n"
+    writer.write(head.encode() + b"\r\n" + body)
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    if length:
+        await reader.readexactly(length)
+    return status
+
+async def client(number: int, url, args, max_id: int, deadline: float, samples: dict, errors: dict) -> None:
+    rnd = random.Random(number)
+    reader, writer = await asyncio.open_connection(url.hostname, url.port)
+    read_kinds, read_weights = zip(*READ_MIX)
+    write_kinds, write_weights = zip(*WRITE_MIX)
+    try:
+        while time.perf_counter() < deadline:
+            if rnd.random() < args.writes:
+                kind = rnd.choices(write_kinds, write_weights)[0]
+            else:
+                kind = rnd.choices(read_kinds, read_weights)[0]
+            method, path, body = build_request(kind, rnd, max_id)
+            start = time.perf_counter()
+            status = await request(reader, writer, url.hostname, method, path, body)
+            samples.setdefault(kind, []).append(time.perf_counter() - start)
+            if status >= 500:
+                errors[kind] = errors.get(kind, 0) + 1
+    finally:
+        writer.close()
+
+async def run_load(url, args, max_id: int) -> dict:
+    """Executa os clientes em paralelo durante args.duration segundos"""
+    samples: dict[str, list[float]] = {}
+    errors: dict[str, int] = {}
+    start = time.perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(*(client(n, url, args, max_id, deadline, samples, errors) for n in range(args.clients)))
+    elapsed = time.perf_counter() - start
+
+    def summary(latencies: list[float]) -> dict:
+        latencies.sort()
+        return {
+            "requests": len(latencies),
+            "rps": len(latencies) / elapsed,
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p95_ms": percentile(latencies, 0.95) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+        }
+    results = {"total": summary([value for values in samples.values() for value in values])}
+    results.update((kind, summary(values)) for kind, values in sorted(samples.items()))
+    results["errors"] = errors
+    return results
+
+def start_server(db_path: str, readers: int) -> tuple[subprocess.Popen, str]:
+    """Inicia o servidor em uma porta livre e devolve o processo e a URL"""
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "api_server.py"), "--db", db_path,
+         "--port", "0", "--readers", str(readers)],
+        stderr=subprocess.PIPE, text=True
+    )
+    line = server.stderr.readline()
+    if "http://" not in line:
+        server.kill()
+        raise RuntimeError(f"Servidor não iniciou: {line}{server.stderr.read()}")
+    return server, line[line.index("http://"):].strip()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=100_000, help="tarefas no banco temporário")
+    parser.add_argument("--clients", type=int, default=32, help="conexões simultâneas")
+    parser.add_argument("--duration", type=float, default=10.0, help="duração, em segundos")
+    parser.add_argument("--readers", type=int, default=4, help="conexões de leitura do servidor")
+    parser.add_argument("--writes", type=float, default=0.1, help="fração de requisições de escrita")
+    parser.add_argument("--url", help="servidor já em execução (não cria banco nem processo)")
+    parser.add_argument("--output", help="arquivo JSON com os resultados")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server = None
+        if args.url:
+            url, max_id = args.url, args.tasks
+        else:
+            db_init = DatabaseInitializer(os.path.join(tmp, "carga.db"))
+            db_init.initialize_schema()
+            populate(db_init.connect(), args.tasks)
+            db_init.close()
+            server, url = start_server(db_init.db_path, args.readers)
+            max_id = args.tasks
+        try:
+            results = asyncio.run(run_load(urlsplit(url), args, max_id))
+        finally:
+            if server:
+                server.terminate()
+                server.wait()
+
+    print(f"{'requisição':<14}{'total':>10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for kind, values in results.items():
+        if kind == "errors":
+            continue
+        print(f"{kind:<14}{values['requests']:>10}{values['rps']:>10.0f}"
+              f"{values['p50_ms']:>10.1f}{values['p95_ms']:>10.1f}{values['p99_ms']:>10.1f}")
+    if results["errors"]:
+        print(f"Respostas com erro (5xx): {results['errors']}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({"args": vars(args), "results": results}, file, indent=2, ensure_ascii=False)
+
+if __name__ == "__main__":
+    main()
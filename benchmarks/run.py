@@ -0,0 +1,216 @@
+"""
+Suíte de benchmarks dos caminhos principais do aplicativo, sem interface gráfica.
+Para cada tamanho de conjunto de dados mede:
+- leitura completa (TaskRepository.get_all)
+- filtros e ordenação da lista (como PlannerGUI._apply_filters / TaskListView)
+- adição, edição e exclusão individuais (um commit cada, como no formulário)
+- importação e exportação de CSV (mesmo caminho das janelas de importação/exportação)
+- importação com atualização (upsert_many) e reimportação do mesmo arquivo,
+  com IDs no arquivo e sem eles (chave pelo hash do conteúdo)
+e grava os resultados em JSON, para comparação entre commits.
+
+Uso: python -m benchmarks.run [--sizes 10k 100k 1M] [--output resultados.json]
+                              [--compare anterior.json]
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import VIRTUAL_LIST_PAGE_SIZE
+from database import DatabaseInitializer, TaskRepository
+from models import Task
+from task_io import read_csv_tasks, write_csv_rows
+from benchmarks.generator import SIZES, populate, write_csv
+
+# Cenários de filtro: (nome, filtros, ordenação)
+FILTER_SCENARIOS = [
+    ("filtro_nenhum_data", {}, "due_date"),
+    ("filtro_status_prioridade", {"status": "em andamento"}, "priority"),
+    ("filtro_tag_status_data", {"tag_contains": "desenv", "status": "não iniciado"}, "due_date"),
+    ("filtro_titulo_status", {"title_contains": "mensal 12"}, "status"),
+    ("filtro_texto_data", {"text": "relatorio cliente"}, "due_date"),
+]
+
+def timed(func, repeat: int = 1) -> float:
+    """Menor tempo, em segundos, entre as execuções de func()"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def result(seconds: float, rows: int) -> dict:
+    return {"seconds": round(seconds, 6), "rows": rows,
+            "rows_per_s": round(rows / seconds) if seconds else None}
+
+def bench_reads(repo: TaskRepository, rows: int, repeat: int) -> dict:
+    """Leitura completa e filtros da lista de tarefas"""
+    results = {"get_all": result(timed(repo.get_all, repeat), rows)}
+    for name, filters, order_by in FILTER_SCENARIOS:
+        count = repo.count(**filters)
+        # Carga da lista: total + primeira página (TaskListView.refresh)
+        seconds = timed(lambda: (repo.count(**filters),
+                                 repo.page_rows(limit=VIRTUAL_LIST_PAGE_SIZE, order_by=order_by, **filters)),
+                        repeat)
+        results[f"{name}_pagina"] = result(seconds, min(count, VIRTUAL_LIST_PAGE_SIZE))
+        # Resultado completo, ordenado (TaskRepository.query)
+        seconds = timed(lambda: repo.query(order_by=order_by, **filters), repeat)
+        results[f"{name}_completo"] = result(seconds, count)
+    return results
+
+def bench_writes(repo: TaskRepository, operations: int) -> dict:
+    """Adições, edições e exclusões individuais, cada uma com seu commit"""
+    ids = []
+    start = time.perf_counter()
+    for i in range(operations):
+        ids.append(repo.add(Task(id=None, titulo=f"Nova tarefa {i}", description="Criada pelo benchmark",
+                                 tag="benchmark", due_date="15/08/2025", priority="alta")))
+    add_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for task_id in ids:
+        repo.update(Task(id=task_id, titulo=f"Tarefa editada {task_id}", description="Editada pelo benchmark",
+                         status="em andamento", tag="benchmark", due_date="16/08/2025", priority="baixa"))
+    update_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for task_id in ids:
+        repo.delete(task_id)
+    delete_time = time.perf_counter() - start
+
+    return {"add": result(add_time, operations), "update": result(update_time, operations),
+            "delete": result(delete_time, operations)}
+
+def import_csv(import_method, csv_path: str):
+    """Importa o CSV com add_many ou upsert_many; devolve o tempo e o relatório"""
+    start = time.perf_counter()
+    with open(csv_path, "rb") as raw:
+        report = import_method(read_csv_tasks(io.TextIOWrapper(raw, encoding="utf-8", newline="")))
+    seconds = time.perf_counter() - start
+    if report.errors:
+        raise RuntimeError(f"Importação com erros: {report.errors[:3]}")
+    return seconds, report
+
+def bench_upsert(tmp: str, rows: int, csv_path: str, suffix: str = "") -> dict:
+    """
+    Importação com atualização (upsert_many) em um banco vazio e reimportação
+    do mesmo arquivo, em que nenhuma tarefa muda
+    :param suffix: Sufixo dos nomes dos resultados (um por tipo de chave do arquivo)
+    """
+    db_init = DatabaseInitializer(os.path.join(tmp, f"upsert{suffix}_{rows}.db"))
+    db_init.initialize_schema()
+    repo = TaskRepository(db_init)
+    upsert_time, report = import_csv(repo.upsert_many, csv_path)
+    reimport_time, again = import_csv(repo.upsert_many, csv_path)
+    db_init.close()
+    if again.unchanged != report.inserted:
+        raise RuntimeError(f"Reimportação alterou tarefas: {again}")
+    return {f"csv_upsert{suffix}": result(upsert_time, report.inserted),
+            f"csv_reimport{suffix}": result(reimport_time, again.unchanged)}
+
+def bench_csv(tmp: str, rows: int, csv_path: str) -> dict:
+    """Importação de CSV em um banco vazio e exportação completa, como nas janelas do aplicativo"""
+    db_init = DatabaseInitializer(os.path.join(tmp, f"import_{rows}.db"))
+    db_init.initialize_schema()
+    repo = TaskRepository(db_init)
+    import_time, report = import_csv(repo.add_many, csv_path)
+
+    export_path = os.path.join(tmp, f"export_{rows}.csv")
+    start = time.perf_counter()
+    with open(export_path, "w", newline="", encoding="utf-8") as file:
+        written = write_csv_rows(file, repo.iter_display_rows())
+    export_time = time.perf_counter() - start
+    db_init.close()
+    os.remove(export_path)
+    return {"csv_import": result(import_time, report.inserted), "csv_export": result(export_time, written)}
+
+def run_size(label: str, rows: int, args) -> dict:
+    """Executa todos os benchmarks para um tamanho de conjunto de dados"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_init = DatabaseInitializer(os.path.join(tmp, "bench.db"))
+        db_init.initialize_schema()
+        populate(db_init.connect(), rows)
+        repo = TaskRepository(db_init)
+
+        results = bench_reads(repo, rows, args.repeat)
+        results.update(bench_writes(repo, args.writes))
+        db_init.close()
+
+        csv_path = os.path.join(tmp, "tarefas.csv")
+        with open(csv_path, "w", newline="", encoding="utf-8") as file:
+            write_csv(file, rows)
+        results.update(bench_csv(tmp, rows, csv_path))
+        results.update(bench_upsert(tmp, rows, csv_path))
+
+        # Sem IDs, a chave é o hash do título e da descrição (content_hash)
+        csv_path = os.path.join(tmp, "tarefas_sem_id.csv")
+        with open(csv_path, "w", newline="", encoding="utf-8") as file:
+            write_csv(file, rows, with_ids=False)
+        results.update(bench_upsert(tmp, rows, csv_path, "_hash"))
+
+    for name, values in results.items():
+        print(f"{label:>5} {name:<32}{values['seconds'] * 1000:>12.1f} ms{values['rows']:>10}", file=sys.stderr)
+    return results
+
+def environment() -> dict:
+    """Identifica o commit e o ambiente em que os resultados foram obtidos"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {"commit": commit, "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(), "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform()}
+
+def compare(previous: dict, current: dict) -> None:
+    """Mostra a razão entre os tempos atuais e os de um resultado anterior"""
+    print(f"Comparação com {previous['environment'].get('commit')}", file=sys.stderr)
+    for label, results in current["results"].items():
+        for name, values in results.items():
+            before = previous["results"].get(label, {}).get(name)
+            if not before or not before["seconds"]:
+                continue
+            ratio = values["seconds"] / before["seconds"]
+            flag = "  <-- mais lento" if ratio > 1.2 else ""
+            print(f"{label:>5} {name:<32}{ratio:>8.2f}x{flag}", file=sys.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=3, help="execuções das leituras (vale a melhor)")
+    parser.add_argument("--writes", type=int, default=500, help="adições/edições/exclusões individuais")
+    parser.add_argument("--output", help="arquivo JSON de saída (padrão: saída padrão)")
+    parser.add_argument("--compare", help="arquivo JSON de uma execução anterior")
+    args = parser.parse_args()
+
+    report = {
+        "environment": environment(),
+        "parameters": {"repeat": args.repeat, "writes": args.writes},
+        "results": {label: run_size(label, SIZES[label], args) for label in args.sizes}
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+    else:
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            compare(json.load(file), report)
+
+if __name__ == "__main__":
+    main()
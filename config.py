@@ -1,7 +1,15 @@
 import locale
 
-# Configurar localização para português
-locale.setlocale(locale.LC_ALL, 'pt_BR.UTF-8')
+def configure_locale() -> None:
+    """
+    Configura a localização para português.
+    Chamada ao iniciar a interface gráfica, e não na importação deste módulo,
+    para que a linha de comando e os benchmarks não dependam do locale pt_BR.
+    """
+    try:
+        locale.setlocale(locale.LC_ALL, 'pt_BR.UTF-8')
+    except locale.Error:
+        pass  # Locale não instalado no sistema: mantém o padrão
 
 # Configurações globais
 WINDOW_MIN_WIDTH = 1200
@@ -28,4 +36,95 @@ COLOR_SCHEME = {
 }
 
 # Status possíveis para as tarefas
-TASK_STATUS = ["não iniciado", "em andamento", "concluído"] 
+TASK_STATUS = ["não iniciado", "em andamento", "concluído"]
+
+# Prioridades possíveis para as tarefas
+TASK_PRIORITIES = ["baixa", "média", "alta"]
+
+# Cores dos dias no calendário, pela maior prioridade entre as tarefas do dia
+PRIORITY_COLORS = {
+    "alta": COLOR_SCHEME['warning'],
+    "média": COLOR_SCHEME['accent'],
+    "baixa": COLOR_SCHEME['success']
+}
+
+# Rótulos das faixas de prazo das estatísticas (chaves de TaskRepository.stats()['due'])
+DUE_BUCKET_LABELS = {
+    "overdue": "Atrasadas",
+    "today": "Para hoje",
+    "week": "Próximos 7 dias",
+    "later": "Depois",
+    "none": "Sem data"
+}
+
+# Opções de ordenação da lista (rótulo exibido -> chave de TaskRepository.query)
+SORT_OPTIONS = {
+    "Data Limite": "due_date",
+    "Prioridade": "priority",
+    "Status": "status",
+}
+
+# Lista de tarefas em modo janelado: acima deste número de tarefas só as linhas
+# visíveis são criadas na Treeview e os dados são buscados em páginas
+VIRTUAL_LIST_THRESHOLD = 5000
+VIRTUAL_LIST_PAGE_SIZE = 200      # Tarefas por página buscada no banco
+VIRTUAL_LIST_CACHED_PAGES = 20    # Páginas mantidas em memória durante a rolagem
+
+# Importações com até este número de tarefas são aplicadas linha a linha na lista;
+# acima disso a lista é recarregada por completo
+INCREMENTAL_REFRESH_LIMIT = 500
+
+# Sugestões exibidas ao completar o nome de uma tag (campo do formulário e busca)
+TAG_SUGGESTION_LIMIT = 10
+
+# Filtro de várias tags na busca (rótulo exibido -> exigir todas as tags)
+TAG_MATCH_OPTIONS = {
+    "Qualquer": False,
+    "Todas": True,
+}
+
+# Intervalo, em ms, da verificação de alterações feitas por outras instâncias
+# do aplicativo no mesmo banco (PRAGMA data_version)
+CHANGE_POLL_INTERVAL_MS = 1000
+
+# Registro de alterações: a compactação descarta as alterações mais antigas que
+# este número de dias (quem exporta alterações deve sincronizar antes disso)
+CHANGE_LOG_RETENTION_DAYS = 30
+
+# Importação em lote: tarefas gravadas por lote, entre avisos de progresso (todas na mesma transação)
+IMPORT_BATCH_SIZE = 1000
+
+# Cópia de segurança (snapshot): páginas do banco copiadas por passo da API de
+# backup do SQLite; entre os passos o progresso é atualizado e o cancelamento verificado
+BACKUP_PAGES_PER_STEP = 1024
+
+# Migrações que reescrevem a tabela de tarefas confirmam a cada este número de ids
+MIGRATION_BATCH_SIZE = 50000
+
+# Número máximo de resultados de consultas mantidos pelo cache de leitura
+# (CachedTaskRepository); o cache é descartado a cada alteração no banco
+QUERY_CACHE_SIZE = 256
+
+# Instrumentação de desempenho (instrumentation.py, python main.py --instrument):
+# limites, em ms, das faixas dos histogramas e comandos SQL recentes mantidos
+INSTRUMENTATION_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+INSTRUMENTATION_RECENT_SQL = 200
+
+# Servidor HTTP/JSON local (api_server.py)
+API_DEFAULT_PORT = 8765
+API_READER_THREADS = 4              # Conexões de leitura; as escritas usam uma única conexão
+API_MAX_BODY_BYTES = 64 * 1024 * 1024
+API_MAX_PAGE_SIZE = 1000            # Limite de tarefas por resposta de GET /tasks
+
+# Perfil de desempenho das conexões SQLite (aplicado em DatabaseInitializer.connect).
+# Remover uma chave mantém o padrão do SQLite para aquela configuração.
+DB_PROFILE = {
+    'journal_mode': 'WAL',          # Leitores não bloqueiam o escritor (e vice-versa)
+    'synchronous': 'NORMAL',        # Com WAL, sincroniza o disco só nos checkpoints
+    'cache_size_kib': 65536,        # Cache de páginas por conexão (64 MiB)
+    'mmap_size': 268435456,         # Leitura do arquivo via memória mapeada (256 MiB)
+    'temp_store': 'MEMORY',         # Ordenações e tabelas temporárias em memória
+    'busy_timeout_ms': 5000,        # Espera por locks de outras conexões antes de falhar
+    'cached_statements': 256,       # Cache de comandos preparados do módulo sqlite3
+    'optimize_on_close': True,      # Executa PRAGMA optimize ao fechar a conexão
+}
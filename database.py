@@ -1,16 +1,49 @@
+import hashlib
 import os
 import sqlite3
-from models import Task
+from contextlib import contextmanager
+from collections.abc import Callable, Iterable, Iterator
+from datetime import date, timedelta
+from config import (TASK_STATUS, TASK_PRIORITIES, IMPORT_BATCH_SIZE, DB_PROFILE, CHANGE_LOG_RETENTION_DAYS,
+                    BACKUP_PAGES_PER_STEP, TAG_SUGGESTION_LIMIT)
+from models import Task, ImportReport
+from migrations import migrate, rebuild_stats, rebuild_tag_stats, register_functions
+
+def to_storage_date(value: str | date | None) -> str | None:
+    """
+    Converte uma data para o formato armazenado no banco (ISO-8601, YYYY-MM-DD).
+    Aceita objetos date/datetime ou texto no formato exibido (DD/MM/YYYY).
+    Textos em outro formato são mantidos como estão.
+    """
+    if not value:
+        return None
+    if isinstance(value, date):
+        return value.isoformat()[:10]
+    if len(value) == 10 and value[2] == '/' and value[5] == '/':
+        return f"{value[6:]}-{value[3:5]}-{value[:2]}"
+    return value
+
+def to_display_date(value: str | None) -> str | None:
+    """Converte uma data armazenada (YYYY-MM-DD) para o formato exibido (DD/MM/YYYY)"""
+    if value and len(value) == 10 and value[4] == '-' and value[7] == '-':
+        return f"{value[8:]}/{value[5:7]}/{value[:4]}"
+    return value
+
+class _Cancelled(Exception):
+    """Interrompe uma operação em lote (desfazendo a transação) ou uma cópia de segurança"""
 
 class DatabaseInitializer:
     """
     Classe responsável por inicializar e gerenciar a conexão com o banco de dados SQLite.
     """
-    def __init__(self, db_path: str = None):
+    def __init__(self, db_path: str = None, profile: dict | None = None):
         """
         Inicializa o gerenciador de banco de dados.
         :param db_path: Caminho opcional para o arquivo do banco de dados
+        :param profile: Perfil de desempenho da conexão (padrão: DB_PROFILE do config);
+                        um dicionário vazio usa os padrões do SQLite
         """
+        self.profile = DB_PROFILE if profile is None else profile
         if db_path:
             self.db_path = db_path
         else:
@@ -21,44 +54,276 @@ class DatabaseInitializer:
     def connect(self) -> sqlite3.Connection:
         """Estabelece conexão com o banco de dados"""
         if not self.conn:
-            self.conn = sqlite3.connect(self.db_path)
+            self.conn = sqlite3.connect(
+                self.db_path,
+                cached_statements=self.profile.get('cached_statements', 128)
+            )
+            register_functions(self.conn)
+            self._apply_profile(self.conn)
         return self.conn
 
+    def _apply_profile(self, conn: sqlite3.Connection) -> None:
+        """Aplica as PRAGMAs do perfil de desempenho à conexão"""
+        profile = self.profile
+        if 'journal_mode' in profile:
+            conn.execute(f"PRAGMA journal_mode = {profile['journal_mode']}")
+        if 'synchronous' in profile:
+            conn.execute(f"PRAGMA synchronous = {profile['synchronous']}")
+        if 'cache_size_kib' in profile:
+            # Valores negativos indicam o tamanho em KiB, e não em páginas
+            conn.execute(f"PRAGMA cache_size = {-int(profile['cache_size_kib'])}")
+        if 'mmap_size' in profile:
+            conn.execute(f"PRAGMA mmap_size = {int(profile['mmap_size'])}")
+        if 'temp_store' in profile:
+            conn.execute(f"PRAGMA temp_store = {profile['temp_store']}")
+        if 'busy_timeout_ms' in profile:
+            conn.execute(f"PRAGMA busy_timeout = {int(profile['busy_timeout_ms'])}")
+
     def initialize_schema(self) -> None:
         """
-        Inicializa o esquema do banco de dados.
-        Cria a tabela de tarefas se não existir.
+        Inicializa o esquema do banco de dados, aplicando as migrações pendentes
+        (migrations.py). Se o banco já está na versão atual, nenhum comando de
+        esquema é executado.
+        """
+        migrate(self.connect())
+
+    def backup(self, target_path: str, pages: int = BACKUP_PAGES_PER_STEP,
+               progress: Callable[[int, int], None] | None = None, cancel=None) -> bool:
+        """
+        Grava uma cópia consistente do banco (snapshot) com a API de backup do
+        SQLite, em passos de algumas páginas, enquanto o aplicativo continua
+        lendo e gravando. A cópia é feita em um arquivo temporário, que só
+        substitui target_path quando termina.
+        :param target_path: Arquivo de destino
+        :param pages: Páginas copiadas por passo
+        :param progress: Chamado após cada passo com (páginas copiadas, total de páginas)
+        :param cancel: Objeto com is_set(); quando sinalizado, a cópia é interrompida
+        :return: True se a cópia foi concluída, False se foi cancelada
         """
-        conn = self.connect()
-        cursor = conn.cursor()
-        
+        def step(status, remaining, total):
+            if progress:
+                progress(total - remaining, total)
+            if cancel is not None and cancel.is_set():
+                raise _Cancelled()
+
+        temp_path = target_path + ".tmp"
+        target = sqlite3.connect(temp_path)
         try:
-            cursor.execute("SELECT due_date FROM tasks LIMIT 1")
-            needs_create = False
-        except sqlite3.OperationalError:
-            needs_create = True
-            cursor.execute("DROP TABLE IF EXISTS tasks")
-            
-        if needs_create:
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS tasks (
-                    id           INTEGER PRIMARY KEY AUTOINCREMENT,
-                    titulo       TEXT NOT NULL,
-                    description  TEXT NOT NULL,
-                    status       TEXT NOT NULL DEFAULT 'não iniciado',
-                    tag         TEXT,
-                    due_date    DATE,
-                    priority    TEXT DEFAULT 'média'
-                );
-            """)
-            conn.commit()
+            self.connect().backup(target, pages=pages, progress=step, sleep=0)
+        except BaseException as e:
+            target.close()
+            os.remove(temp_path)
+            if isinstance(e, _Cancelled):
+                return False
+            raise
+        target.close()
+        os.replace(temp_path, target_path)
+        return True
 
     def close(self) -> None:
         """Fecha a conexão com o banco de dados"""
         if self.conn:
+            if self.profile.get('optimize_on_close'):
+                # Atualiza as estatísticas do planejador de consultas, se necessário
+                try:
+                    self.conn.execute("PRAGMA optimize")
+                except sqlite3.Error:
+                    pass
             self.conn.close()
             self.conn = None
 
+# Expressões de ordenação aceitas por TaskRepository.query() e page().
+# Cada uma tem um índice correspondente (criado em migrations.py, com a mesma
+# expressão) e é desempatada pelo id, o que mantém
+# a ordem estável e permite a paginação por chave (keyset).
+SORT_KEYS = {
+    "due_date": "COALESCE(due_date, '~')",
+    "priority": "CASE priority WHEN 'alta' THEN 0 WHEN 'média' THEN 1 WHEN 'baixa' THEN 2 ELSE 3 END",
+    "status": (
+        "CASE status WHEN 'não iniciado' THEN 0 WHEN 'em andamento' THEN 1 "
+        "WHEN 'concluído' THEN 2 ELSE 3 END"
+    ),
+    "id": "id",
+}
+
+# Faixas de prazo usadas por TaskRepository.stats(), na ordem de exibição
+DUE_BUCKETS = ("overdue", "today", "week", "later", "none")
+
+TASK_COLUMNS = "id, titulo, description, status, tag, due_date, priority"
+
+# Mesmas colunas de TASK_COLUMNS já no formato exibido (texto vazio no lugar
+# de NULL e data em DD/MM/YYYY), para leituras que não precisam de objetos Task
+_DISPLAY_FIELDS = (
+    "titulo, description, status, IFNULL(tag, ''), "
+    "CASE WHEN due_date GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]' "
+    "THEN substr(due_date, 9, 2) || '/' || substr(due_date, 6, 2) || '/' || substr(due_date, 1, 4) "
+    "ELSE IFNULL(due_date, '') END, "
+    "priority"
+)
+DISPLAY_COLUMNS = "id, " + _DISPLAY_FIELDS
+
+def _like_pattern(text: str) -> str:
+    """Monta um padrão LIKE de substring, escapando os curingas do texto"""
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+def _glob_prefix(text: str) -> str:
+    """
+    Padrão GLOB de início de texto; diferente do LIKE, o GLOB diferencia
+    maiúsculas e por isso usa o índice de uma coluna comum (tags.folded)
+    """
+    return "".join(f"[{char}]" if char in "*?[" else char for char in text) + "*"
+
+def split_tags(text: str | None) -> list[str]:
+    """
+    Separa o texto de tasks.tag nas tags da tarefa (separadas por vírgula, sem
+    espaços nas pontas), como os triggers que mantêm a tabela tags; um texto
+    com caracteres de controle é uma tag só
+    :return: Tags na ordem digitada, sem repetições (sem diferenciar maiúsculas,
+             por casefold(), como tags.folded)
+    """
+    text = text or ""
+    tags = {}
+    for name in [text] if any(0 < ord(char) < 32 for char in text) else text.split(","):
+        name = name.strip(" ")
+        if name:
+            tags.setdefault(name.casefold(), name)
+    return list(tags.values())
+
+def fts_query(text: str) -> str | None:
+    """
+    Converte o texto digitado em uma consulta FTS5: cada palavra vira um termo
+    entre aspas com busca por prefixo, e todas precisam aparecer na tarefa
+    :return: Consulta FTS5 ou None se o texto não tiver palavras
+    """
+    terms = text.split()
+    if not terms:
+        return None
+    return " ".join('"' + term.replace('"', '""') + '"*' for term in terms)
+
+def _build_filters(title_contains: str | None = None, tag_contains: str | None = None,
+                   status: str | None = None, due_from: str | date | None = None,
+                   due_to: str | date | None = None, text: str | None = None,
+                   tags: Iterable[str] | None = None, all_tags: bool = False) -> tuple[list[str], list]:
+    """Monta as condições WHERE (e seus parâmetros) dos filtros da lista de tarefas"""
+    conditions = []
+    params: list = []
+    match = fts_query(text) if text else None
+    if match:
+        conditions.append("id IN (SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH ?)")
+        params.append(match)
+    if title_contains:
+        conditions.append("casefold(titulo) LIKE ? ESCAPE '\\'")
+        params.append(_like_pattern(title_contains.casefold()))
+    if tag_contains:
+        conditions.append("casefold(tag) LIKE ? ESCAPE '\\'")
+        params.append(_like_pattern(tag_contains.casefold()))
+    names = split_tags(tags) if isinstance(tags, str) else list(tags or ())
+    keys = list(dict.fromkeys(name.casefold() for name in names if name))
+    if keys:
+        tag_ids = "SELECT task_id FROM task_tags WHERE tag_id = (SELECT id FROM tags WHERE folded = ?)"
+        if all_tags:
+            # Interseção das tarefas de cada tag, pelo índice (tag_id, task_id)
+            conditions.append(f"id IN ({' INTERSECT '.join([tag_ids] * len(keys))})")
+        else:
+            conditions.append(
+                "id IN (SELECT task_id FROM task_tags WHERE tag_id IN "
+                f"(SELECT id FROM tags WHERE folded IN ({', '.join('?' * len(keys))})))"
+            )
+        params.extend(keys)
+    if status:
+        conditions.append("status = ?")
+        params.append(status)
+    if due_from:
+        conditions.append("due_date >= ?")
+        params.append(to_storage_date(due_from))
+    if due_to:
+        conditions.append("due_date <= ?")
+        params.append(to_storage_date(due_to))
+    return conditions, params
+
+def validate_task(task: Task) -> str | None:
+    """
+    Valida os campos de uma tarefa antes da gravação
+    :return: Mensagem de erro ou None se a tarefa for válida
+    """
+    if not task.titulo or not task.titulo.strip():
+        return "Título é obrigatório."
+    if not task.description or not task.description.strip():
+        return "Descrição é obrigatória."
+    if task.status not in TASK_STATUS:
+        return f"Status inválido: '{task.status}'."
+    if task.priority not in TASK_PRIORITIES:
+        return f"Prioridade inválida: '{task.priority}'."
+    if task.due_date:
+        try:
+            date.fromisoformat(to_storage_date(task.due_date))
+        except (TypeError, ValueError):
+            return f"Data limite inválida: '{task.due_date}' (use DD/MM/YYYY)."
+    return None
+
+def content_hash(task: Task) -> str:
+    """
+    Hash do título e da descrição, que identifica na importação com atualização
+    (TaskRepository.upsert_many) uma tarefa vinda de um CSV sem ID
+    """
+    data = f"{task.titulo}\x1f{task.description}".encode()
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+# Atualização feita por upsert_many quando a tarefa já existe; o WHERE evita
+# regravar (e disparar os triggers de) tarefas que não mudaram
+_UPSERT_UPDATE = """
+    DO UPDATE SET titulo = excluded.titulo, description = excluded.description, status = excluded.status,
+                  tag = excluded.tag, due_date = excluded.due_date, priority = excluded.priority
+    WHERE titulo IS NOT excluded.titulo OR description IS NOT excluded.description
+       OR status IS NOT excluded.status OR tag IS NOT excluded.tag
+       OR due_date IS NOT excluded.due_date OR priority IS NOT excluded.priority
+"""
+# Várias linhas por comando ({} recebe os VALUES), como em add_many: a busca
+# textual (FTS5) grava o índice pendente a cada comando, então um comando por
+# linha (executemany) multiplica o custo dos triggers de busca
+_UPSERT_BY_ID = (
+    "INSERT INTO tasks (id, titulo, description, status, tag, due_date, priority) "
+    "VALUES {} ON CONFLICT (id)" + _UPSERT_UPDATE
+)
+_UPSERT_BY_HASH = (
+    "INSERT INTO tasks (content_hash, titulo, description, status, tag, due_date, priority) "
+    "VALUES {} ON CONFLICT (content_hash) WHERE content_hash IS NOT NULL" + _UPSERT_UPDATE
+)
+_UPSERT_VALUES = "(?, ?, ?, ?, ?, ?, ?)"
+
+# Máximo de ids por lista IN (...), abaixo do limite de parâmetros do SQLite
+IN_LIST_SIZE = 500
+
+# Tarefas por comando em add_many() e upsert_many(); com até 7 parâmetros por
+# linha, abaixo do limite de 999 parâmetros de versões antigas do SQLite
+_INSERT_TASK = "INSERT INTO tasks (titulo, description, status, tag, due_date, priority) VALUES "
+_INSERT_VALUES = "(?, ?, ?, ?, ?, ?)"
+INSERT_ROWS_PER_STATEMENT = 140
+
+def _chunks(values: Iterable, size: int) -> Iterator[list]:
+    """Divide os valores em listas de no máximo size elementos"""
+    chunk = []
+    for value in values:
+        chunk.append(value)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _split_key_row(cursor: sqlite3.Cursor, row: tuple) -> tuple[tuple, tuple]:
+    """
+    Row factory das consultas paginadas: separa a última coluna (valor da
+    ordenação) do restante da linha e devolve (linha, (valor, id))
+    """
+    return row[:-1], (row[-1], row[0])
+
+def _row_to_task(row) -> Task:
+    """Converte uma linha (na ordem de TASK_COLUMNS) em Task"""
+    return Task(id=row[0], titulo=row[1], description=row[2], status=row[3], tag=row[4],
+                due_date=to_display_date(row[5]), priority=row[6])
+
 class TaskRepository:
     """
     Classe responsável por realizar operações CRUD (Create, Read, Update, Delete)
@@ -66,6 +331,49 @@ class TaskRepository:
     """
     def __init__(self, db_init: DatabaseInitializer):
         self.conn = db_init.connect()
+        self._tx_depth = 0
+
+    @contextmanager
+    def transaction(self):
+        """
+        Unidade de trabalho: as operações dentro do bloco são gravadas em um único
+        commit ao final, ou desfeitas se ocorrer uma exceção.
+        Blocos aninhados usam SAVEPOINT e desfazem apenas a própria parte.
+
+        Exemplo:
+            with repo.transaction():
+                repo.add(task)
+                repo.set_status_many(ids, "concluído")
+        """
+        depth = self._tx_depth
+        savepoint = f"tx_{depth}"
+        if depth:
+            self.conn.execute(f"SAVEPOINT {savepoint}")
+        elif not self.conn.in_transaction:
+            # BEGIN explícito: sem ele, o primeiro SAVEPOINT aninhado abriria a
+            # transação e o seu RELEASE faria o commit antes da hora
+            self.conn.execute("BEGIN")
+        self._tx_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._tx_depth -= 1
+            if depth:
+                self.conn.execute(f"ROLLBACK TO {savepoint}")
+                self.conn.execute(f"RELEASE {savepoint}")
+            else:
+                self.conn.rollback()
+            raise
+        self._tx_depth -= 1
+        if depth:
+            self.conn.execute(f"RELEASE {savepoint}")
+        else:
+            self.conn.commit()
+
+    def _commit(self) -> None:
+        """Grava as alterações, a menos que estejam dentro de transaction()"""
+        if not self._tx_depth:
+            self.conn.commit()
 
     def add(self, task: Task) -> int:
         """
@@ -76,18 +384,465 @@ class TaskRepository:
         try:
             cursor = self.conn.execute(
                 "INSERT INTO tasks (titulo, description, status, tag, due_date, priority) VALUES (?, ?, ?, ?, ?, ?)",
-                (task.titulo, task.description, task.status, task.tag, task.due_date, task.priority)
+                (task.titulo, task.description, task.status, task.tag, to_storage_date(task.due_date), task.priority)
             )
-            self.conn.commit()
+            self._commit()
             return cursor.lastrowid
         except sqlite3.Error:
             return -1
 
+    def add_many(self, tasks: Iterable[Task], batch_size: int = IMPORT_BATCH_SIZE,
+                 progress: Callable[[int], None] | None = None,
+                 cancel=None) -> ImportReport:
+        """
+        Adiciona tarefas em lote, com inserções agrupadas (várias linhas por INSERT)
+        dentro de uma única transação. Tarefas inválidas são ignoradas e registradas no relatório.
+        :param tasks: Tarefas a inserir (pode ser um gerador, lido sob demanda)
+        :param batch_size: Quantidade de tarefas lidas entre os avisos de progresso
+        :param progress: Chamado a cada lote com o número de registros já processados
+        :param cancel: Objeto com is_set() (ex.: threading.Event); quando sinalizado,
+                       a transação é desfeita e nada é gravado
+        :return: Relatório com inseridas, erros por registro e os ids gerados para elas
+        """
+        report = ImportReport()
+        batch = []
+        number = 0
+        try:
+            with self.transaction():
+                for number, task in enumerate(tasks, start=1):
+                    error = validate_task(task)
+                    if error:
+                        report.errors.append((number, error))
+                    else:
+                        batch.append((task.titulo, task.description, task.status, task.tag,
+                                      to_storage_date(task.due_date), task.priority))
+
+                    if number % batch_size == 0:
+                        report.ids.extend(self._insert_rows(batch))
+                        batch.clear()
+                        if progress:
+                            progress(number)
+                        if cancel is not None and cancel.is_set():
+                            raise _Cancelled()
+
+                if batch:
+                    report.ids.extend(self._insert_rows(batch))
+        except _Cancelled:
+            return ImportReport(errors=report.errors, cancelled=True)
+
+        if progress:
+            progress(number)
+        report.inserted = len(report.ids)
+        return report
+
+    def _insert_rows(self, rows: list[tuple]) -> list[int]:
+        """
+        Insere as linhas (campos na ordem de _INSERT_TASK) com INSERT ... RETURNING
+        de várias linhas por comando, já que executemany não devolve os ids gerados
+        :return: Ids das tarefas inseridas
+        """
+        ids = []
+        for chunk in _chunks(rows, INSERT_ROWS_PER_STATEMENT):
+            sql = _INSERT_TASK + ", ".join([_INSERT_VALUES] * len(chunk)) + " RETURNING id"
+            ids.extend(task_id for task_id, in self.conn.execute(sql, [value for row in chunk for value in row]))
+        return ids
+
+    def upsert_many(self, tasks: Iterable[Task], batch_size: int = IMPORT_BATCH_SIZE,
+                    progress: Callable[[int], None] | None = None,
+                    cancel=None) -> ImportReport:
+        """
+        Importa tarefas sem duplicá-las, em lotes (INSERT ... ON CONFLICT DO UPDATE)
+        dentro de uma única transação. A chave é o ID da tarefa, quando informado,
+        ou o hash do título e da descrição (content_hash). Tarefas existentes só são
+        regravadas se algum campo mudou, então reimportar o mesmo arquivo não grava nada.
+        :param tasks: Tarefas a importar (pode ser um gerador, lido sob demanda)
+        :param batch_size: Quantidade de tarefas lidas entre as gravações e os avisos de progresso
+        :param progress: Chamado a cada lote com o número de registros já processados
+        :param cancel: Objeto com is_set(); quando sinalizado, a transação é desfeita
+        :return: Relatório com incluídas, atualizadas, inalteradas, erros e os ids
+                 das tarefas incluídas ou atualizadas
+        """
+        report = ImportReport()
+        # Lotes por tipo de chave: (comando, consulta das chaves existentes, linhas, chaves)
+        batches = {
+            "id": (_UPSERT_BY_ID, "SELECT COUNT(*) FROM tasks WHERE id IN ({})", [], set()),
+            "hash": (_UPSERT_BY_HASH, "SELECT COUNT(*) FROM tasks WHERE content_hash IN ({})", [], set()),
+        }
+
+        def flush(kind: str) -> None:
+            sql, count_sql, rows, keys = batches[kind]
+            if not rows:
+                return
+            existing = 0
+            for chunk in _chunks(keys, IN_LIST_SIZE):
+                existing += self.conn.execute(count_sql.format(", ".join("?" * len(chunk))), chunk).fetchone()[0]
+            # rowcount conta as linhas incluídas e as atualizadas (não as inalteradas)
+            written = 0
+            for chunk in _chunks(rows, INSERT_ROWS_PER_STATEMENT):
+                values = ", ".join([_UPSERT_VALUES] * len(chunk))
+                written += self.conn.execute(sql.format(values), [value for row in chunk for value in row]).rowcount
+            inserted = len(rows) - existing
+            report.inserted += inserted
+            report.updated += written - inserted
+            report.unchanged += existing - (written - inserted)
+            rows.clear()
+            keys.clear()
+
+        number = 0
+        try:
+            with self.transaction():
+                # Lido dentro da transação: alterações gravadas antes por outras
+                # conexões não entram em report.ids
+                start_seq = self.change_seq()
+                for number, task in enumerate(tasks, start=1):
+                    error = validate_task(task)
+                    if error:
+                        report.errors.append((number, error))
+                    else:
+                        kind, key = ("id", task.id) if task.id is not None else ("hash", content_hash(task))
+                        _, _, rows, keys = batches[kind]
+                        if key in keys:
+                            # Chave repetida no arquivo: grava o lote antes, para que as
+                            # contagens considerem a primeira ocorrência como existente
+                            flush(kind)
+                        rows.append((key, task.titulo, task.description, task.status, task.tag,
+                                     to_storage_date(task.due_date), task.priority))
+                        keys.add(key)
+
+                    if number % batch_size == 0:
+                        flush("id")
+                        flush("hash")
+                        if progress:
+                            progress(number)
+                        if cancel is not None and cancel.is_set():
+                            raise _Cancelled()
+
+                flush("id")
+                flush("hash")
+                report.ids = [row[0] for row in self.conn.execute(
+                    "SELECT id FROM tasks WHERE change_seq > ?", (start_seq,))]
+        except _Cancelled:
+            return ImportReport(errors=report.errors, cancelled=True)
+
+        if progress:
+            progress(number)
+        return report
+
+    def get(self, task_id: int) -> Task | None:
+        """Busca uma tarefa pelo ID, ou None se ela não existir"""
+        row = self.conn.execute(f"SELECT {TASK_COLUMNS} FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return _row_to_task(row) if row else None
+
     def get_all(self) -> list[Task]:
         """Retorna todas as tarefas do banco de dados"""
-        cur = self.conn.execute("SELECT id, titulo, description, status, tag, due_date, priority FROM tasks")
-        return [Task(id=row[0], titulo=row[1], description=row[2], status=row[3], tag=row[4], due_date=row[5], priority=row[6]) 
-                for row in cur.fetchall()]
+        cur = self.conn.execute(f"SELECT {TASK_COLUMNS} FROM tasks")
+        return [_row_to_task(row) for row in cur.fetchall()]
+
+    def query(self, title_contains: str | None = None, tag_contains: str | None = None,
+              status: str | None = None, due_from: str | date | None = None,
+              due_to: str | date | None = None, text: str | None = None,
+              tags: Iterable[str] | None = None, all_tags: bool = False,
+              order_by: str = "due_date", limit: int | None = None, offset: int = 0) -> list[Task]:
+        """
+        Retorna as tarefas que atendem aos filtros, já ordenadas pelo banco de dados
+        :param title_contains: Trecho a ser buscado no título (sem diferenciar maiúsculas,
+                               inclusive acentuadas: "ágil" encontra "ÁGIL")
+        :param tag_contains: Trecho a ser buscado na tag (sem diferenciar maiúsculas)
+        :param status: Status exato das tarefas
+        :param due_from: Data limite mínima, inclusiva (date ou DD/MM/YYYY)
+        :param due_to: Data limite máxima, inclusiva (date ou DD/MM/YYYY)
+        :param text: Palavras buscadas (por prefixo, sem diferenciar acentos) no título,
+                     na descrição e na tag
+        :param tags: Nomes de tags (tabela tags, sem diferenciar maiúsculas, inclusive acentuadas), em lista
+                     ou em texto separado por vírgulas; a tarefa precisa ter ao menos uma delas
+        :param all_tags: Exige todas as tags de tags, em vez de qualquer uma
+        :param order_by: Chave de ordenação ('due_date', 'priority', 'status' ou 'id')
+        :param limit: Número máximo de tarefas retornadas
+        :param offset: Quantidade de tarefas a pular (usado com limit)
+        :return: Lista de tarefas filtradas e ordenadas
+        """
+        if order_by not in SORT_KEYS:
+            raise ValueError(f"Ordenação inválida: {order_by}")
+
+        conditions, params = _build_filters(title_contains, tag_contains, status, due_from, due_to, text,
+                                            tags, all_tags)
+        sql = f"SELECT {TASK_COLUMNS} FROM tasks"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += f" ORDER BY {SORT_KEYS[order_by]}, id"
+        if limit is not None or offset:
+            sql += " LIMIT ? OFFSET ?"
+            params.extend((limit if limit is not None else -1, offset))
+
+        cur = self.conn.execute(sql, params)
+        return [_row_to_task(row) for row in cur.fetchall()]
+
+    def stats(self, **filters) -> dict:
+        """
+        Resume as tarefas por status, prioridade, tag e prazo.
+        Sem filtros (ou filtrando só o status), lê a tabela de resumo mantida por
+        triggers (task_stats), que guarda a data limite exata só das tarefas não
+        concluídas: seu tamanho depende das combinações de valores e das datas
+        das tarefas em aberto, e não do número de tarefas. Com outros filtros,
+        agrupa as tarefas filtradas em uma única consulta. Uma tarefa com várias
+        tags conta em cada uma delas: sem filtros (ou só por status) as contagens
+        por tag vêm do resumo por tag (task_tag_stats); com filtros, de task_tags.
+        :param filters: Mesmos filtros aceitos por query()
+        :return: Dicionário com:
+                 'total';
+                 'status', 'priority' e 'tag' (valor -> quantidade; tarefas sem tag ficam em '');
+                 'due': tarefas não concluídas por prazo ('overdue', 'today',
+                        'week' para os próximos 7 dias, 'later', 'none');
+                 'overdue': não concluídas com a data limite já passada;
+                 'no_due_date': todas as tarefas sem data limite;
+                 'overdue_by_tag': tag -> {prioridade: atrasadas não concluídas}
+        """
+        conditions, params = _build_filters(**filters)
+        if not conditions or conditions == ["status = ?"]:
+            # Sem filtros, ou só por status (coluna da tabela de resumo)
+            columns = "status, priority, {bucket}, SUM(total)"
+            source = "task_stats" + (" WHERE status = ?" if conditions else "")
+        else:
+            columns = "status, IFNULL(priority, ''), {bucket}, COUNT(*)"
+            source = "tasks WHERE " + " AND ".join(conditions)
+        bucket = ("CASE WHEN due_date IS NULL OR due_date = '' THEN 'none' WHEN due_date < ? THEN 'overdue' "
+                  "WHEN due_date = ? THEN 'today' WHEN due_date <= ? THEN 'week' ELSE 'later' END")
+        sql = f"SELECT {columns.format(bucket=bucket)} FROM {source} GROUP BY 1, 2, 3"
+        today = date.today()
+
+        summary = {"total": 0, "status": {}, "priority": {}, "tag": {},
+                   "due": dict.fromkeys(DUE_BUCKETS, 0), "overdue": 0, "no_due_date": 0,
+                   "overdue_by_tag": {}}
+        bucket_params = [today.isoformat(), today.isoformat(), (today + timedelta(days=7)).isoformat()]
+        for status, priority, bucket, total in self.conn.execute(sql, bucket_params + params):
+            summary["total"] += total
+            for key, value in (("status", status), ("priority", priority)):
+                summary[key][value] = summary[key].get(value, 0) + total
+            if bucket == "none":
+                summary["no_due_date"] += total
+            if status == "concluído":
+                continue
+            summary["due"][bucket] += total
+            if bucket == "overdue":
+                summary["overdue"] += total
+
+        if not conditions or conditions == ["status = ?"]:
+            self._tag_stats_from_summary(summary, params)
+        else:
+            self._tag_stats_from_tasks(summary, conditions, params)
+        return summary
+
+    def _tag_stats_from_summary(self, summary: dict, params: list) -> None:
+        """
+        Tags e atrasadas por tag de stats(), lidas de task_tag_stats (tag_id 0:
+        tarefas sem tag)
+        :param params: Vazio, ou o status filtrado
+        """
+        sql = """
+            SELECT IFNULL(tags.name, ''), {columns} FROM task_tag_stats
+            LEFT JOIN tags ON tags.id = task_tag_stats.tag_id
+            WHERE {where} GROUP BY task_tag_stats.tag_id{group}"""
+        status = "status = ?" if params else "true"
+        for name, total in self.conn.execute(sql.format(columns="SUM(total)", where=status, group=""), params):
+            summary["tag"][name] = total
+        # Chaves de prazo vazias (sem data) ou '~' (concluídas) não entram
+        late = f"{status} AND status <> 'concluído' AND due_date <> '' AND due_date < ?"
+        for name, priority, total in self.conn.execute(
+                sql.format(columns="priority, SUM(total)", where=late, group=", priority"),
+                params + [date.today().isoformat()]):
+            summary["overdue_by_tag"].setdefault(name, {})[priority] = total
+
+    def _tag_stats_from_tasks(self, summary: dict, conditions: list[str], params: list) -> None:
+        """Tags e atrasadas por tag de stats(), a partir das tarefas filtradas e de task_tags"""
+        scope = f" WHERE task_id IN (SELECT id FROM tasks WHERE {' AND '.join(conditions)})"
+        for name, total in self.conn.execute(
+                f"SELECT tags.name, COUNT(*) FROM task_tags JOIN tags ON tags.id = task_tags.tag_id{scope} "
+                "GROUP BY task_tags.tag_id", params):
+            summary["tag"][name] = total
+        tagged = self.conn.execute(f"SELECT COUNT(*) FROM (SELECT DISTINCT task_id FROM task_tags{scope})", params).fetchone()[0]
+        if summary["total"] > tagged:
+            summary["tag"][""] = summary["total"] - tagged
+
+        # Atrasadas por tag: só as tarefas atrasadas, pelo índice de due_date
+        overdue = ["status <> 'concluído'", "due_date <> ''", "due_date < ?"] + conditions
+        for name, priority, total in self.conn.execute(f"""
+                SELECT IFNULL(tags.name, ''), IFNULL(late.priority, ''), COUNT(*)
+                FROM (SELECT id, priority FROM tasks WHERE {' AND '.join(overdue)}) AS late
+                LEFT JOIN task_tags ON task_tags.task_id = late.id
+                LEFT JOIN tags ON tags.id = task_tags.tag_id
+                GROUP BY task_tags.tag_id, 2""", [date.today().isoformat()] + params):
+            summary["overdue_by_tag"].setdefault(name, {})[priority] = total
+
+    def rebuild_stats(self) -> None:
+        """Recalcula as tabelas de resumo das estatísticas a partir das tarefas (recuperação)"""
+        with self.transaction():
+            rebuild_stats(self.conn)
+            rebuild_tag_stats(self.conn)
+
+    def day_summary(self, start: str | date, end: str | date, **filters) -> dict[date, dict[str, int]]:
+        """
+        Conta as tarefas de cada dia do intervalo, separadas por prioridade,
+        sem carregar as tarefas (usado pelo calendário)
+        :param start: Primeiro dia do intervalo, inclusivo (date ou DD/MM/YYYY)
+        :param end: Último dia do intervalo, inclusivo (date ou DD/MM/YYYY)
+        :param filters: Mesmos filtros aceitos por query()
+        :return: Dicionário dia -> {prioridade: quantidade}; dias sem tarefas não aparecem
+        """
+        conditions, params = _build_filters(due_from=start, due_to=end, **filters)
+        sql = ("SELECT due_date, priority, COUNT(*) FROM tasks WHERE " + " AND ".join(conditions) +
+               " GROUP BY due_date, priority")
+        summary = {}
+        for due_date, priority, total in self.conn.execute(sql, params):
+            try:
+                day = date.fromisoformat(due_date)
+            except ValueError:
+                continue  # Datas em formato desconhecido não aparecem no calendário
+            summary.setdefault(day, {})[priority] = total
+        return summary
+
+    def count(self, **filters) -> int:
+        """
+        Conta as tarefas que atendem aos filtros
+        :param filters: Mesmos filtros aceitos por query()
+        """
+        conditions, params = _build_filters(**filters)
+        sql = "SELECT COUNT(*) FROM tasks"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        return self.conn.execute(sql, params).fetchone()[0]
+
+    def page(self, after: tuple | None = None, limit: int = 200, offset: int = 0,
+             order_by: str = "due_date", **filters) -> tuple[list[Task], list[tuple]]:
+        """
+        Retorna uma página de tarefas usando paginação por chave (keyset).
+        :param after: Chave da última tarefa da página anterior; quando informada,
+                      a busca continua a partir dela usando o índice da ordenação
+        :param limit: Tamanho da página
+        :param offset: Deslocamento usado quando não há chave (ex.: saltos da barra de rolagem)
+        :param order_by: Chave de ordenação, como em query()
+        :param filters: Mesmos filtros aceitos por query()
+        :return: Tarefas da página e a chave de ordenação de cada uma
+        """
+        rows, keys = self._page(TASK_COLUMNS, after, limit, offset, order_by, filters)
+        return [_row_to_task(row) for row in rows], keys
+
+    def page_rows(self, after: tuple | None = None, limit: int = 200, offset: int = 0,
+                  order_by: str = "due_date", **filters) -> tuple[list[tuple], list[tuple]]:
+        """
+        Como page(), mas retorna tuplas já no formato exibido (DISPLAY_COLUMNS)
+        em vez de objetos Task; é o caminho de leitura da lista de tarefas
+        """
+        return self._page(DISPLAY_COLUMNS, after, limit, offset, order_by, filters)
+
+    def _page(self, columns: str, after: tuple | None, limit: int, offset: int,
+              order_by: str, filters: dict) -> tuple[list[tuple], list[tuple]]:
+        """Consulta comum de page() e page_rows(); devolve as linhas sem a coluna da chave"""
+        if order_by not in SORT_KEYS:
+            raise ValueError(f"Ordenação inválida: {order_by}")
+        key = SORT_KEYS[order_by]
+
+        conditions, params = _build_filters(**filters)
+        if after is not None:
+            # Equivalente a (key, id) > (?, ?), escrito de forma que o SQLite
+            # consiga posicionar a busca diretamente no índice da ordenação
+            conditions.append(f"{key} >= ? AND ({key} > ? OR id > ?)")
+            params.extend((after[0], after[0], after[1]))
+        sql = f"SELECT {columns}, {key} FROM tasks"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += f" ORDER BY {key}, id LIMIT ? OFFSET ?"
+        params.extend((limit, offset))
+
+        cur = self.conn.execute(sql, params)
+        cur.row_factory = _split_key_row
+        pairs = cur.fetchall()
+        return [row for row, _ in pairs], [key for _, key in pairs]
+
+    def iter_display_rows(self, chunk_size: int = 1000, order_by: str = "id",
+                          **filters) -> Iterator[list[tuple]]:
+        """
+        Percorre as tarefas em blocos lidos do cursor (fetchmany), sem montar
+        objetos Task nem carregar a tabela inteira na memória
+        :param chunk_size: Quantidade de linhas por bloco
+        :param order_by: Chave de ordenação, como em query()
+        :param filters: Mesmos filtros aceitos por query()
+        :return: Blocos de tuplas (id, título, descrição, status, tag, data limite, prioridade)
+        """
+        if order_by not in SORT_KEYS:
+            raise ValueError(f"Ordenação inválida: {order_by}")
+
+        conditions, params = _build_filters(**filters)
+        sql = f"SELECT {DISPLAY_COLUMNS} FROM tasks"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += f" ORDER BY {SORT_KEYS[order_by]}, id"
+
+        cur = self.conn.execute(sql, params)
+        try:
+            while rows := cur.fetchmany(chunk_size):
+                yield rows
+        finally:
+            cur.close()
+
+    def search(self, text: str, limit: int = 50) -> list[tuple[int, str]]:
+        """
+        Busca textual nas tarefas, ordenada por relevância (bm25)
+        :param text: Palavras buscadas no título, na descrição e na tag
+        :param limit: Número máximo de resultados
+        :return: Pares (id, trecho) com os termos encontrados destacados entre colchetes
+        """
+        match = fts_query(text)
+        if not match:
+            return []
+        cur = self.conn.execute(
+            "SELECT rowid, snippet(tasks_fts, -1, '[', ']', '…', 12) FROM tasks_fts "
+            "WHERE tasks_fts MATCH ? ORDER BY rank LIMIT ?",
+            (match, limit)
+        )
+        return cur.fetchall()
+
+    def tag_names(self, prefix: str = "", limit: int | None = TAG_SUGGESTION_LIMIT) -> list[str]:
+        """
+        Nomes das tags em uso, em ordem alfabética, para completar o que foi digitado;
+        a busca por início do nome usa o índice de tags.folded
+        :param prefix: Início do nome (sem diferenciar maiúsculas, inclusive acentuadas);
+                       vazio lista todas
+        :param limit: Número máximo de nomes (None para todos)
+        """
+        cur = self.conn.execute(
+            "SELECT name FROM tags WHERE folded GLOB ? ORDER BY folded LIMIT ?",
+            (_glob_prefix(prefix.casefold()), limit if limit is not None else -1)
+        )
+        return [name for name, in cur]
+
+    def locate(self, task_id: int, order_by: str = "due_date", **filters) -> tuple[Task, tuple] | None:
+        """
+        Busca uma tarefa e sua chave de ordenação, como retornada por page()
+        :param task_id: ID da tarefa
+        :param order_by: Chave de ordenação, como em query()
+        :param filters: Mesmos filtros aceitos por query()
+        :return: Tarefa e chave, ou None se ela não existir ou não atender aos filtros
+        """
+        found = self._locate(TASK_COLUMNS, task_id, order_by, filters)
+        return (_row_to_task(found[0]), found[1]) if found else None
+
+    def locate_row(self, task_id: int, order_by: str = "due_date", **filters) -> tuple[tuple, tuple] | None:
+        """Como locate(), mas com a tarefa como tupla no formato exibido (DISPLAY_COLUMNS)"""
+        return self._locate(DISPLAY_COLUMNS, task_id, order_by, filters)
+
+    def _locate(self, columns: str, task_id: int, order_by: str, filters: dict) -> tuple[tuple, tuple] | None:
+        """Consulta comum de locate() e locate_row()"""
+        if order_by not in SORT_KEYS:
+            raise ValueError(f"Ordenação inválida: {order_by}")
+        key = SORT_KEYS[order_by]
+
+        conditions, params = _build_filters(**filters)
+        conditions.insert(0, "id = ?")
+        params.insert(0, task_id)
+        sql = f"SELECT {columns}, {key} FROM tasks WHERE " + " AND ".join(conditions)
+        cur = self.conn.execute(sql, params)
+        cur.row_factory = _split_key_row
+        return cur.fetchone()
 
     def update(self, task: Task) -> bool:
         """
@@ -97,11 +852,25 @@ class TaskRepository:
         """
         cur = self.conn.execute(
             "UPDATE tasks SET titulo = ?, description = ?, status = ?, tag = ?, due_date = ?, priority = ? WHERE id = ?",
-            (task.titulo, task.description, task.status, task.tag, task.due_date, task.priority, task.id)
+            (task.titulo, task.description, task.status, task.tag, to_storage_date(task.due_date), task.priority, task.id)
         )
-        self.conn.commit()
+        self._commit()
         return cur.rowcount > 0
 
+    def update_many(self, tasks: Iterable[Task]) -> int:
+        """
+        Atualiza várias tarefas em uma única transação (executemany)
+        :param tasks: Objetos Task com as informações atualizadas
+        :return: Número de tarefas atualizadas
+        """
+        with self.transaction():
+            cur = self.conn.executemany(
+                "UPDATE tasks SET titulo = ?, description = ?, status = ?, tag = ?, due_date = ?, priority = ? WHERE id = ?",
+                ((task.titulo, task.description, task.status, task.tag, to_storage_date(task.due_date),
+                  task.priority, task.id) for task in tasks)
+            )
+        return cur.rowcount
+
     def delete(self, task_id: int) -> bool:
         """
         Remove uma tarefa do banco de dados
@@ -109,10 +878,167 @@ class TaskRepository:
         :return: True se a remoção foi bem sucedida
         """
         cur = self.conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
-        self.conn.commit()
+        self._commit()
         return cur.rowcount > 0
 
+    def delete_many(self, task_ids: Iterable[int]) -> int:
+        """
+        Remove várias tarefas em uma única transação
+        :param task_ids: IDs das tarefas a remover
+        :return: Número de tarefas removidas
+        """
+        removed = 0
+        with self.transaction():
+            for chunk in _chunks(task_ids, IN_LIST_SIZE):
+                placeholders = ", ".join("?" * len(chunk))
+                cur = self.conn.execute(f"DELETE FROM tasks WHERE id IN ({placeholders})", chunk)
+                removed += cur.rowcount
+        return removed
+
+    def set_status_many(self, task_ids: Iterable[int], status: str) -> int:
+        """
+        Altera o status de várias tarefas em uma única transação
+        :param task_ids: IDs das tarefas
+        :param status: Novo status (um dos valores de TASK_STATUS)
+        :return: Número de tarefas alteradas
+        """
+        if status not in TASK_STATUS:
+            raise ValueError(f"Status inválido: {status}")
+        changed = 0
+        with self.transaction():
+            for chunk in _chunks(task_ids, IN_LIST_SIZE):
+                placeholders = ", ".join("?" * len(chunk))
+                cur = self.conn.execute(
+                    f"UPDATE tasks SET status = ? WHERE id IN ({placeholders}) AND status <> ?",
+                    (status, *chunk, status)
+                )
+                changed += cur.rowcount
+        return changed
+
     def exists(self, task_id: int) -> bool:
         """Verifica se uma tarefa existe no banco de dados"""
         cur = self.conn.execute("SELECT 1 FROM tasks WHERE id = ?", (task_id,))
         return cur.fetchone() is not None 
+
+    def data_version(self) -> int:
+        """
+        PRAGMA data_version: muda quando outra conexão (outra thread ou outro
+        processo) grava no banco; gravações desta conexão não o alteram
+        """
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def change_seq(self) -> int:
+        """Número da última alteração gravada no banco (ver changes_since)"""
+        return self.conn.execute("SELECT seq FROM change_counter").fetchone()[0]
+
+    def changes_since(self, seq: int, limit: int | None = None) -> tuple[int, list[int] | None, list[int] | None]:
+        """
+        Tarefas incluídas, alteradas ou excluídas depois da alteração informada
+        :param seq: Número retornado pela chamada anterior (ou por change_seq())
+        :param limit: Máximo de ids lidos de cada lista; quando atingido, o chamador
+                      deve recarregar tudo em vez de aplicar as alterações uma a uma
+        :return: (número atual, ids incluídos ou alterados, ids excluídos); as listas
+                 são None se as exclusões posteriores a seq já foram descartadas pela
+                 compactação (compact_changes), e o chamador deve recarregar tudo
+        """
+        # O número atual é lido primeiro: alterações gravadas depois dele ficam
+        # para a próxima chamada, mesmo que não haja uma transação de leitura
+        current = self.change_seq()
+        if seq < self.change_log_horizon():
+            return current, None, None
+        sql_limit = " LIMIT ?" if limit is not None else ""
+        params = (seq, current, limit) if limit is not None else (seq, current)
+        changed = [row[0] for row in self.conn.execute(
+            f"SELECT id FROM tasks WHERE change_seq > ? AND change_seq <= ?{sql_limit}", params)]
+        removed = [row[0] for row in self.conn.execute(
+            f"SELECT id FROM task_tombstones WHERE change_seq > ? AND change_seq <= ?{sql_limit}", params)]
+        return current, changed, removed
+
+    def change_log_horizon(self) -> int:
+        """
+        Número a partir do qual o registro de alterações está completo: exportações
+        de alterações precisam partir dele ou de um número maior
+        """
+        return self.conn.execute("SELECT compacted_seq FROM change_counter").fetchone()[0]
+
+    def iter_changes(self, since: int, until: int | None = None,
+                     chunk_size: int = 1000) -> Iterator[list[tuple]]:
+        """
+        Percorre as tarefas alteradas depois da alteração since, uma linha por
+        tarefa (a última alteração), em blocos e na ordem das alterações
+        :param since: Número da última alteração já exportada (ver change_seq())
+        :param until: Última alteração incluída (padrão: a atual); use o mesmo
+                      valor como since na próxima exportação
+        :param chunk_size: Quantidade de linhas por bloco
+        :return: Blocos de tuplas (alteração, 'upsert' ou 'delete', id, título, descrição,
+                 status, tag, data limite, prioridade); exclusões têm só os três primeiros campos
+        """
+        horizon = self.change_log_horizon()
+        if since < horizon:
+            raise ValueError(
+                f"As alterações anteriores a {horizon} já foram compactadas; "
+                f"faça uma exportação completa e use o número informado por ela"
+            )
+        current = self.change_seq()
+        if since > current:
+            raise ValueError(f"Alteração {since} não existe neste banco (a última é {current})")
+        if until is None:
+            until = current
+
+        cur = self.conn.execute(f"""
+            SELECT last.seq, CASE WHEN tasks.id IS NULL THEN 'delete' ELSE 'upsert' END,
+                   last.task_id, {_DISPLAY_FIELDS}
+            FROM (SELECT task_id, MAX(seq) AS seq FROM task_changes
+                  WHERE seq > ? AND seq <= ? GROUP BY task_id) AS last
+            LEFT JOIN tasks ON tasks.id = last.task_id
+            ORDER BY last.seq
+        """, (since, until))
+        try:
+            while rows := cur.fetchmany(chunk_size):
+                yield [row if row[1] == 'upsert' else row[:3] + (None,) * 6 for row in rows]
+        finally:
+            cur.close()
+
+    def compact_changes(self, keep_days: int | None = CHANGE_LOG_RETENTION_DAYS) -> int:
+        """
+        Compacta o registro de alterações: descarta as alterações feitas há mais
+        de keep_days dias (exportações precisarão partir de um número posterior
+        a elas), junto com os registros de exclusão (task_tombstones) do mesmo
+        período, e, das alterações restantes, mantém só a última de cada tarefa,
+        que é a única usada por iter_changes()
+        :param keep_days: Dias de alterações mantidos; None mantém todas e só
+                          remove as alterações substituídas por outras mais novas
+        :return: Número de linhas removidas do registro
+        """
+        removed = 0
+        with self.transaction():
+            if keep_days is not None:
+                through = self.conn.execute(
+                    "SELECT MAX(seq) FROM task_changes WHERE changed_at < strftime('%Y-%m-%dT%H:%M:%SZ', 'now', ?)",
+                    (f"-{int(keep_days)} days",)
+                ).fetchone()[0]
+                if through is not None:
+                    removed += self.conn.execute("DELETE FROM task_changes WHERE seq <= ?", (through,)).rowcount
+                    self.conn.execute("UPDATE change_counter SET compacted_seq = MAX(compacted_seq, ?)", (through,))
+                # Exclusões anteriores ao início do registro (changes_since passa a
+                # pedir uma recarga completa a quem estiver atrás dele)
+                self.conn.execute("DELETE FROM task_tombstones WHERE change_seq <= "
+                                  "(SELECT compacted_seq FROM change_counter)")
+            removed += self.conn.execute(
+                "DELETE FROM task_changes WHERE seq NOT IN (SELECT MAX(seq) FROM task_changes GROUP BY task_id)"
+            ).rowcount
+        return removed
+
+    def compact_changes_if_due(self, keep_days: int = CHANGE_LOG_RETENTION_DAYS) -> int:
+        """
+        Executa compact_changes() quando a alteração mais antiga do registro tem
+        mais de keep_days dias; a verificação lê só a primeira linha do registro.
+        Chamada na abertura do aplicativo e do servidor da API.
+        :return: Número de linhas removidas do registro (0 se não era necessário compactar)
+        """
+        due = self.conn.execute(
+            "SELECT 1 FROM (SELECT changed_at FROM task_changes ORDER BY seq LIMIT 1) "
+            "WHERE changed_at < strftime('%Y-%m-%dT%H:%M:%SZ', 'now', ?)",
+            (f"-{int(keep_days)} days",)
+        ).fetchone()
+        return self.compact_changes(keep_days) if due else 0
@@ -1,34 +1,56 @@
+import io
+import itertools
 import os
+import queue
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from tkcalendar import Calendar
-from datetime import datetime
-import csv
-from collections import defaultdict
+from datetime import date, datetime
 
-from config import COLOR_SCHEME
+from config import (
+    COLOR_SCHEME, SORT_OPTIONS, INCREMENTAL_REFRESH_LIMIT, CHANGE_POLL_INTERVAL_MS, TASK_STATUS,
+    TASK_PRIORITIES, PRIORITY_COLORS, DUE_BUCKET_LABELS, TAG_MATCH_OPTIONS, configure_locale
+)
 from models import Task
-from database import DatabaseInitializer, TaskRepository
+from database import DatabaseInitializer, TaskRepository, split_tags
 from gui_components import (
-    create_menu, create_task_list, create_task_form,
-    create_button
+    create_menu, create_task_list, create_task_form, create_due_date_entry,
+    create_button, ProgressDialog
 )
+from async_repository import AsyncTaskRepository
+from task_cache import CachedTaskRepository
+import instrumentation
+from instrumentation import timed
 
 class PlannerGUI:
     """
     Classe principal da interface gráfica do Planner.
     Responsável por criar e gerenciar todos os elementos visuais da aplicação.
     """
-    def __init__(self):
+    def __init__(self, profile=None):
+        """
+        :param profile: StartupProfile opcional; quando informado, os tempos de cada
+                        fase da inicialização são registrados e o aplicativo se
+                        encerra após carregar a primeira página de tarefas
+        """
+        self.profile = profile
+        configure_locale()
+
         # Inicialização do banco de dados
         self.db_init = DatabaseInitializer()
         self.db_init.initialize_schema()
-        self.repo = TaskRepository(self.db_init)
+        self.repo = CachedTaskRepository(TaskRepository(self.db_init))
+        self._form_task_id = None
+        self._change_poll = None
+        self._mark("locale e banco de dados")
 
         # Configuração da janela principal
         self.root = tk.Tk()
         self.root.title("Planner")
         
+        # Consultas pesadas rodam em uma thread própria, sem travar a janela
+        self.db = AsyncTaskRepository(self.db_init.db_path, self.root)
+        
         # Configurar janela para iniciar em tela cheia
         screen_width = self.root.winfo_screenwidth()
         screen_height = self.root.winfo_screenheight()
@@ -39,19 +61,11 @@ class PlannerGUI:
             self.root.state('zoomed')  # Windows
         except tk.TclError:
             self.root.attributes('-zoomed', True)  # Linux
+        self._mark("janela principal")
         
         # Criação do menu
         create_menu(self.root, self)
         
-        # Carrega ícone se existir
-        try:
-            icon_path = "icon.png"
-            if os.path.exists(icon_path):
-                icon = tk.PhotoImage(file=icon_path)
-                self.root.iconphoto(True, icon)
-        except Exception as e:
-            print(f"Erro ao carregar ícone: {e}")
-        
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
         
         # Configuração dos estilos
@@ -59,13 +73,56 @@ class PlannerGUI:
         
         # Criação dos elementos da interface
         self._create_main_layout()
+        self._mark("menu, estilos e layout")
         
-        # Carrega dados iniciais
-        self.load_tasks()
+        # O restante (campo de data, ícone e tarefas) fica para depois que a
+        # janela for desenhada: after_idle roda após os redesenhos pendentes
+        self.root.after_idle(lambda: self.root.after(0, self._finish_startup))
         
         # Inicia a aplicação
         self.root.mainloop()
 
+    def _finish_startup(self):
+        """Etapas da inicialização adiadas até a primeira exibição da janela"""
+        self._mark("primeira exibição da janela")
+
+        create_due_date_entry(self)
+        self._mark("campo de data (importa tkcalendar)")
+
+        # Carrega ícone se existir
+        try:
+            icon_path = "icon.png"
+            if os.path.exists(icon_path):
+                icon = tk.PhotoImage(file=icon_path)
+                self.root.iconphoto(True, icon)
+        except Exception as e:
+            print(f"Erro ao carregar ícone: {e}")
+        self._mark("ícone")
+
+        # Carrega dados iniciais (na thread do banco de dados). O número de
+        # alteração é lido antes, para não perder alterações feitas durante a carga
+        self._change_seq = self.repo.change_seq()
+        self._data_version = self.repo.data_version()
+        self.load_tasks()
+        self._change_poll = self.root.after(CHANGE_POLL_INTERVAL_MS, self._poll_changes)
+        # Compactação periódica do registro de alterações, depois da primeira carga
+        self.db.submit(lambda repo: repo.compact_changes_if_due())
+        if self.profile:
+            # A thread do banco executa as operações em ordem: esta só termina
+            # depois da carga da primeira página, e seu callback vem em seguida
+            self.db.run(lambda repo: None, lambda result, error: self._startup_profiled())
+
+    def _startup_profiled(self):
+        """Fim do modo --profile-startup: mostra os tempos e encerra"""
+        self._mark("primeira página de tarefas")
+        self.profile.report()
+        self.root.after(0, self.on_closing)
+
+    def _mark(self, phase):
+        """Registra o fim de uma fase da inicialização (modo --profile-startup)"""
+        if self.profile:
+            self.profile.mark(phase)
+
     def _setup_styles(self):
         """Configura os estilos visuais da aplicação"""
         style = ttk.Style(self.root)
@@ -145,25 +202,11 @@ class PlannerGUI:
         # Área do formulário
         create_task_form(main_pane, self)
 
+    @timed("gui.load_tasks")
     def load_tasks(self):
         """Carrega as tarefas do banco de dados para a interface"""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        tasks = self.repo.get_all()
         # Ordenar por data por padrão
-        def get_date(task):
-            if not task.due_date:
-                return datetime.max
-            try:
-                return datetime.strptime(task.due_date, '%d/%m/%Y')
-            except ValueError:
-                return datetime.max
-        tasks.sort(key=get_date)
-        for t in tasks:
-            self.tree.insert('', tk.END, values=(
-                t.id, t.titulo, t.description, t.status, 
-                t.tag or '', t.due_date or '', t.priority
-            ))
+        self.task_view.show(order_by="due_date")
 
     def clear_form(self):
         """Limpa todos os campos do formulário"""
@@ -173,6 +216,7 @@ class PlannerGUI:
         self.status_combobox.current(0)
         self.due_date_entry.set_date(datetime.now())
         self.priority_combobox.current(1)
+        self._form_task_id = None
 
     def on_select(self, event):
         """Manipula o evento de seleção de uma tarefa na lista"""
@@ -180,7 +224,13 @@ class PlannerGUI:
         if not sel:
             return
         values = self.tree.item(sel[0])['values']
-        _, titulo, desc, status, tag, due_date, priority = values
+        task_id, titulo, desc, status, tag, due_date, priority = values
+        
+        # A lista janelada restaura a seleção ao rolar; não sobrescreve edições
+        # em andamento da mesma tarefa
+        if task_id == self._form_task_id:
+            return
+        self._form_task_id = task_id
         
         self.titulo_entry.delete(0, tk.END)
         self.titulo_entry.insert(0, titulo)
@@ -205,7 +255,7 @@ class PlannerGUI:
         """Adiciona uma nova tarefa"""
         titulo = self.titulo_entry.get().strip()
         desc = self.desc_entry.get().strip()
-        tag = self.tag_entry.get().strip()
+        tag = ", ".join(split_tags(self.tag_entry.get()))
         status = self.status_combobox.get()
         due_date = self.due_date_entry.get_date().strftime('%d/%m/%Y')
         priority = self.priority_combobox.get()
@@ -223,23 +273,24 @@ class PlannerGUI:
         new_id = self.repo.add(task)
         
         if new_id != -1:
+            self.task_view.task_saved(new_id)
+            self._local_changes_seen()
             messagebox.showinfo("Sucesso", f"Tarefa '{new_id}' adicionada.")
-            self.load_tasks()
             self.clear_form()
         else:
             messagebox.showerror("Erro", "Falha ao adicionar tarefa.")
 
     def update_task(self):
         """Atualiza uma tarefa existente"""
-        sel = self.tree.selection()
+        sel = self.task_view.selected_ids()
         if not sel:
             messagebox.showwarning("Aviso", "Selecione uma tarefa para atualizar.")
             return
             
-        task_id = self.tree.item(sel[0])['values'][0]
+        task_id = sel[0]
         titulo = self.titulo_entry.get().strip()
         desc = self.desc_entry.get().strip()
-        tag = self.tag_entry.get().strip()
+        tag = ", ".join(split_tags(self.tag_entry.get()))
         status = self.status_combobox.get()
         due_date = self.due_date_entry.get_date().strftime('%d/%m/%Y')
         priority = self.priority_combobox.get()
@@ -255,80 +306,355 @@ class PlannerGUI:
         task = Task(id=task_id, titulo=titulo, description=desc, status=status,
                    tag=tag if tag else None, due_date=due_date, priority=priority)
         if self.repo.update(task):
+            self.task_view.task_saved(task_id)
+            self._local_changes_seen()
             messagebox.showinfo("Sucesso", f"Tarefa '{task_id}' atualizada.")
-            self.load_tasks()
         else:
             messagebox.showerror("Erro", "Falha ao atualizar tarefa.")
 
     def delete_task(self):
-        """Remove uma tarefa"""
-        sel = self.tree.selection()
+        """Remove a tarefa selecionada (ou todas as selecionadas, em uma única transação)"""
+        sel = self.task_view.selected_ids()
         if not sel:
             messagebox.showwarning("Aviso", "Selecione uma tarefa para deletar.")
             return
-        task_id = self.tree.item(sel[0])['values'][0]
+        if len(sel) > 1:
+            if messagebox.askyesno("Confirmação", f"Remover {len(sel)} tarefas selecionadas?"):
+                removed = self.repo.delete_many(sel)
+                self._refresh_tasks(sel, removed=True)
+                self._local_changes_seen()
+                messagebox.showinfo("Sucesso", f"{removed} tarefas deletadas.")
+                self.clear_form()
+            return
+        task_id = sel[0]
         if messagebox.askyesno("Confirmação", f"Remover tarefa '{task_id}'?"):
             if self.repo.delete(task_id):
+                self.task_view.task_removed(task_id)
+                self._local_changes_seen()
                 messagebox.showinfo("Sucesso", f"Tarefa '{task_id}' deletada.")
-                self.load_tasks()
                 self.clear_form()
             else:
                 messagebox.showerror("Erro", "Falha ao deletar tarefa.")
 
+    def set_selected_status(self, status):
+        """Altera o status de todas as tarefas selecionadas em uma única transação"""
+        sel = self.task_view.selected_ids()
+        if not sel:
+            messagebox.showwarning("Aviso", "Selecione ao menos uma tarefa.")
+            return
+        self.repo.set_status_many(sel, status)
+        self._refresh_tasks(sel)
+        self._local_changes_seen()
+        self._form_task_id = None
+
+    def _refresh_tasks(self, task_ids, removed=False):
+        """Reflete na lista alterações em várias tarefas: linha a linha se forem poucas"""
+        if len(task_ids) > INCREMENTAL_REFRESH_LIMIT:
+            self.task_view.refresh()
+            return
+        for task_id in task_ids:
+            if removed:
+                self.task_view.task_removed(task_id)
+            else:
+                self.task_view.task_saved(task_id)
+
+    def _local_changes_seen(self):
+        """
+        Depois de uma gravação desta janela, já refletida na lista, avança o
+        número de alteração e o data_version da última verificação, para que
+        _poll_changes não a aplique de novo (gravações desta conexão não alteram
+        PRAGMA data_version). Gravações de outras conexões ainda não verificadas
+        são aplicadas antes
+        """
+        self._apply_external_changes()
+        # Lidos nesta ordem: com data_version inalterado depois de ler o número,
+        # todas as alterações até ele são desta janela
+        seq = self.repo.change_seq()
+        if self.repo.data_version() == self._data_version:
+            self._change_seq = seq
+
+    def _apply_external_changes(self):
+        """
+        Verifica, por PRAGMA data_version, se outra instância do aplicativo (ou
+        outra conexão) gravou no banco; se sim, aplica na lista só as tarefas
+        alteradas desde a última verificação
+        """
+        version = self.repo.data_version()
+        if version == self._data_version:
+            return
+        self._data_version = version
+        seq, changed, removed = self.repo.changes_since(self._change_seq, limit=INCREMENTAL_REFRESH_LIMIT + 1)
+        self._change_seq = seq
+        if changed is None or len(changed) + len(removed) > INCREMENTAL_REFRESH_LIMIT:
+            self.task_view.refresh()
+        else:
+            # Pode incluir gravações desta janela feitas depois da verificação; reaplicá-las não tem efeito
+            self._refresh_tasks(removed, removed=True)
+            self._refresh_tasks(changed)
+
+    def _poll_changes(self):
+        """Verificação periódica das gravações de outras conexões (_apply_external_changes)"""
+        self._apply_external_changes()
+        self._change_poll = self.root.after(CHANGE_POLL_INTERVAL_MS, self._poll_changes)
+
     def _show_export_dialog(self):
-        """Mostra diálogo de exportação CSV"""
+        """Mostra diálogo de exportação (CSV ou JSON Lines, pela extensão do arquivo)"""
+        from task_io import is_jsonl_path, write_csv_rows, write_jsonl_rows
+
+        filters = {name: value for name, value in self.task_view.filters.items() if value}
+        order_by = "id"
+        if filters:
+            answer = messagebox.askyesnocancel(
+                "Exportar tarefas",
+                "Exportar apenas as tarefas do filtro atual?\n"
+                "(Não exporta todas as tarefas)"
+            )
+            if answer is None:
+                return
+            if answer:
+                order_by = self.task_view.order_by
+            else:
+                filters = {}
+
         file_path = filedialog.asksaveasfilename(
             defaultextension=".csv",
-            filetypes=[("CSV files", "*.csv")],
-            title="Salvar arquivo CSV"
+            filetypes=[("CSV files", "*.csv"), ("JSON Lines", "*.jsonl")],
+            title="Salvar tarefas"
         )
-        if file_path:
+        if not file_path:
+            return
+        write_rows = write_jsonl_rows if is_jsonl_path(file_path) else write_csv_rows
+
+        def work(progress, cancel):
+            # Roda fora da thread do Tk, com uma conexão própria; as linhas vão
+            # do cursor direto para o arquivo, em blocos
+            db_init = DatabaseInitializer(self.db_init.db_path)
             try:
+                repo = TaskRepository(db_init)
+                total = repo.count(**filters) or 1
                 with open(file_path, 'w', newline='', encoding='utf-8') as file:
-                    writer = csv.writer(file)
-                    writer.writerow(['ID', 'Título', 'Descrição', 'Status', 'Tag', 'Data Limite', 'Prioridade'])
-                    for task in self.repo.get_all():
-                        writer.writerow([
-                            task.id, task.titulo, task.description,
-                            task.status, task.tag or '', task.due_date or '',
-                            task.priority
-                        ])
-                messagebox.showinfo("Sucesso", "Tarefas exportadas com sucesso!")
-            except Exception as e:
-                messagebox.showerror("Erro", f"Erro ao exportar: {str(e)}")
+                    written = write_rows(
+                        file,
+                        repo.iter_display_rows(order_by=order_by, **filters),
+                        progress=lambda count: progress(count / total,
+                                                        f"{count} de {total} tarefas exportadas"),
+                        cancel=cancel
+                    )
+                if cancel.is_set():
+                    os.remove(file_path)
+                    return None
+                return written
+            finally:
+                db_init.close()
+
+        def done(written, error):
+            if error:
+                messagebox.showerror("Erro", f"Erro ao exportar: {str(error)}")
+            elif written is None:
+                messagebox.showinfo("Exportação cancelada", "O arquivo não foi gerado.")
+            else:
+                messagebox.showinfo("Sucesso", f"{written} tarefas exportadas com sucesso!")
+
+        self._run_in_background("Exportando tarefas", work, done)
+
+    def _show_export_changes_dialog(self):
+        """Mostra diálogo de exportação das alterações feitas desde uma alteração (CSV ou JSON Lines)"""
+        from tkinter import simpledialog
+        from task_io import is_jsonl_path, write_changes_csv, write_changes_jsonl
+
+        since = simpledialog.askinteger(
+            "Exportar alterações",
+            "Exportar as tarefas incluídas, alteradas ou excluídas\n"
+            f"depois da alteração nº (atual: {self.repo.change_seq()}):",
+            initialvalue=self.repo.change_log_horizon(), minvalue=0, parent=self.root
+        )
+        if since is None:
+            return
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv"), ("JSON Lines", "*.jsonl")],
+            title="Salvar alterações"
+        )
+        if not file_path:
+            return
+        write = write_changes_jsonl if is_jsonl_path(file_path) else write_changes_csv
+
+        def work(progress, cancel):
+            db_init = DatabaseInitializer(self.db_init.db_path)
+            try:
+                repo = TaskRepository(db_init)
+                until = repo.change_seq()
+                changes = repo.iter_changes(since, until)
+                first = next(changes, [])  # Valida o número antes de criar o arquivo
+                with open(file_path, 'w', newline='', encoding='utf-8') as file:
+                    return write(file, itertools.chain([first], changes)), until
+            finally:
+                db_init.close()
+
+        def done(result, error):
+            if error:
+                messagebox.showerror("Erro", f"Erro ao exportar: {str(error)}")
+                return
+            written, until = result
+            messagebox.showinfo(
+                "Sucesso",
+                f"{written} alterações exportadas.\n"
+                f"Na próxima exportação, use a alteração nº {until}."
+            )
+
+        self._run_in_background("Exportando alterações", work, done)
+
+    def _show_snapshot_dialog(self):
+        """Grava uma cópia de segurança do banco de dados, sem interromper o uso do aplicativo"""
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".db",
+            initialfile=f"tasks-{datetime.now():%Y%m%d-%H%M%S}.db",
+            filetypes=[("Banco SQLite", "*.db")],
+            title="Salvar snapshot do banco de dados"
+        )
+        if not file_path:
+            return
+
+        def work(progress, cancel):
+            # Conexão própria: a cópia roda em passos, fora da thread do Tk
+            db_init = DatabaseInitializer(self.db_init.db_path)
+            try:
+                return db_init.backup(
+                    file_path,
+                    progress=lambda copied, total: progress(copied / (total or 1),
+                                                            f"{copied} de {total} páginas copiadas"),
+                    cancel=cancel
+                )
+            finally:
+                db_init.close()
+
+        def done(completed, error):
+            if error:
+                messagebox.showerror("Erro", f"Erro ao gravar o snapshot: {str(error)}")
+            elif not completed:
+                messagebox.showinfo("Snapshot cancelado", "O arquivo não foi gerado.")
+            else:
+                messagebox.showinfo("Sucesso", f"Snapshot gravado em {file_path}")
+
+        self._run_in_background("Gravando snapshot", work, done)
 
     def _show_import_dialog(self):
-        """Mostra diálogo de importação CSV"""
+        """Mostra diálogo de importação (CSV ou JSON Lines, pela extensão do arquivo)"""
+        from task_io import is_jsonl_path, read_csv_tasks, read_jsonl_tasks
+
         file_path = filedialog.askopenfilename(
-            filetypes=[("CSV files", "*.csv")],
-            title="Selecionar arquivo CSV"
+            filetypes=[("CSV files", "*.csv"), ("JSON Lines", "*.jsonl"), ("Todos os arquivos", "*")],
+            title="Selecionar arquivo de tarefas"
+        )
+        if not file_path:
+            return
+        read_tasks = read_jsonl_tasks if is_jsonl_path(file_path) else read_csv_tasks
+        upsert = messagebox.askyesnocancel(
+            "Importar tarefas",
+            "Atualizar as tarefas já existentes em vez de duplicá-las?\n\n"
+            "Linhas com ID atualizam a tarefa com o mesmo ID; linhas sem ID são\n"
+            "identificadas pelo título e pela descrição."
         )
-        if file_path:
+        if upsert is None:
+            return
+        size = os.path.getsize(file_path) or 1
+
+        def work(progress, cancel):
+            # Roda fora da thread do Tk, com uma conexão própria
+            db_init = DatabaseInitializer(self.db_init.db_path)
+            try:
+                repo = TaskRepository(db_init)
+                import_many = repo.upsert_many if upsert else repo.add_many
+                with open(file_path, 'rb') as raw:
+                    file = io.TextIOWrapper(raw, encoding='utf-8', newline='')
+                    return import_many(
+                        read_tasks(file),
+                        progress=lambda count: progress(raw.tell() / size,
+                                                        f"{count} linhas processadas"),
+                        cancel=cancel
+                    )
+            finally:
+                db_init.close()
+
+        def done(report, error):
+            if error:
+                messagebox.showerror("Erro", f"Erro ao importar: {str(error)}")
+                return
+            if report.cancelled:
+                messagebox.showinfo("Importação cancelada", "Nenhuma tarefa foi importada.")
+                return
+            # Poucas tarefas novas entram linha a linha; importações grandes recarregam a lista
+            self._refresh_tasks(report.ids)
+
+            message = f"{report.inserted} tarefas importadas com sucesso!"
+            if upsert:
+                message = (f"{report.inserted} tarefas incluídas, {report.updated} atualizadas "
+                           f"e {report.unchanged} sem alteração.")
+            if report.errors:
+                # +1 pelo cabeçalho do CSV (JSON Lines não tem cabeçalho)
+                header = 0 if read_tasks is read_jsonl_tasks else 1
+                lines = [f"Linha {number + header}: {error}" for number, error in report.errors[:10]]
+                if len(report.errors) > 10:
+                    lines.append(f"... e mais {len(report.errors) - 10} erros.")
+                message += f"\n\n{len(report.errors)} linhas ignoradas:\n" + "\n".join(lines)
+                messagebox.showwarning("Importação concluída", message)
+            else:
+                messagebox.showinfo("Sucesso", message)
+
+        self._run_in_background("Importando tarefas", work, done)
+
+    def _run_in_background(self, title, work, on_done):
+        """
+        Executa uma operação demorada fora da thread do Tk, com janela de progresso.
+        :param title: Título da janela de progresso
+        :param work: Função work(progress, cancel) executada na thread; progress(fração, texto)
+                     informa o andamento e cancel é um threading.Event sinalizado pelo botão Cancelar
+        :param on_done: Chamada na thread do Tk com (resultado, exceção ou None)
+        """
+        cancel = threading.Event()
+        updates = queue.Queue()
+        dialog = ProgressDialog(self.root, title, cancel.set)
+
+        def run():
             try:
-                with open(file_path, 'r', encoding='utf-8') as file:
-                    reader = csv.DictReader(file)
-                    for row in reader:
-                        task = Task(
-                            id=None,
-                            titulo=row['Título'],
-                            description=row['Descrição'],
-                            status=row['Status'],
-                            tag=row['Tag'] if row['Tag'] else None,
-                            due_date=row['Data Limite'] if row['Data Limite'] else None,
-                            priority=row['Prioridade']
-                        )
-                        self.repo.add(task)
-                messagebox.showinfo("Sucesso", "Tarefas importadas com sucesso!")
-                self.load_tasks()
+                with instrumentation.measure(f"segundo plano: {title}"):
+                    result = work(lambda fraction, text: updates.put(('progress', fraction, text)), cancel)
+                updates.put(('done', result, None))
             except Exception as e:
-                messagebox.showerror("Erro", f"Erro ao importar: {str(e)}")
+                updates.put(('done', None, e))
+
+        def poll():
+            try:
+                while True:
+                    kind, first, second = updates.get_nowait()
+                    if kind == 'progress':
+                        dialog.update(first, second)
+                    else:
+                        dialog.close()
+                        on_done(first, second)
+                        return
+            except queue.Empty:
+                pass
+            self.root.after(100, poll)
+
+        threading.Thread(target=run, daemon=True).start()
+        self.root.after(100, poll)
 
     def _show_task_list_view(self):
         """Mostra a visualização em lista (atual)"""
         pass  # Já é a visualização padrão
 
+    @timed("gui._show_calendar_view")
     def _show_calendar_view(self):
-        """Mostra a visualização em calendário com as tarefas"""
+        """
+        Mostra a visualização em calendário com as tarefas.
+        Cada dia recebe um único evento com o total de tarefas e a divisão por
+        prioridade. Os totais são buscados por mês, conforme a navegação, e os
+        meses já carregados não são consultados de novo.
+        """
+        from calendar import monthrange
+        from tkcalendar import Calendar
+
         calendar_window = tk.Toplevel(self.root)
         calendar_window.title("Calendário de Tarefas")
         calendar_window.geometry("800x600")
@@ -343,71 +669,267 @@ class PlannerGUI:
                       showweeknumbers=False,
                       locale='pt_BR')
         cal.pack(fill=tk.BOTH, expand=True)
+        for priority, color in PRIORITY_COLORS.items():
+            cal.tag_config(priority, background=color, foreground='white')
+        
+        # Tarefas do dia selecionado
+        day_list = tk.Listbox(main_frame, height=8)
+        day_list.pack(fill=tk.X, pady=(10, 0))
+        
+        requested = set()  # Meses (ano, mês) já consultados ou em consulta
         
-        # Marcar datas com tarefas
-        tasks = self.repo.get_all()
-        for task in tasks:
-            if task.due_date:
-                try:
-                    date_obj = datetime.strptime(task.due_date, '%d/%m/%Y')
-                    cal.calevent_create(date_obj, task.titulo, 'reminder')
-                except ValueError:
-                    continue
+        def month_range(months):
+            """Primeiro e último dia do intervalo que cobre os meses informados"""
+            first_year, first_month = months[0]
+            last_year, last_month = months[-1]
+            return (date(first_year, first_month, 1),
+                    date(last_year, last_month, monthrange(last_year, last_month)[1]))
+        
+        def load_visible(event=None):
+            month, year = cal.get_displayed_month()
+            # O mês exibido e os vizinhos, cujas semanas aparecem nas bordas da grade
+            months = [divmod(year * 12 + month - 1 + delta, 12) for delta in (-1, 0, 1)]
+            missing = [(y, m + 1) for y, m in months if (y, m + 1) not in requested]
+            if not missing:
+                return
+            requested.update(missing)
+            start, end = month_range(missing)
+            self.db.run(lambda repo: repo.day_summary(start, end),
+                        lambda summary, error: mark_days(missing, summary, error))
+        
+        def mark_days(months, summary, error):
+            if not calendar_window.winfo_exists():
+                return
+            if error:
+                requested.difference_update(months)  # Tenta de novo na próxima navegação
+                return
+            with instrumentation.measure("calendário: marcação dos dias"):
+                for day, counts in summary.items():
+                    if (day.year, day.month) not in months:
+                        continue
+                    priorities = [p for p in reversed(TASK_PRIORITIES) if counts.get(p)]
+                    total = sum(counts.values())
+                    detail = ", ".join(f"{p}: {counts[p]}" for p in priorities)
+                    label = f"{total} tarefa{'s' if total > 1 else ''}" + (f" ({detail})" if detail else "")
+                    cal.calevent_create(day, label, priorities[0] if priorities else 'reminder')
+        
+        def show_day(event=None):
+            day = cal.selection_get()
+            if day is None:
+                return
+            
+            def fill(tasks, error):
+                if error or not calendar_window.winfo_exists():
+                    return
+                day_list.delete(0, tk.END)
+                for task in tasks:
+                    day_list.insert(tk.END, f"{task.titulo} ({task.priority}, {task.status})")
+                if not tasks:
+                    day_list.insert(tk.END, "Nenhuma tarefa neste dia")
+            
+            self.db.run(lambda repo: repo.query(due_from=day, due_to=day, order_by="priority"),
+                        fill, channel="calendar_day")
+        
+        cal.bind("<<CalendarMonthChanged>>", load_visible)
+        cal.bind("<<CalendarSelected>>", show_day)
+        load_visible()
 
-    def _apply_filters(self):
-        """Aplica os filtros e ordenação na lista de tarefas"""
-        tasks = self.repo.get_all()
+    def _show_dashboard_view(self):
+        """
+        Mostra o painel com os totais por status, prioridade e prazo e as tarefas
+        atrasadas por tag. Os números vêm de TaskRepository.stats(): os totais saem da
+        tabela de resumo mantida pelo banco e as tags, de task_tags, de modo que uma
+        tarefa com várias tags aparece em cada uma delas.
+        """
+        dashboard_window = tk.Toplevel(self.root)
+        dashboard_window.title("Painel de Tarefas")
+        dashboard_window.geometry("900x600")
         
-        # Filtro de título
-        title_search = self.search_title.get().lower().strip()
-        if title_search:
-            tasks = [t for t in tasks if title_search in t.titulo.lower()]
+        main_frame = ttk.Frame(dashboard_window)
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+        
+        summary_label = ttk.Label(main_frame, font=('Segoe UI', 12, 'bold'))
+        summary_label.pack(anchor=tk.W, pady=(0, 10))
+        
+        # Três tabelas lado a lado: status, prioridade e prazo
+        tables_frame = ttk.Frame(main_frame)
+        tables_frame.pack(fill=tk.X)
+        tables = {}
+        for key, heading in (("status", "Status"), ("priority", "Prioridade"), ("due", "Prazo (não concluídas)")):
+            table = ttk.Treeview(tables_frame, columns=(heading, "Tarefas"), show='headings', height=5)
+            for column in (heading, "Tarefas"):
+                table.heading(column, text=column)
+                table.column(column, width=140, anchor=tk.W if column == heading else tk.E)
+            table.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 10))
+            tables[key] = table
+        
+        # Atrasadas (não concluídas) por tag e prioridade
+        ttk.Label(main_frame, text="Atrasadas por tag (tarefas com várias tags contam em cada uma)").pack(anchor=tk.W, pady=(15, 5))
+        priorities = list(reversed(TASK_PRIORITIES))
+        overdue_columns = ("Tag", *priorities, "Total")
+        overdue_table = ttk.Treeview(main_frame, columns=overdue_columns, show='headings')
+        for column in overdue_columns:
+            overdue_table.heading(column, text=column.capitalize())
+            overdue_table.column(column, width=120, anchor=tk.W if column == "Tag" else tk.E)
+        overdue_table.pack(fill=tk.BOTH, expand=True)
         
-        # Filtro de tag
-        tag_search = self.search_tag.get().lower().strip()
-        if tag_search:
-            tasks = [t for t in tasks if t.tag and tag_search in t.tag.lower()]
+        def fill(summary, error):
+            if not dashboard_window.winfo_exists():
+                return
+            if error:
+                messagebox.showerror("Erro", f"Erro ao carregar o painel: {str(error)}",
+                                     parent=dashboard_window)
+                return
+            summary_label.configure(
+                text=f"{summary['total']} tarefas  |  {summary['overdue']} atrasadas  |  "
+                     f"{summary['due']['today']} para hoje"
+            )
+            rows = {
+                "status": [(status, summary["status"].get(status, 0)) for status in TASK_STATUS],
+                "priority": [(priority, summary["priority"].get(priority, 0)) for priority in priorities],
+                "due": [(label, summary["due"][bucket]) for bucket, label in DUE_BUCKET_LABELS.items()]
+            }
+            for key, table in tables.items():
+                table.delete(*table.get_children())
+                for row in rows[key]:
+                    table.insert('', tk.END, values=row)
+            
+            overdue_table.delete(*overdue_table.get_children())
+            by_tag = sorted(summary["overdue_by_tag"].items(), key=lambda item: -sum(item[1].values()))
+            for tag, counts in by_tag:
+                overdue_table.insert('', tk.END, values=(
+                    tag or "(sem tag)", *(counts.get(p, 0) for p in priorities), sum(counts.values())
+                ))
+        
+        def load():
+            self.db.run(lambda repo: repo.stats(), fill, channel="dashboard")
         
-        # Filtro de status
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(fill=tk.X, pady=(10, 0))
+        create_button(button_frame, "Atualizar", load).pack(side=tk.RIGHT)
+        load()
+
+    def _show_diagnostics_view(self):
+        """
+        Mostra os tempos registrados pela instrumentação (python main.py --instrument):
+        histogramas por operação (métodos do repositório e ações da interface) e os
+        comandos SQL mais executados, com as operações que os executaram
+        """
+        window = tk.Toplevel(self.root)
+        window.title("Diagnóstico")
+        window.geometry("1000x650")
+
+        main_frame = ttk.Frame(window)
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+
+        recorder = instrumentation.recorder
+        if recorder is None:
+            ttk.Label(main_frame, text="A instrumentação está desativada.\n"
+                                       "Inicie o aplicativo com: python main.py --instrument").pack(anchor=tk.W)
+            return
+
+        summary_label = ttk.Label(main_frame)
+        summary_label.pack(anchor=tk.W, pady=(0, 10))
+
+        timing_columns = ("Operação", "Chamadas", "Total (ms)", "Média (ms)", "p50 (ms)", "p95 (ms)", "Máx. (ms)")
+        timing_table = ttk.Treeview(main_frame, columns=timing_columns, show='headings', height=12)
+        for column in timing_columns:
+            timing_table.heading(column, text=column)
+            timing_table.column(column, width=300 if column == "Operação" else 90,
+                                anchor=tk.W if column == "Operação" else tk.E)
+        timing_table.pack(fill=tk.BOTH, expand=True)
+
+        ttk.Label(main_frame, text="Comandos SQL").pack(anchor=tk.W, pady=(15, 5))
+        sql_columns = ("Execuções", "Comando", "Operações")
+        sql_table = ttk.Treeview(main_frame, columns=sql_columns, show='headings', height=8)
+        for column, width in zip(sql_columns, (90, 560, 300)):
+            sql_table.heading(column, text=column)
+            sql_table.column(column, width=width, anchor=tk.E if column == "Execuções" else tk.W)
+        sql_table.pack(fill=tk.BOTH, expand=True)
+
+        def load():
+            snapshot = recorder.snapshot()
+            summary_label.configure(text=f"Desde {snapshot['started'].replace('T', ' ')}  |  "
+                                         f"{len(snapshot['timings'])} operações  |  "
+                                         f"{sum(entry['count'] for entry in snapshot['sql'])} comandos SQL")
+            timing_table.delete(*timing_table.get_children())
+            for name, stats in snapshot["timings"].items():
+                timing_table.insert('', tk.END, values=(
+                    name, stats["count"], f"{stats['total_ms']:.1f}", f"{stats['mean_ms']:.2f}",
+                    f"{stats['p50_ms']:.2f}", f"{stats['p95_ms']:.2f}", f"{stats['max_ms']:.1f}"
+                ))
+            for name, stats in snapshot["per_row"].items():
+                timing_table.insert('', tk.END, values=(
+                    f"{name} (por linha)", stats["count"], f"{stats['total_ms']:.1f}",
+                    f"{stats['mean_us'] / 1000:.4f}", "", "", ""
+                ))
+            sql_table.delete(*sql_table.get_children())
+            for entry in snapshot["sql"]:
+                operations = ", ".join(f"{name} ({count})" for name, count in
+                                       sorted(entry["operations"].items(), key=lambda item: -item[1]))
+                sql_table.insert('', tk.END, values=(entry["count"], entry["statement"], operations))
+
+        def reset():
+            recorder.reset()
+            load()
+
+        def save():
+            file_path = filedialog.asksaveasfilename(
+                parent=window,
+                defaultextension=".json",
+                initialfile=f"diagnostico-{datetime.now():%Y%m%d-%H%M%S}.json",
+                filetypes=[("JSON", "*.json")],
+                title="Salvar diagnóstico"
+            )
+            if not file_path:
+                return
+            try:
+                recorder.dump(file_path)
+            except OSError as e:
+                messagebox.showerror("Erro", f"Erro ao salvar o diagnóstico: {str(e)}", parent=window)
+                return
+            messagebox.showinfo("Sucesso", f"Diagnóstico salvo em {file_path}", parent=window)
+
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(fill=tk.X, pady=(10, 0))
+        create_button(button_frame, "Salvar JSON", save).pack(side=tk.RIGHT)
+        create_button(button_frame, "Zerar", reset).pack(side=tk.RIGHT, padx=(0, 10))
+        create_button(button_frame, "Atualizar", load).pack(side=tk.RIGHT, padx=(0, 10))
+        load()
+
+    @timed("gui._apply_filters")
+    def _apply_filters(self):
+        """Aplica os filtros e ordenação na lista de tarefas"""
         status_filter = self.filter_status.get()
-        if status_filter != "Todos":
-            tasks = [t for t in tasks if t.status == status_filter]
-        
-        # Ordenação
-        sort_by = self.sort_by.get()
-        if sort_by == "Data Limite":
-            def get_date(task):
-                if not task.due_date:
-                    return datetime.max
-                try:
-                    return datetime.strptime(task.due_date, '%d/%m/%Y')
-                except ValueError:
-                    return datetime.max
-            tasks.sort(key=get_date)
-        elif sort_by == "Prioridade":
-            priority_map = {"baixa": 0, "média": 1, "alta": 2}
-            tasks.sort(key=lambda t: priority_map.get(t.priority, -1), reverse=True)
-        elif sort_by == "Status":
-            status_map = {"não iniciado": 0, "em andamento": 1, "concluído": 2}
-            tasks.sort(key=lambda t: status_map.get(t.status, -1))
         
         # Atualizar a lista
-        self.tree.delete(*self.tree.get_children())
-        for t in tasks:
-            self.tree.insert('', tk.END, values=(
-                t.id, t.titulo, t.description, t.status, 
-                t.tag or '', t.due_date or '', t.priority
-            ))
+        self.task_view.show(
+            order_by=SORT_OPTIONS.get(self.sort_by.get(), "due_date"),
+            title_contains=self.search_title.get().strip() or None,
+            tags=tuple(split_tags(self.search_tag.get())) or None,
+            all_tags=TAG_MATCH_OPTIONS.get(self.search_tag_mode.get(), False),
+            text=self.search_text.get().strip() or None,
+            status=status_filter if status_filter != "Todos" else None
+        )
+
+    def _suggest_tags(self, prefix):
+        """Nomes de tags que começam por prefix, para o preenchimento automático dos campos de tags"""
+        return self.repo.tag_names(prefix)
 
     def _clear_filters(self):
         """Limpa todos os filtros e restaura a lista original"""
         self.search_title.delete(0, tk.END)
         self.search_tag.delete(0, tk.END)
+        self.search_tag_mode.set(next(iter(TAG_MATCH_OPTIONS)))
+        self.search_text.delete(0, tk.END)
         self.filter_status.set("Todos")
         self.sort_by.set("Data Limite")
         self.load_tasks()
 
     def on_closing(self):
         """Fecha a aplicação"""
+        if self._change_poll is not None:
+            self.root.after_cancel(self._change_poll)
+        self.db.close()
         self.db_init.close()
         self.root.destroy() 
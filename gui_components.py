@@ -1,10 +1,16 @@
+import time
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from tkcalendar import DateEntry
 from datetime import datetime
-import csv
-from config import COLOR_SCHEME, TASK_STATUS
+from bisect import bisect_left
+from collections import OrderedDict
+from config import (
+    COLOR_SCHEME, TASK_STATUS, SORT_OPTIONS, TAG_MATCH_OPTIONS,
+    VIRTUAL_LIST_THRESHOLD, VIRTUAL_LIST_PAGE_SIZE, VIRTUAL_LIST_CACHED_PAGES
+)
 from models import Task
+import instrumentation
+from instrumentation import timed
 
 def create_menu(root, gui):
     """Cria a barra do menu principal"""
@@ -17,8 +23,11 @@ def create_menu(root, gui):
                       activebackground=COLOR_SCHEME['menu_hover_bg'],
                       activeforeground=COLOR_SCHEME['menu_fg'])
     menubar.add_cascade(label="Arquivo", menu=file_menu, background=COLOR_SCHEME['menubar_bg'])
-    file_menu.add_command(label="Exportar CSV", command=gui._show_export_dialog)
-    file_menu.add_command(label="Importar CSV", command=gui._show_import_dialog)
+    file_menu.add_command(label="Exportar tarefas", command=gui._show_export_dialog)
+    file_menu.add_command(label="Exportar alterações", command=gui._show_export_changes_dialog)
+    file_menu.add_command(label="Importar tarefas", command=gui._show_import_dialog)
+    file_menu.add_separator()
+    file_menu.add_command(label="Snapshot", command=gui._show_snapshot_dialog)
     
     # Menu Visualizar
     view_menu = tk.Menu(menubar, tearoff=0, bg=COLOR_SCHEME['menu_bg'], 
@@ -28,6 +37,9 @@ def create_menu(root, gui):
     menubar.add_cascade(label="Visualizar", menu=view_menu, background=COLOR_SCHEME['menubar_bg'])
     view_menu.add_command(label="Lista de Tarefas", command=gui._show_task_list_view)
     view_menu.add_command(label="Calendário", command=gui._show_calendar_view)
+    view_menu.add_command(label="Painel", command=gui._show_dashboard_view)
+    view_menu.add_separator()
+    view_menu.add_command(label="Diagnóstico", command=gui._show_diagnostics_view)
 
 def create_task_list(parent, gui):
     """Cria a lista de tarefas"""
@@ -46,9 +58,18 @@ def create_task_list(parent, gui):
     gui.search_title = ttk.Entry(search_frame, width=20)
     gui.search_title.pack(side=tk.LEFT, padx=(0, 10))
     
-    ttk.Label(search_frame, text="Tag:").pack(side=tk.LEFT, padx=(0, 5))
+    ttk.Label(search_frame, text="Tags:").pack(side=tk.LEFT, padx=(0, 5))
     gui.search_tag = ttk.Entry(search_frame, width=15)
-    gui.search_tag.pack(side=tk.LEFT, padx=(0, 10))
+    gui.search_tag.pack(side=tk.LEFT, padx=(0, 5))
+    TagAutocomplete(gui.search_tag, gui._suggest_tags)
+    gui.search_tag_mode = ttk.Combobox(search_frame, values=list(TAG_MATCH_OPTIONS),
+                                       state="readonly", width=8)
+    gui.search_tag_mode.set(next(iter(TAG_MATCH_OPTIONS)))
+    gui.search_tag_mode.pack(side=tk.LEFT, padx=(0, 10))
+    
+    ttk.Label(search_frame, text="Texto:").pack(side=tk.LEFT, padx=(0, 5))
+    gui.search_text = ttk.Entry(search_frame, width=20)
+    gui.search_text.pack(side=tk.LEFT, padx=(0, 10))
     
     # Filtro
     filter_frame = ttk.LabelFrame(controls_frame, text="Filtros", padding=(5, 5, 5, 5))
@@ -65,7 +86,7 @@ def create_task_list(parent, gui):
     sort_frame.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
     
     gui.sort_by = ttk.Combobox(sort_frame, 
-                               values=["Data Limite", "Prioridade", "Status"],
+                               values=list(SORT_OPTIONS),
                                state="readonly", width=15)
     gui.sort_by.set("Data Limite")
     gui.sort_by.pack(side=tk.LEFT, padx=5)
@@ -101,13 +122,12 @@ def create_task_list(parent, gui):
 
     # Scrollbars
     y_scrollbar = ttk.Scrollbar(tree_container, orient=tk.VERTICAL, 
-                              command=gui.tree.yview,
                               style="Custom.Vertical.TScrollbar")
     x_scrollbar = ttk.Scrollbar(tree_container, orient=tk.HORIZONTAL, 
                               command=gui.tree.xview,
                               style="Custom.Horizontal.TScrollbar")
     
-    gui.tree.configure(yscroll=y_scrollbar.set, xscroll=x_scrollbar.set)
+    gui.tree.configure(xscroll=x_scrollbar.set)
     
     gui.tree.grid(row=0, column=0, sticky='nsew')
     y_scrollbar.grid(row=0, column=1, sticky='ns')
@@ -118,8 +138,37 @@ def create_task_list(parent, gui):
     
     gui.tree.bind('<<TreeviewSelect>>', gui.on_select)
 
+    # Ações sobre a seleção (uma ou várias tarefas) pelo botão direito
+    create_task_context_menu(gui)
+
+    # A barra vertical é controlada pela view, que decide entre a rolagem
+    # normal da Treeview e a rolagem janelada para listas grandes
+    gui.task_view = TaskListView(gui.tree, y_scrollbar, gui.repo, gui.db)
+
     return frame_list
 
+def create_task_context_menu(gui):
+    """Cria o menu de contexto da lista, com ações em lote sobre as tarefas selecionadas"""
+    menu = tk.Menu(gui.tree, tearoff=0, bg=COLOR_SCHEME['menu_bg'],
+                   fg=COLOR_SCHEME['menu_fg'],
+                   activebackground=COLOR_SCHEME['menu_hover_bg'],
+                   activeforeground=COLOR_SCHEME['menu_fg'])
+    for status in TASK_STATUS:
+        menu.add_command(label=f"Marcar como {status}",
+                         command=lambda s=status: gui.set_selected_status(s))
+    menu.add_separator()
+    menu.add_command(label="Deletar selecionadas", command=gui.delete_task)
+
+    def popup(event):
+        # Clique sobre uma linha fora da seleção passa a selecionar só ela
+        row = gui.tree.identify_row(event.y)
+        if row and row not in gui.tree.selection():
+            gui.task_view.select(int(row))
+        menu.tk_popup(event.x_root, event.y_root)
+
+    gui.tree.bind('<Button-3>', popup)
+    return menu
+
 def create_task_form(parent, gui):
     """Cria o formularia de tarefa"""
     frame_form = ttk.LabelFrame(parent, text="Detalhes da Tarefa", padding=(20, 10))
@@ -136,20 +185,20 @@ def create_task_form(parent, gui):
     gui.desc_entry = ttk.Entry(frame_form, width=30)
     gui.desc_entry.grid(row=1, column=1, sticky='ew', padx=10, pady=8)
     
-    ttk.Label(frame_form, text="Tag:").grid(row=2, column=0, sticky=tk.W, padx=10, pady=8)
+    ttk.Label(frame_form, text="Tags:").grid(row=2, column=0, sticky=tk.W, padx=10, pady=8)
     gui.tag_entry = ttk.Entry(frame_form, width=30)
     gui.tag_entry.grid(row=2, column=1, sticky='ew', padx=10, pady=8)
+    TagAutocomplete(gui.tag_entry, gui._suggest_tags)
     
     ttk.Label(frame_form, text="Status:").grid(row=3, column=0, sticky=tk.W, padx=10, pady=8)
     gui.status_combobox = ttk.Combobox(frame_form, values=TASK_STATUS, state="readonly", width=28)
     gui.status_combobox.current(0)
     gui.status_combobox.grid(row=3, column=1, sticky='ew', padx=10, pady=8)
     
+    # O campo de data é criado depois da primeira exibição (create_due_date_entry)
     ttk.Label(frame_form, text="Data Limite:").grid(row=4, column=0, sticky=tk.W, padx=10, pady=8)
-    gui.due_date_entry = DateEntry(frame_form, width=27, background='darkblue',
-                                  foreground='white', borderwidth=2,
-                                  locale='pt_BR', date_pattern='dd/mm/yyyy')
-    gui.due_date_entry.grid(row=4, column=1, sticky='ew', padx=10, pady=8)
+    gui.due_date_frame = ttk.Frame(frame_form)
+    gui.due_date_frame.grid(row=4, column=1, sticky='ew', padx=10, pady=8)
     
     ttk.Label(frame_form, text="Prioridade:").grid(row=5, column=0, sticky=tk.W, padx=10, pady=8)
     gui.priority_combobox = ttk.Combobox(frame_form, values=["baixa", "média", "alta"],
@@ -160,6 +209,19 @@ def create_task_form(parent, gui):
     create_form_buttons(frame_form, gui)
     return frame_form
 
+def create_due_date_entry(gui):
+    """
+    Cria o campo de data limite do formulário.
+    Fica fora de create_task_form porque importa o tkcalendar, que é carregado
+    só depois que a janela já foi exibida.
+    """
+    from tkcalendar import DateEntry
+
+    gui.due_date_entry = DateEntry(gui.due_date_frame, width=27, background='darkblue',
+                                   foreground='white', borderwidth=2,
+                                   locale='pt_BR', date_pattern='dd/mm/yyyy')
+    gui.due_date_entry.pack(fill=tk.X)
+
 def create_form_buttons(parent, gui):
     """Cria os botões do formulario"""
     btn_frame = ttk.Frame(parent)
@@ -200,4 +262,509 @@ def create_button(parent, text, command):
     btn.bind('<Enter>', lambda e, b=btn: b.configure(bg=COLOR_SCHEME['accent_dark']))
     btn.bind('<Leave>', lambda e, b=btn: b.configure(bg=COLOR_SCHEME['accent']))
     
-    return btn 
+    return btn
+
+class ProgressDialog:
+    """
+    Janela de progresso para operações em segundo plano (importação, exportação).
+    O botão Cancelar chama on_cancel; quem executa a operação decide como interrompê-la.
+    """
+    def __init__(self, root, title, on_cancel):
+        self.window = tk.Toplevel(root)
+        self.window.title(title)
+        self.window.resizable(False, False)
+        self.window.transient(root)
+        self.window.protocol("WM_DELETE_WINDOW", self._cancel)
+        self._on_cancel = on_cancel
+
+        frame = ttk.Frame(self.window, padding=(20, 15))
+        frame.pack(fill=tk.BOTH, expand=True)
+
+        self.message = ttk.Label(frame, text="Iniciando...")
+        self.message.pack(fill=tk.X, pady=(0, 10))
+
+        self.bar = ttk.Progressbar(frame, orient=tk.HORIZONTAL, length=320,
+                                   mode='determinate', maximum=100)
+        self.bar.pack(fill=tk.X, pady=(0, 15))
+
+        self.cancel_btn = create_button(frame, "Cancelar", self._cancel)
+        self.cancel_btn.pack()
+
+    def update(self, fraction, text):
+        """Atualiza a barra (fração entre 0 e 1) e a mensagem"""
+        self.bar['value'] = max(0.0, min(1.0, fraction)) * 100
+        self.message.configure(text=text)
+
+    def close(self):
+        """Fecha a janela de progresso"""
+        self.window.destroy()
+
+    def _cancel(self):
+        self.cancel_btn.configure(state=tk.DISABLED)
+        self.message.configure(text="Cancelando...")
+        self._on_cancel()
+
+class TagAutocomplete:
+    """
+    Sugestões sob um campo de tags separadas por vírgula: a cada tecla, a última
+    tag digitada é completada com os nomes devolvidos por suggest(início do nome)
+    (TaskRepository.tag_names, uma busca indexada). Setas escolhem, Enter ou Tab
+    aceitam e Esc fecha a lista.
+    """
+    def __init__(self, entry, suggest):
+        """
+        :param entry: Campo de texto com as tags
+        :param suggest: Função que recebe o início do nome e devolve os nomes sugeridos
+        """
+        self.entry = entry
+        self.suggest = suggest
+        self.popup = None
+        self.listbox = None
+        entry.bind('<KeyRelease>', self._on_key_release, add='+')
+        entry.bind('<Down>', lambda event: self._move(1))
+        entry.bind('<Up>', lambda event: self._move(-1))
+        entry.bind('<Return>', self._on_accept, add='+')
+        entry.bind('<Tab>', self._on_accept, add='+')
+        entry.bind('<Escape>', lambda event: self.close(), add='+')
+        # Adiado para que o clique em uma sugestão seja tratado antes
+        entry.bind('<FocusOut>', lambda event: entry.after(150, self._close_unfocused), add='+')
+
+    def close(self):
+        """Fecha a lista de sugestões, se aberta"""
+        if self.popup is not None:
+            self.popup.destroy()
+            self.popup = self.listbox = None
+
+    def _on_key_release(self, event):
+        if event.keysym in ('Up', 'Down', 'Return', 'Tab', 'Escape') or len(event.keysym) > 1 and not event.char:
+            return  # Navegação e teclas modificadoras (Shift, Control...)
+        text = self.entry.get()
+        typed = [name.strip().casefold() for name in text.split(',')]
+        prefix = text[text.rfind(',') + 1:].strip()
+        names = [name for name in self.suggest(prefix) if name.casefold() not in typed] if prefix else []
+        if names:
+            self._show(names)
+        else:
+            self.close()
+
+    def _show(self, names):
+        if self.popup is None:
+            self.popup = tk.Toplevel(self.entry)
+            self.popup.overrideredirect(True)
+            self.listbox = tk.Listbox(self.popup, takefocus=0, exportselection=False,
+                                      activestyle='none', relief='solid', borderwidth=1)
+            self.listbox.pack(fill=tk.BOTH, expand=True)
+            self.listbox.bind('<ButtonRelease-1>', self._on_accept)
+        self.listbox.delete(0, tk.END)
+        self.listbox.insert(tk.END, *names)
+        self.listbox.configure(height=len(names))
+        self.popup.geometry(f"+{self.entry.winfo_rootx()}+{self.entry.winfo_rooty() + self.entry.winfo_height()}")
+        self.popup.lift()
+        self.popup.update_idletasks()
+        self.popup.geometry(f"{max(self.entry.winfo_width(), self.listbox.winfo_reqwidth())}x"
+                            f"{self.listbox.winfo_reqheight()}")
+
+    def _move(self, step):
+        if self.listbox is None:
+            return None
+        current = self.listbox.curselection()
+        index = (current[0] + step if current else 0 if step > 0 else self.listbox.size() - 1)
+        index = max(0, min(self.listbox.size() - 1, index))
+        self.listbox.selection_clear(0, tk.END)
+        self.listbox.selection_set(index)
+        self.listbox.see(index)
+        return 'break'
+
+    def _on_accept(self, event):
+        """Troca a última tag digitada pela sugestão escolhida (ou a primeira)"""
+        if self.listbox is None:
+            return None
+        current = self.listbox.curselection()
+        if event.widget is self.listbox:
+            current = (self.listbox.nearest(event.y),)
+        name = self.listbox.get(current[0] if current else 0)
+        text = self.entry.get()
+        head = text[:text.rfind(',') + 1]
+        self.entry.delete(0, tk.END)
+        self.entry.insert(0, f"{head} {name}" if head else name)
+        self.entry.icursor(tk.END)
+        self.entry.focus_set()
+        self.close()
+        return 'break'
+
+    def _close_unfocused(self):
+        if self.popup is not None and self.entry.focus_get() is not self.entry:
+            self.close()
+
+class TaskListView:
+    """
+    Controla o conteúdo da Treeview de tarefas.
+    Listas pequenas são inseridas por completo. Acima de VIRTUAL_LIST_THRESHOLD
+    a lista entra em modo janelado: só as linhas visíveis existem na Treeview,
+    as páginas são buscadas por chave (keyset) no TaskRepository conforme a
+    rolagem e a barra de rolagem continua refletindo o total de tarefas.
+    Inclusões, alterações e remoções são aplicadas linha a linha; a lista só é
+    recarregada por completo quando o filtro ou a ordenação mudam.
+    """
+    def __init__(self, tree, scrollbar, repo, db=None):
+        """
+        :param repo: TaskRepository usado nas leituras pontuais (páginas, linhas alteradas)
+        :param db: AsyncTaskRepository opcional, usado nas recargas completas
+        """
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.repo = repo
+        self.db = db
+        self._loading = False
+        self.order_by = "due_date"
+        self.filters = {}
+        self.windowed = False
+        self.total = 0
+        self.offset = 0                 # Índice da primeira linha exibida
+        self._items = {}                # Modo completo: id -> chave de ordenação da linha
+        self._keys = []                 # Modo completo: chaves na ordem das linhas
+        self._pages = OrderedDict()     # Modo janelado: página -> (linhas, chaves) (LRU)
+        self._page_keys = {}            # Modo janelado: página -> chave da última tarefa
+        self._selected = set()          # Ids selecionados no modo janelado
+        self._refresh_started = 0.0     # perf_counter() da última recarga assíncrona
+
+        scrollbar.configure(command=self._on_scrollbar)
+        tree.configure(yscrollcommand=self._on_tree_yview)
+        for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            tree.bind(sequence, self._on_mousewheel)
+        for sequence in ('<Up>', '<Down>', '<Prior>', '<Next>', '<Home>', '<End>'):
+            tree.bind(sequence, self._on_key)
+        tree.bind('<Button-1>', self._on_click)
+        tree.bind('<Configure>', self._on_configure)
+        tree.bind('<<TreeviewSelect>>', self._on_tree_select, add='+')
+
+    def show(self, order_by="due_date", **filters):
+        """
+        Exibe as tarefas que atendem aos filtros, na ordem informada
+        :param order_by: Chave de ordenação aceita por TaskRepository.query()
+        :param filters: Filtros aceitos por TaskRepository.query()
+        """
+        self.order_by = order_by
+        self.filters = filters
+        self.refresh()
+
+    def refresh(self):
+        """
+        Recarrega a lista por completo, mantendo filtros e ordenação.
+        Com a fachada assíncrona (db), a consulta roda na thread do banco e a
+        lista é redesenhada quando o resultado chega; recargas mais novas
+        descartam as anteriores.
+        """
+        order_by, filters = self.order_by, dict(self.filters)
+
+        def load(repo):
+            total = repo.count(**filters)
+            limit = VIRTUAL_LIST_PAGE_SIZE if total > VIRTUAL_LIST_THRESHOLD else VIRTUAL_LIST_THRESHOLD
+            return total, repo.page_rows(limit=limit, order_by=order_by, **filters)
+
+        if self.db is None:
+            self._loaded(load(self.repo))
+            return
+        self._loading = True
+        self._refresh_started = time.perf_counter()
+        self.db.run(load, self._on_loaded, channel="task_list")
+
+    def _on_loaded(self, result, error):
+        """Recebe, na thread do Tk, o resultado de uma recarga assíncrona"""
+        self._loading = False
+        if error:
+            messagebox.showerror("Erro", f"Erro ao carregar tarefas: {str(error)}")
+            return
+        self._loaded(result)
+        # Do pedido de recarga até a lista desenhada (consulta, espera e Treeview)
+        instrumentation.record("lista: recarga completa", time.perf_counter() - self._refresh_started)
+
+    @timed("lista: desenho da Treeview")
+    def _loaded(self, result):
+        """Desenha a lista a partir do total e da primeira página (ou da lista inteira)"""
+        total, (rows, keys) = result
+        self._items.clear()
+        self._keys = []
+        self._pages.clear()
+        self._page_keys.clear()
+        self._selected.clear()
+        self.offset = 0
+        self.total = total
+        self.windowed = total > VIRTUAL_LIST_THRESHOLD
+
+        self.tree.delete(*self.tree.get_children())
+        if self.windowed:
+            self._pages[0] = (rows, keys)
+            if keys:
+                self._page_keys[0] = keys[-1]
+            self._render_window()
+            return
+
+        self._keys = keys
+        for row, key in zip(rows, keys):
+            self._items[row[0]] = key
+            self.tree.insert('', tk.END, iid=str(row[0]), values=row)
+
+    def task_saved(self, task_id):
+        """
+        Reflete na lista a inclusão ou alteração de uma tarefa.
+        A linha é inserida, atualizada ou movida para a posição correta na
+        ordenação atual, ou removida se deixou de atender aos filtros.
+        """
+        if self._loading:
+            # A recarga em andamento pode ter lido o banco antes desta alteração
+            self.refresh()
+            return
+        found = self.repo.locate_row(task_id, order_by=self.order_by, **self.filters)
+        if self.windowed:
+            self._saved_windowed(task_id, found)
+        else:
+            self._saved_full(task_id, found)
+
+    def task_removed(self, task_id):
+        """Remove da lista uma tarefa que foi apagada do banco de dados"""
+        self._selected.discard(task_id)
+        if self._loading:
+            self.refresh()
+            return
+        if not self.windowed:
+            self._saved_full(task_id, None)
+            return
+        old_key = self._cached_key(task_id)
+        self.total = self.repo.count(**self.filters)
+        self._invalidate_from(old_key)
+        self._render_window()
+
+    def selected_ids(self):
+        """Retorna os ids das tarefas selecionadas, inclusive fora da janela visível"""
+        if self.windowed:
+            return sorted(self._selected)
+        return [int(iid) for iid in self.tree.selection()]
+
+    def select(self, task_id):
+        """Seleciona apenas a tarefa informada"""
+        self._selected = {task_id}
+        if self.tree.exists(str(task_id)):
+            self.tree.selection_set(str(task_id))
+
+    def scroll_to(self, offset):
+        """Posiciona a janela a partir da linha informada (apenas no modo janelado)"""
+        self.offset = offset
+        self._render_window()
+
+    def _saved_full(self, task_id, found):
+        """Atualização pontual no modo completo, usando o mapa id -> chave"""
+        iid = str(task_id)
+        old_key = self._items.pop(task_id, None)
+        if old_key is not None:
+            del self._keys[bisect_left(self._keys, old_key)]
+
+        if found is None:
+            if old_key is not None:
+                self.tree.delete(iid)
+            self.total = len(self._keys)
+            return
+
+        row, key = found
+        index = bisect_left(self._keys, key)
+        self._keys.insert(index, key)
+        self._items[task_id] = key
+        if old_key is None:
+            self.tree.insert('', index, iid=iid, values=row)
+        else:
+            self.tree.item(iid, values=row)
+            if key != old_key:
+                self.tree.move(iid, '', index)
+        self.total = len(self._keys)
+
+    def _saved_windowed(self, task_id, found):
+        """Atualização no modo janelado: só a janela visível é redesenhada"""
+        old_key = self._cached_key(task_id)
+        new_key = found[1] if found else None
+        if old_key is None and new_key is None:
+            # Não estava no cache e não atende aos filtros: só muda algo se a
+            # tarefa fazia parte da lista fora das páginas em cache
+            total = self.repo.count(**self.filters)
+            if total == self.total:
+                return
+        if old_key is not None and old_key == new_key:
+            # Mesma posição: basta trocar a tarefa no cache e na linha visível
+            row = found[0]
+            for rows, keys in self._pages.values():
+                if new_key in keys:
+                    rows[keys.index(new_key)] = row
+            if self.tree.exists(str(task_id)):
+                self.tree.item(str(task_id), values=row)
+            return
+
+        self.total = self.repo.count(**self.filters)
+        if old_key is None:
+            # Posição antiga desconhecida (fora do cache): descarta todas as páginas
+            self._invalidate_from(None)
+        else:
+            self._invalidate_from(old_key if new_key is None else min(old_key, new_key))
+        self._render_window()
+
+    def _cached_key(self, task_id):
+        """Chave de ordenação de uma tarefa presente nas páginas em cache"""
+        for _, keys in self._pages.values():
+            for key in keys:
+                if key[1] == task_id:
+                    return key
+        return None
+
+    def _invalidate_from(self, key):
+        """Descarta as páginas cujo conteúdo é deslocado por uma mudança na posição key"""
+        for index, last_key in list(self._page_keys.items()):
+            if key is None or last_key >= key:
+                del self._page_keys[index]
+        for index in list(self._pages):
+            if index not in self._page_keys:
+                del self._pages[index]
+
+    def _visible_rows(self):
+        """Quantidade de linhas que cabem na área visível da Treeview"""
+        height = self.tree.winfo_height()
+        if height <= 1:
+            # Ainda não desenhada: usa a altura configurada em linhas
+            return int(self.tree.cget('height'))
+        rowheight = int(ttk.Style(self.tree).lookup('Treeview', 'rowheight') or 20)
+        # Desconta o cabeçalho, que ocupa aproximadamente uma linha
+        return max(1, height // rowheight - 1)
+
+    @timed("lista: desenho da janela visível")
+    def _render_window(self):
+        """Recria as linhas da Treeview para a janela atual"""
+        visible = self._visible_rows()
+        self.offset = max(0, min(self.offset, self.total - visible))
+        rows = self._rows(self.offset, visible)
+
+        self.tree.delete(*self.tree.get_children())
+        for row in rows:
+            self.tree.insert('', tk.END, iid=str(row[0]), values=row)
+        restored = [str(row[0]) for row in rows if row[0] in self._selected]
+        if restored:
+            self.tree.selection_set(restored)
+
+        if self.total:
+            self.scrollbar.set(self.offset / self.total,
+                               min(1.0, (self.offset + visible) / self.total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _rows(self, start, count):
+        """Retorna as linhas das posições [start, start + count) usando o cache de páginas"""
+        if count <= 0 or start >= self.total:
+            return []
+        size = VIRTUAL_LIST_PAGE_SIZE
+        first_page = start // size
+        last_page = (start + count - 1) // size
+        rows = []
+        for index in range(first_page, last_page + 1):
+            rows.extend(self._page(index))
+        begin = start - first_page * size
+        return rows[begin:begin + count]
+
+    def _page(self, index):
+        """Busca uma página, continuando da página anterior pela chave quando possível"""
+        if index in self._pages:
+            self._pages.move_to_end(index)
+            return self._pages[index][0]
+
+        size = VIRTUAL_LIST_PAGE_SIZE
+        after = self._page_keys.get(index - 1)
+        if index == 0 or after is not None:
+            rows, keys = self.repo.page_rows(after=after, limit=size,
+                                             order_by=self.order_by, **self.filters)
+        else:
+            # Salto sem página anterior conhecida (ex.: barra arrastada): usa OFFSET
+            # uma vez; as páginas seguintes continuam pela chave desta
+            rows, keys = self.repo.page_rows(offset=index * size, limit=size,
+                                             order_by=self.order_by, **self.filters)
+
+        self._pages[index] = (rows, keys)
+        if keys:
+            self._page_keys[index] = keys[-1]
+        while len(self._pages) > VIRTUAL_LIST_CACHED_PAGES:
+            self._pages.popitem(last=False)
+        return rows
+
+    def _on_tree_yview(self, first, last):
+        """Repasse da rolagem da Treeview para a barra (apenas no modo completo)"""
+        if not self.windowed:
+            self.scrollbar.set(first, last)
+
+    def _on_scrollbar(self, *args):
+        """Trata os comandos da barra de rolagem vertical"""
+        if not self.windowed:
+            self.tree.yview(*args)
+            return
+        if args[0] == 'moveto':
+            self.scroll_to(int(float(args[1]) * self.total))
+        else:
+            step = int(args[1])
+            if args[2] == 'pages':
+                step *= self._visible_rows()
+            self.scroll_to(self.offset + step)
+
+    def _on_mousewheel(self, event):
+        """Rola a janela com a roda do mouse"""
+        if not self.windowed:
+            return None
+        if event.num == 4 or event.delta > 0:
+            self.scroll_to(self.offset - 3)
+        else:
+            self.scroll_to(self.offset + 3)
+        return "break"
+
+    def _on_key(self, event):
+        """Navegação por teclado que ultrapassa as bordas da janela"""
+        if not self.windowed:
+            return None
+        visible = self._visible_rows()
+        items = self.tree.get_children()
+        focus = self.tree.focus()
+        position = items.index(focus) if focus in items else 0
+
+        if event.keysym == 'Up':
+            if position > 0:
+                return None
+            self.scroll_to(self.offset - 1)
+        elif event.keysym == 'Down':
+            if position < len(items) - 1:
+                return None
+            self.scroll_to(self.offset + 1)
+        elif event.keysym == 'Prior':
+            self.scroll_to(self.offset - visible)
+        elif event.keysym == 'Next':
+            self.scroll_to(self.offset + visible)
+        elif event.keysym == 'Home':
+            self.scroll_to(0)
+        elif event.keysym == 'End':
+            self.scroll_to(self.total)
+
+        items = self.tree.get_children()
+        if items:
+            target = items[0] if event.keysym in ('Up', 'Prior', 'Home') else items[-1]
+            self._selected = {int(target)}
+            self.tree.focus(target)
+            self.tree.selection_set(target)
+        return "break"
+
+    def _on_click(self, event):
+        """Um clique simples substitui a seleção, inclusive a que está fora da janela"""
+        if self.windowed and not event.state & 0x0005:  # Sem Shift/Control
+            self._selected.clear()
+
+    def _on_configure(self, event):
+        """Redesenha a janela quando a altura da Treeview muda"""
+        if self.windowed:
+            self._render_window()
+
+    def _on_tree_select(self, event):
+        """Mantém a seleção das linhas que saíram da janela visível"""
+        if not self.windowed:
+            return
+        window = {int(iid) for iid in self.tree.get_children()}
+        selected = {int(iid) for iid in self.tree.selection()}
+        self._selected = (self._selected - window) | selected
@@ -0,0 +1,267 @@
+"""
+Instrumentação de desempenho opcional (python main.py --instrument ou
+python -m planner --instrument arquivo.json ...).
+Registra histogramas de tempo de cada método do TaskRepository e das ações da
+interface (recarga da lista, filtros, importação, exportação, calendário), o
+tempo total de criação dos objetos Task e os comandos SQL executados
+(sqlite3.Connection.set_trace_callback), agrupados por comando e pela operação
+em andamento. Os resultados aparecem na janela Diagnóstico e podem ser gravados
+em JSON.
+
+Desativada, não altera o repositório: os métodos só são substituídos por
+versões cronometradas em enable(), e measure()/timed() apenas testam se há um
+Recorder ativo.
+"""
+import functools
+import inspect
+import json
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+from config import INSTRUMENTATION_BUCKETS_MS, INSTRUMENTATION_RECENT_SQL
+
+# Recorder ativo; None enquanto a instrumentação está desativada
+recorder: "Recorder | None" = None
+
+# Literais dos comandos SQL (o trace recebe os parâmetros já substituídos),
+# trocados por ? para agrupar execuções do mesmo comando
+_SQL_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+class Histogram:
+    """Contagem de durações por faixa (INSTRUMENTATION_BUCKETS_MS), com total e máximo"""
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(INSTRUMENTATION_BUCKETS_MS) + 1)  # Última: acima do maior limite
+
+    def add(self, ms: float) -> None:
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+        for index, limit in enumerate(INSTRUMENTATION_BUCKETS_MS):
+            if ms <= limit:
+                break
+        else:
+            index = len(INSTRUMENTATION_BUCKETS_MS)
+        self.buckets[index] += 1
+
+    def percentile(self, fraction: float) -> float:
+        """Estimativa do percentil: limite superior da faixa que o contém (no máximo, o maior valor visto)"""
+        position = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= position:
+                if index < len(INSTRUMENTATION_BUCKETS_MS):
+                    return min(INSTRUMENTATION_BUCKETS_MS[index], self.max)
+                break
+        return self.max
+
+    def to_dict(self) -> dict:
+        labels = [f"<={limit}" for limit in INSTRUMENTATION_BUCKETS_MS] + [f">{INSTRUMENTATION_BUCKETS_MS[-1]}"]
+        return {
+            "count": self.count,
+            "total_ms": round(self.total, 3),
+            "mean_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.50), 3),
+            "p95_ms": round(self.percentile(0.95), 3),
+            "max_ms": round(self.max, 3),
+            "buckets_ms": {label: count for label, count in zip(labels, self.buckets) if count},
+        }
+
+class Recorder:
+    """
+    Tempos das operações e comandos SQL registrados desde a ativação (ou reset()).
+    Pode ser usado por várias threads (interface, thread do banco, importação).
+    """
+    def __init__(self):
+        self.started = datetime.now()
+        self.timings: dict[str, Histogram] = {}
+        self.totals: dict[str, list] = {}           # Funções chamadas por linha: nome -> [chamadas, segundos]
+        self.sql: dict[str, dict] = {}              # Comando -> {'count', 'operations': {operação: n}}
+        self.recent_sql = deque(maxlen=INSTRUMENTATION_RECENT_SQL)
+        self._lock = threading.Lock()
+        self._local = threading.local()             # Pilha das operações em andamento por thread
+
+    def record(self, name: str, seconds: float) -> None:
+        """Acrescenta uma duração ao histograma da operação"""
+        with self._lock:
+            histogram = self.timings.get(name)
+            if histogram is None:
+                histogram = self.timings[name] = Histogram()
+            histogram.add(seconds * 1000)
+
+    @contextmanager
+    def measure(self, name: str):
+        """Cronometra o bloco; os comandos SQL executados nele são atribuídos à operação"""
+        stack = self._stack()
+        stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+            stack.pop()
+
+    def totals_for(self, name: str) -> list:
+        """
+        Acumulador [chamadas, segundos] de uma função chamada uma vez por linha,
+        atualizado sem lock nem histograma para não pesar na medição
+        """
+        with self._lock:
+            return self.totals.setdefault(name, [0, 0.0])
+
+    def trace(self, statement: str) -> None:
+        """Callback de set_trace_callback: conta o comando para a operação em andamento"""
+        stack = self._stack()
+        operation = stack[-1] if stack else "(fora de operação)"
+        key = _SQL_LITERALS.sub("?", " ".join(statement.split()))
+        with self._lock:
+            entry = self.sql.get(key)
+            if entry is None:
+                entry = self.sql[key] = {"count": 0, "operations": {}}
+            entry["count"] += 1
+            entry["operations"][operation] = entry["operations"].get(operation, 0) + 1
+            self.recent_sql.append((time.time(), operation, statement))
+
+    def reset(self) -> None:
+        """Descarta os tempos e comandos registrados até aqui"""
+        with self._lock:
+            self.started = datetime.now()
+            self.timings.clear()
+            for totals in self.totals.values():
+                totals[:] = [0, 0.0]
+            self.sql.clear()
+            self.recent_sql.clear()
+
+    def snapshot(self) -> dict:
+        """Resultados em um dicionário serializável em JSON"""
+        with self._lock:
+            return {
+                "started": self.started.isoformat(timespec="seconds"),
+                "collected": datetime.now().isoformat(timespec="seconds"),
+                "timings": {name: histogram.to_dict()
+                            for name, histogram in sorted(self.timings.items(), key=lambda item: -item[1].total)},
+                "per_row": {name: {"count": count, "total_ms": round(seconds * 1000, 3),
+                                   "mean_us": round(seconds * 1e6 / count, 3) if count else 0.0}
+                            for name, (count, seconds) in self.totals.items() if count},
+                "sql": [{"statement": statement, **entry}
+                        for statement, entry in sorted(self.sql.items(), key=lambda item: -item[1]["count"])],
+                "recent_sql": [{"time": datetime.fromtimestamp(at).isoformat(timespec="milliseconds"),
+                                "operation": operation, "statement": statement}
+                               for at, operation, statement in self.recent_sql],
+            }
+
+    def dump(self, path: str) -> None:
+        """Grava snapshot() em um arquivo JSON"""
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.snapshot(), file, indent=2, ensure_ascii=False)
+
+    def _stack(self) -> list[str]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+def enable() -> Recorder:
+    """
+    Ativa a instrumentação: cronometra os métodos públicos do TaskRepository e a
+    criação de objetos Task, e liga o trace de SQL das conexões abertas a partir
+    daqui. Deve ser chamada antes de criar as conexões (início do aplicativo).
+    """
+    global recorder
+    if recorder is not None:
+        return recorder
+    import database
+
+    recorder = Recorder()
+    for name, method in inspect.getmembers(database.TaskRepository, inspect.isfunction):
+        if not name.startswith("_") and name != "transaction":
+            setattr(database.TaskRepository, name, _timed_method(f"repo.{name}", method))
+    database._row_to_task = _per_row("criação de Task", database._row_to_task)
+
+    apply_profile = database.DatabaseInitializer._apply_profile
+
+    @functools.wraps(apply_profile)
+    def traced_apply_profile(self, conn):
+        # Chamado uma vez para cada conexão nova
+        conn.set_trace_callback(recorder.trace)
+        return apply_profile(self, conn)
+    database.DatabaseInitializer._apply_profile = traced_apply_profile
+    return recorder
+
+def _timed_method(name: str, func):
+    """
+    Versão cronometrada de func. Em geradores, soma só o tempo gasto dentro do
+    gerador (sem o de quem consome os blocos) e registra uma vez, ao final
+    """
+    if inspect.isgeneratorfunction(func):
+        @functools.wraps(func)
+        def generator(*args, **kwargs):
+            stack = recorder._stack()
+            steps = func(*args, **kwargs)
+            elapsed = 0.0
+            try:
+                while True:
+                    stack.append(name)
+                    start = time.perf_counter()
+                    try:
+                        item = next(steps)
+                    except StopIteration:
+                        return
+                    finally:
+                        elapsed += time.perf_counter() - start
+                        stack.pop()
+                    yield item
+            finally:
+                steps.close()
+                recorder.record(name, elapsed)
+        return generator
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with recorder.measure(name):
+            return func(*args, **kwargs)
+    return wrapper
+
+def _per_row(name: str, func):
+    """Versão de func que só acumula chamadas e tempo total (Recorder.totals_for)"""
+    totals = recorder.totals_for(name)
+    clock = time.perf_counter
+
+    @functools.wraps(func)
+    def wrapper(*args):
+        start = clock()
+        result = func(*args)
+        totals[1] += clock() - start
+        totals[0] += 1
+        return result
+    return wrapper
+
+def measure(name: str):
+    """Como Recorder.measure(), ou um bloco sem efeito com a instrumentação desativada"""
+    return recorder.measure(name) if recorder is not None else nullcontext()
+
+def record(name: str, seconds: float) -> None:
+    """Como Recorder.record(); sem efeito com a instrumentação desativada"""
+    if recorder is not None:
+        recorder.record(name, seconds)
+
+def timed(name: str):
+    """Decorador: cronometra cada chamada da função quando a instrumentação está ativa"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if recorder is None:
+                return func(*args, **kwargs)
+            with recorder.measure(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
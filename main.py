@@ -1,4 +1,30 @@
-from gui import PlannerGUI
+import argparse
+
+def main():
+    parser = argparse.ArgumentParser(description="Planner - gerenciador de tarefas")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="mede as fases da inicialização, mostra os tempos e encerra")
+    parser.add_argument("--instrument", nargs="?", const="", metavar="ARQUIVO",
+                        help="registra os tempos das operações (janela Diagnóstico) e, se informado, "
+                             "grava-os em ARQUIVO (JSON) ao fechar")
+    args = parser.parse_args()
+
+    recorder = None
+    if args.instrument is not None:
+        import instrumentation
+        recorder = instrumentation.enable()
+
+    profile = None
+    if args.profile_startup:
+        from startup_profile import StartupProfile
+        profile = StartupProfile()
+
+    from gui import PlannerGUI
+    if profile:
+        profile.mark("importação da interface (tkinter, gui)")
+    PlannerGUI(profile=profile)
+    if recorder and args.instrument:
+        recorder.dump(args.instrument)
 
 if __name__ == "__main__":
-    PlannerGUI() 
+    main()
@@ -0,0 +1,567 @@
+"""
+Migrações do esquema do banco de dados, identificadas por PRAGMA user_version.
+Cada migração leva o banco da versão anterior para a sua e roda uma única vez.
+Nenhuma migração apaga a tabela de tarefas: colunas ausentes são adicionadas e
+dados em formatos antigos são convertidos no lugar.
+
+Para alterar o esquema, acrescente uma função ao final de MIGRATIONS; nunca
+altere uma migração já publicada, pois bancos existentes não a executarão de novo.
+"""
+import sqlite3
+from collections.abc import Callable
+
+from config import MIGRATION_BATCH_SIZE
+
+# Colunas da tabela de tarefas e a definição usada para adicioná-las a tabelas antigas
+TASK_TABLE_COLUMNS = {
+    "titulo": "TEXT NOT NULL DEFAULT ''",
+    "description": "TEXT NOT NULL DEFAULT ''",
+    "status": "TEXT NOT NULL DEFAULT 'não iniciado'",
+    "tag": "TEXT",
+    "due_date": "DATE",
+    "priority": "TEXT DEFAULT 'média'",
+}
+
+def _casefold(value):
+    """
+    Função casefold() do SQL: minúsculas para comparar textos sem diferenciar
+    maiúsculas, inclusive letras acentuadas (o LIKE e o lower() do SQLite só
+    tratam as letras ASCII)
+    """
+    return value.casefold() if isinstance(value, str) else value
+
+def register_functions(conn: sqlite3.Connection) -> None:
+    """
+    Registra na conexão as funções SQL usadas pelos triggers de tasks (casefold(),
+    nas tags). Toda conexão que grave em tasks precisa delas: sem o registro, a
+    gravação falha com "no such function: casefold". DatabaseInitializer.connect()
+    e migrate() chamam esta função; ferramentas externas em Python devem chamá-la
+    ao abrir o banco, e o shell sqlite3 só deve ser usado para leitura.
+    """
+    conn.create_function("casefold", 1, _casefold, deterministic=True)
+
+def _begin(conn: sqlite3.Connection) -> None:
+    """Abre uma transação de escrita, esperando outras conexões (busy_timeout)"""
+    conn.execute("BEGIN IMMEDIATE")
+
+def _batched(conn: sqlite3.Connection, sql: str, batch_size: int = MIGRATION_BATCH_SIZE) -> None:
+    """
+    Executa um UPDATE/DELETE idempotente em faixas de id, confirmando cada faixa.
+    O comando deve ter dois parâmetros, o início (exclusivo) e o fim (inclusivo)
+    da faixa, e poder ser repetido sem efeito: se a migração for interrompida, as
+    faixas já confirmadas são processadas de novo na próxima execução.
+    """
+    max_id = conn.execute("SELECT MAX(id) FROM tasks").fetchone()[0] or 0
+    for start in range(0, max_id, batch_size):
+        conn.execute(sql, (start, start + batch_size))
+        conn.commit()
+        _begin(conn)
+
+def _create_tasks_table(conn: sqlite3.Connection) -> None:
+    """Cria a tabela de tarefas ou completa as colunas de uma tabela antiga"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS tasks (
+            id           INTEGER PRIMARY KEY AUTOINCREMENT,
+            titulo       TEXT NOT NULL,
+            description  TEXT NOT NULL,
+            status       TEXT NOT NULL DEFAULT 'não iniciado',
+            tag         TEXT,
+            due_date    DATE,
+            priority    TEXT DEFAULT 'média'
+        )
+    """)
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(tasks)")}
+    for column, definition in TASK_TABLE_COLUMNS.items():
+        if column not in existing:
+            conn.execute(f"ALTER TABLE tasks ADD COLUMN {column} {definition}")
+
+def _tasks_table(conn: sqlite3.Connection) -> None:
+    """
+    Tabela de tarefas; datas DD/MM/YYYY passam a ser armazenadas em ISO-8601,
+    o que permite ordenar e filtrar intervalos diretamente no SQLite, e datas
+    vazias viram NULL
+    """
+    _create_tasks_table(conn)
+    _batched(conn, """
+        UPDATE tasks
+        SET due_date = substr(due_date, 7, 4) || '-' || substr(due_date, 4, 2) || '-' || substr(due_date, 1, 2)
+        WHERE id > ? AND id <= ? AND due_date GLOB '[0-9][0-9]/[0-9][0-9]/[0-9][0-9][0-9][0-9]'
+    """)
+    _batched(conn, "UPDATE tasks SET due_date = NULL WHERE id > ? AND id <= ? AND due_date = ''")
+
+def _full_text_search(conn: sqlite3.Connection) -> None:
+    """
+    Busca textual (FTS5) sobre título, descrição e tag, sem diferenciar acentos
+    ("reuniao" encontra "reunião"), mantida em sincronia por triggers
+    """
+    fts_exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tasks_fts'"
+    ).fetchone() is not None
+    statements = [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+            titulo, description, tag,
+            content='tasks', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN
+            INSERT INTO tasks_fts (rowid, titulo, description, tag)
+            VALUES (new.id, new.titulo, new.description, new.tag);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, titulo, description, tag)
+            VALUES ('delete', old.id, old.titulo, old.description, old.tag);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF titulo, description, tag ON tasks BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, titulo, description, tag)
+            VALUES ('delete', old.id, old.titulo, old.description, old.tag);
+            INSERT INTO tasks_fts (rowid, titulo, description, tag)
+            VALUES (new.id, new.titulo, new.description, new.tag);
+        END
+        """,
+    ]
+    for statement in statements:
+        conn.execute(statement)
+    if not fts_exists:
+        # Indexa as tarefas que já existiam antes da criação da busca textual
+        conn.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')")
+
+def _list_indexes(conn: sqlite3.Connection) -> None:
+    """
+    Índices usados pelos filtros e ordenações da lista de tarefas; as expressões
+    são as de database.SORT_KEYS, para que o SQLite as use em ORDER BY
+    """
+    for column in ("status", "tag", "priority", "due_date"):
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_tasks_{column} ON tasks ({column})")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_order_due_date ON tasks (COALESCE(due_date, '~'))")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_tasks_order_priority ON tasks "
+        "(CASE priority WHEN 'alta' THEN 0 WHEN 'média' THEN 1 WHEN 'baixa' THEN 2 ELSE 3 END)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_tasks_order_status ON tasks "
+        "(CASE status WHEN 'não iniciado' THEN 0 WHEN 'em andamento' THEN 1 "
+        "WHEN 'concluído' THEN 2 ELSE 3 END)"
+    )
+
+def _stats_table(conn: sqlite3.Connection) -> None:
+    """
+    Tabela de resumo com o número de tarefas por (status, prioridade, data
+    limite), mantida por triggers. A data limite exata só é guardada para as
+    tarefas não concluídas, as únicas separadas por prazo; as concluídas ficam
+    com '~' (com data limite) ou '' (sem ela). As estatísticas
+    (TaskRepository.stats) leem esta tabela, cujo tamanho depende das
+    combinações de valores e das datas das tarefas em aberto, e não do número
+    de tarefas. As contagens por tag ficam em task_tag_stats (migração 8).
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS task_stats (
+            status    TEXT NOT NULL,
+            priority  TEXT NOT NULL,
+            due_date  TEXT NOT NULL,
+            total     INTEGER NOT NULL,
+            PRIMARY KEY (status, priority, due_date)
+        ) WITHOUT ROWID
+    """)
+    for statement in STATS_TRIGGERS:
+        conn.execute(statement)
+    rebuild_stats(conn)
+
+# Chave da tabela de resumo. Data limite: '' sem data, '~' para tarefas
+# concluídas (maior que qualquer data, fora das faixas de atraso) e a data das demais
+_STATS_DUE = ("CASE WHEN {row}.due_date IS NULL OR {row}.due_date = '' THEN '' "
+              "WHEN {row}.status = 'concluído' THEN '~' ELSE {row}.due_date END")
+_STATS_KEY = "{row}.status, IFNULL({row}.priority, ''), " + _STATS_DUE
+
+# Triggers da tabela de resumo: inserção soma 1 na combinação da tarefa, exclusão
+# subtrai 1 (e remove combinações zeradas), alteração faz as duas coisas
+_STATS_INCREMENT = f"""
+    INSERT INTO task_stats (status, priority, due_date, total)
+    VALUES ({_STATS_KEY.format(row="new")}, 1)
+    ON CONFLICT (status, priority, due_date) DO UPDATE SET total = total + 1;
+"""
+_STATS_DECREMENT = f"""
+    UPDATE task_stats SET total = total - 1
+    WHERE (status, priority, due_date) = ({_STATS_KEY.format(row="old")});
+    DELETE FROM task_stats
+    WHERE (status, priority, due_date) = ({_STATS_KEY.format(row="old")}) AND total <= 0;
+"""
+STATS_TRIGGERS = [
+    f"CREATE TRIGGER IF NOT EXISTS task_stats_ai AFTER INSERT ON tasks BEGIN {_STATS_INCREMENT} END",
+    f"CREATE TRIGGER IF NOT EXISTS task_stats_ad AFTER DELETE ON tasks BEGIN {_STATS_DECREMENT} END",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS task_stats_au AFTER UPDATE OF status, priority, due_date ON tasks
+    WHEN old.status IS NOT new.status OR old.priority IS NOT new.priority OR old.due_date IS NOT new.due_date
+    BEGIN {_STATS_DECREMENT} {_STATS_INCREMENT} END
+    """,
+]
+
+def rebuild_stats(conn: sqlite3.Connection) -> None:
+    """
+    Recalcula a tabela de resumo a partir da tabela de tarefas (usada na
+    migração e para recuperação); deve rodar dentro de uma transação
+    """
+    conn.execute("DELETE FROM task_stats")
+    conn.execute(f"""
+        INSERT INTO task_stats (status, priority, due_date, total)
+        SELECT {_STATS_KEY.format(row="tasks")}, COUNT(*)
+        FROM tasks
+        GROUP BY 1, 2, 3
+    """)
+
+def _change_tracking(conn: sqlite3.Connection) -> None:
+    """
+    Número de alteração por tarefa, para que outras instâncias do aplicativo
+    leiam só o que mudou. Um contador único (change_counter) é incrementado a
+    cada inclusão, alteração ou exclusão e o valor é gravado em tasks.change_seq;
+    tarefas excluídas ficam registradas em task_tombstones com o número da
+    exclusão. Tarefas existentes começam com change_seq = 0.
+    """
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(tasks)")}
+    if "change_seq" not in existing:
+        # Coluna com valor padrão constante: o SQLite não reescreve a tabela
+        conn.execute("ALTER TABLE tasks ADD COLUMN change_seq INTEGER NOT NULL DEFAULT 0")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_change_seq ON tasks (change_seq)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS change_counter (
+            id   INTEGER PRIMARY KEY CHECK (id = 1),
+            seq  INTEGER NOT NULL
+        )
+    """)
+    conn.execute("INSERT OR IGNORE INTO change_counter (id, seq) VALUES (1, 0)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS task_tombstones (
+            id          INTEGER PRIMARY KEY,
+            change_seq  INTEGER NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_task_tombstones_change_seq ON task_tombstones (change_seq)")
+    for statement in CHANGE_TRIGGERS:
+        conn.execute(statement)
+
+# Triggers do número de alteração. A atualização de change_seq feita pelos
+# próprios triggers não altera as colunas observadas, então não os dispara de novo
+_NEXT_SEQ = "UPDATE change_counter SET seq = seq + 1;"
+_MARK_CHANGED = "UPDATE tasks SET change_seq = (SELECT seq FROM change_counter) WHERE id = new.id;"
+CHANGE_TRIGGERS = [
+    f"CREATE TRIGGER IF NOT EXISTS tasks_seq_ai AFTER INSERT ON tasks BEGIN {_NEXT_SEQ} {_MARK_CHANGED} END",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tasks_seq_au
+    AFTER UPDATE OF titulo, description, status, tag, due_date, priority ON tasks
+    WHEN old.titulo IS NOT new.titulo OR old.description IS NOT new.description
+      OR old.status IS NOT new.status OR old.tag IS NOT new.tag
+      OR old.due_date IS NOT new.due_date OR old.priority IS NOT new.priority
+    BEGIN {_NEXT_SEQ} {_MARK_CHANGED} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tasks_seq_ad AFTER DELETE ON tasks BEGIN
+        {_NEXT_SEQ}
+        INSERT OR REPLACE INTO task_tombstones (id, change_seq)
+        VALUES (old.id, (SELECT seq FROM change_counter));
+    END
+    """,
+]
+
+def _change_log(conn: sqlite3.Connection) -> None:
+    """
+    Registro de alterações (task_changes): cada inclusão, alteração ou exclusão
+    acrescenta uma linha com o mesmo número gravado em tasks.change_seq, o id da
+    tarefa, a operação e o horário (UTC). Permite exportar só o que mudou desde
+    uma alteração (TaskRepository.iter_changes). A compactação
+    (TaskRepository.compact_changes) remove linhas antigas e registra em
+    change_counter.compacted_seq o número a partir do qual o registro está completo.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS task_changes (
+            seq         INTEGER PRIMARY KEY,
+            task_id     INTEGER NOT NULL,
+            op          TEXT NOT NULL CHECK (op IN ('insert', 'update', 'delete')),
+            changed_at  TEXT NOT NULL
+        )
+    """)
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(change_counter)")}
+    if "compacted_seq" not in existing:
+        conn.execute("ALTER TABLE change_counter ADD COLUMN compacted_seq INTEGER NOT NULL DEFAULT 0")
+        # Tarefas anteriores ao registro não aparecem nele: exportações de
+        # alterações precisam partir de uma exportação completa feita depois daqui
+        conn.execute(
+            "UPDATE change_counter SET seq = seq + 1, compacted_seq = seq + 1 "
+            "WHERE EXISTS (SELECT 1 FROM tasks)"
+        )
+    # Os triggers de change_seq passam a gravar também o registro; um único
+    # trigger por evento garante que o registro use o número já incrementado
+    for name in ("tasks_seq_ai", "tasks_seq_au", "tasks_seq_ad"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+    for statement in CHANGE_LOG_TRIGGERS:
+        conn.execute(statement)
+
+def _log_change(op: str, row: str) -> str:
+    return (
+        "INSERT INTO task_changes (seq, task_id, op, changed_at) "
+        f"VALUES ((SELECT seq FROM change_counter), {row}.id, '{op}', strftime('%Y-%m-%dT%H:%M:%SZ', 'now'));"
+    )
+
+CHANGE_LOG_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tasks_seq_ai AFTER INSERT ON tasks BEGIN
+        {_NEXT_SEQ} {_MARK_CHANGED} {_log_change("insert", "new")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tasks_seq_au
+    AFTER UPDATE OF titulo, description, status, tag, due_date, priority ON tasks
+    WHEN old.titulo IS NOT new.titulo OR old.description IS NOT new.description
+      OR old.status IS NOT new.status OR old.tag IS NOT new.tag
+      OR old.due_date IS NOT new.due_date OR old.priority IS NOT new.priority
+    BEGIN
+        {_NEXT_SEQ} {_MARK_CHANGED} {_log_change("update", "new")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tasks_seq_ad AFTER DELETE ON tasks BEGIN
+        {_NEXT_SEQ}
+        INSERT OR REPLACE INTO task_tombstones (id, change_seq)
+        VALUES (old.id, (SELECT seq FROM change_counter));
+        {_log_change("delete", "old")}
+    END
+    """,
+]
+
+def _content_hash(conn: sqlite3.Connection) -> None:
+    """
+    Hash do título e da descrição (tasks.content_hash), chave da importação com
+    atualização para linhas de CSV sem ID. O índice único é parcial: só as
+    tarefas importadas por hash têm o campo preenchido, e tarefas criadas na
+    interface podem repetir título e descrição. Se o título ou a descrição
+    mudarem, o hash deixa de valer e é apagado.
+    """
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(tasks)")}
+    if "content_hash" not in existing:
+        conn.execute("ALTER TABLE tasks ADD COLUMN content_hash TEXT")
+    conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_tasks_content_hash ON tasks (content_hash) "
+        "WHERE content_hash IS NOT NULL"
+    )
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS tasks_content_hash_au AFTER UPDATE OF titulo, description ON tasks
+        WHEN new.content_hash IS NOT NULL
+         AND (old.titulo IS NOT new.titulo OR old.description IS NOT new.description)
+        BEGIN
+            UPDATE tasks SET content_hash = NULL WHERE id = new.id;
+        END
+    """)
+
+def _tag_tables(conn: sqlite3.Connection) -> None:
+    """
+    Tags normalizadas: tasks.tag continua guardando o texto digitado, com uma
+    ou mais tags separadas por vírgula, e os triggers mantêm a tabela tags e a
+    associação task_tags. Cada tag é identificada por tags.folded, o nome em
+    casefold() (minúsculas também para letras acentuadas, como em
+    database.split_tags()): "Ágil" e "ágil" são a mesma tag, e tags.name guarda
+    a grafia da primeira tarefa que a usou. Permitem listar as tags e completar
+    pelo início do nome (índice de tags.folded) e filtrar por várias tags sem
+    percorrer as tarefas. Tags sem tarefas são apagadas.
+
+    Os mesmos triggers mantêm task_tag_stats, o resumo de task_stats separado
+    por tag (tag_id 0 para as tarefas sem tag): uma tarefa conta uma vez em
+    cada uma das suas tags. As contagens por tag de TaskRepository.stats() o
+    leem sem percorrer as tarefas.
+
+    Os triggers usam a função casefold() (register_functions); conexões sem
+    ela não conseguem gravar em tasks.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS tags (
+            id      INTEGER PRIMARY KEY,
+            name    TEXT NOT NULL,
+            folded  TEXT NOT NULL UNIQUE
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS task_tags (
+            task_id  INTEGER NOT NULL,
+            tag_id   INTEGER NOT NULL,
+            PRIMARY KEY (task_id, tag_id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_task_tags_tag ON task_tags (tag_id, task_id)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS task_tag_stats (
+            tag_id    INTEGER NOT NULL,
+            status    TEXT NOT NULL,
+            priority  TEXT NOT NULL,
+            due_date  TEXT NOT NULL,
+            total     INTEGER NOT NULL,
+            PRIMARY KEY (tag_id, status, priority, due_date)
+        ) WITHOUT ROWID
+    """)
+    for statement in TAG_TRIGGERS:
+        conn.execute(statement)
+    # Tarefas existentes, em ordem de id (a primeira grafia de cada tag é mantida)
+    conn.execute(f"""
+        INSERT OR IGNORE INTO tags (name, folded)
+        SELECT trim(value), casefold(trim(value)) FROM tasks, {_tag_values("tasks")}
+        WHERE tasks.tag IS NOT NULL AND trim(value) <> ''
+        ORDER BY tasks.id
+    """)
+    conn.execute(f"""
+        INSERT OR IGNORE INTO task_tags (task_id, tag_id)
+        SELECT tasks.id, tags.id FROM tasks, {_tag_values("tasks")} JOIN tags ON tags.folded = casefold(trim(value))
+        WHERE tasks.tag IS NOT NULL
+    """)
+    rebuild_tag_stats(conn)
+
+def _tag_values(row: str) -> str:
+    """
+    Tabela (json_each) com os trechos de {row}.tag separados por vírgula. Triggers
+    não aceitam CTE recursiva, então o texto é convertido em um array JSON; um
+    texto com caracteres de controle (inválidos no JSON) vira uma tag só.
+    Deve corresponder a database.split_tags().
+    """
+    control = "'*[' || char(" + ", ".join(map(str, range(1, 32))) + ") || ']*'"
+    escaped = f"replace(replace(replace({row}.tag, '\\', '\\\\'), '\"', '\\\"'), ',', '\",\"')"
+    return (f"json_each(CASE WHEN {row}.tag GLOB {control} THEN json_array({row}.tag) "
+            f"ELSE '[\"' || {escaped} || '\"]' END)")
+
+def _link_tags(row: str) -> str:
+    """
+    Associa a tarefa {row} às suas tags, criando as que faltam. Um texto sem
+    vírgula (o caso comum) é uma tag só e dispensa a conversão para JSON.
+    Os conflitos são tratados com ON CONFLICT DO NOTHING, e não com INSERT OR
+    IGNORE: quando a tarefa é alterada por um INSERT ... ON CONFLICT DO UPDATE
+    (TaskRepository.upsert_many), o SQLite aplica aos triggers a resolução de
+    conflitos do comando externo, mas não substitui a cláusula ON CONFLICT.
+    """
+    single = f"instr({row}.tag, ',') = 0"
+    return f"""
+        INSERT INTO tags (name, folded)
+        SELECT trim({row}.tag), casefold(trim({row}.tag)) WHERE {single} AND trim({row}.tag) <> ''
+        ON CONFLICT DO NOTHING;
+        INSERT INTO tags (name, folded)
+        SELECT trim(value), casefold(trim(value)) FROM {_tag_values(row)} WHERE NOT {single} AND trim(value) <> ''
+        ON CONFLICT DO NOTHING;
+        INSERT INTO task_tags (task_id, tag_id)
+        SELECT {row}.id, id FROM tags WHERE {single} AND folded = casefold(trim({row}.tag))
+        ON CONFLICT DO NOTHING;
+        INSERT INTO task_tags (task_id, tag_id)
+        SELECT {row}.id, tags.id FROM {_tag_values(row)} JOIN tags ON tags.folded = casefold(trim(value))
+        WHERE NOT {single}
+        ON CONFLICT DO NOTHING;
+    """
+
+# Tags de {row} em task_tag_stats: as de task_tags ou, sem nenhuma, a 0
+_TAG_STATS_IDS = ("SELECT tag_id FROM task_tags WHERE task_id = {row}.id UNION ALL "
+                  "SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM task_tags WHERE task_id = {row}.id)")
+_TAG_STATS_INCREMENT = f"""
+    INSERT INTO task_tag_stats (tag_id, status, priority, due_date, total)
+    SELECT tag_id, {_STATS_KEY.format(row="new")}, 1 FROM ({_TAG_STATS_IDS.format(row="new")}) WHERE true
+    ON CONFLICT (tag_id, status, priority, due_date) DO UPDATE SET total = total + 1;
+"""
+_TAG_STATS_DECREMENT = f"""
+    UPDATE task_tag_stats SET total = total - 1
+    WHERE tag_id IN ({_TAG_STATS_IDS.format(row="old")})
+      AND (status, priority, due_date) = ({_STATS_KEY.format(row="old")});
+    DELETE FROM task_tag_stats
+    WHERE tag_id IN ({_TAG_STATS_IDS.format(row="old")})
+      AND (status, priority, due_date) = ({_STATS_KEY.format(row="old")}) AND total <= 0;
+"""
+
+# Um único trigger por evento, para que task_tag_stats seja atualizado com as
+# associações de antes (decremento) e de depois (incremento) da alteração
+TAG_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tasks_tags_ai AFTER INSERT ON tasks
+    BEGIN {_link_tags("new")} {_TAG_STATS_INCREMENT} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tasks_tags_au AFTER UPDATE OF tag, status, priority, due_date ON tasks
+    WHEN old.tag IS NOT new.tag OR old.status IS NOT new.status
+      OR old.priority IS NOT new.priority OR old.due_date IS NOT new.due_date
+    BEGIN
+        {_TAG_STATS_DECREMENT}
+        DELETE FROM task_tags WHERE task_id = old.id AND old.tag IS NOT new.tag;
+        {_link_tags("new")}
+        {_TAG_STATS_INCREMENT}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tasks_tags_ad AFTER DELETE ON tasks BEGIN
+        {_TAG_STATS_DECREMENT}
+        DELETE FROM task_tags WHERE task_id = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS task_tags_ad AFTER DELETE ON task_tags
+    WHEN NOT EXISTS (SELECT 1 FROM task_tags WHERE tag_id = old.tag_id)
+    BEGIN
+        DELETE FROM tags WHERE id = old.tag_id;
+    END
+    """,
+]
+
+def rebuild_tag_stats(conn: sqlite3.Connection) -> None:
+    """
+    Recalcula task_tag_stats a partir das tarefas e de task_tags (usada na
+    migração e para recuperação); deve rodar dentro de uma transação
+    """
+    conn.execute("DELETE FROM task_tag_stats")
+    conn.execute(f"""
+        INSERT INTO task_tag_stats (tag_id, status, priority, due_date, total)
+        SELECT IFNULL(task_tags.tag_id, 0), {_STATS_KEY.format(row="tasks")}, COUNT(*)
+        FROM tasks LEFT JOIN task_tags ON task_tags.task_id = tasks.id
+        GROUP BY 1, 2, 3, 4
+    """)
+
+# Migrações em ordem: (versão, descrição, função). Bancos criados antes deste
+# mecanismo estão na versão 0 (tabela original) ou 1 (datas já em ISO-8601)
+MIGRATIONS: list[tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, "Tabela de tarefas com datas em ISO-8601", _tasks_table),
+    (2, "Busca textual (FTS5)", _full_text_search),
+    (3, "Índices de filtros e ordenações", _list_indexes),
+    (4, "Tabela de resumo para estatísticas", _stats_table),
+    (5, "Número de alteração das tarefas", _change_tracking),
+    (6, "Registro de alterações", _change_log),
+    (7, "Hash de conteúdo para importação sem duplicatas", _content_hash),
+    (8, "Tabelas de tags normalizadas", _tag_tables),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn: sqlite3.Connection) -> list[int]:
+    """
+    Aplica as migrações pendentes, cada uma em sua transação junto com a nova
+    versão; se o banco já está na versão atual, apenas lê PRAGMA user_version
+    :param conn: Conexão com o banco de dados (fora de transação); recebe as
+                 funções de register_functions(), usadas pelos triggers
+    :return: Versões aplicadas
+    """
+    register_functions(conn)
+    if schema_version(conn) >= LATEST_VERSION:
+        return []
+
+    applied = []
+    for version, _, apply in MIGRATIONS:
+        _begin(conn)
+        try:
+            # Relido dentro do lock: outra conexão pode ter migrado enquanto esperávamos
+            if schema_version(conn) >= version:
+                conn.rollback()
+                continue
+            apply(conn)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        applied.append(version)
+    return applied
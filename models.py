@@ -1,10 +1,12 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
-@dataclass
+@dataclass(slots=True)
 class Task:
     """
     Classe que representa uma tarefa no sistema.
-    Utiliza dataclass para simplificar a criação de objetos.
+    Utiliza dataclass para simplificar a criação de objetos; com slots=True
+    as instâncias não têm __dict__, o que reduz o consumo de memória em
+    listas grandes de tarefas.
     """
     id: int | None
     titulo: str
@@ -12,4 +14,18 @@ class Task:
     status: str = "não iniciado"
     tag: str | None = None
     due_date: str | None = None
-    priority: str = "média" 
+    priority: str = "média"
+
+@dataclass
+class ImportReport:
+    """
+    Resultado de uma importação em lote (TaskRepository.add_many ou upsert_many).
+    Os erros são pares (número do registro, mensagem), contados a partir de 1.
+    Atualizadas e inalteradas só são contadas na importação com upsert_many.
+    """
+    inserted: int = 0
+    errors: list[tuple[int, str]] = field(default_factory=list)
+    cancelled: bool = False
+    ids: list[int] = field(default_factory=list)
+    updated: int = 0
+    unchanged: int = 0
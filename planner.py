@@ -0,0 +1,278 @@
+"""
+Interface de linha de comando do Planner, sem interface gráfica.
+Não importa tkinter: pode rodar em servidores sem display (ex.: cron).
+
+Uso:
+    python -m planner import tarefas.csv
+    python -m planner import tarefas.csv --upsert
+    python -m planner export tarefas.csv --status concluído
+    python -m planner export tarefas.jsonl
+    python -m planner snapshot copia.db
+    python -m planner list --tag financeiro --order-by priority --limit 20
+    python -m planner list --tags "financeiro, urgente" --all-tags
+    python -m planner tags fin
+    python -m planner stats
+    python -m planner rebuild-stats
+    python -m planner export-changes alteracoes.jsonl --since 1520
+    python -m planner compact-changes
+    python -m planner --instrument tempos.json export tarefas.csv
+
+Arquivos '-' usam a entrada/saída padrão. Use --db para escolher o banco
+(padrão: tasks.db ao lado do aplicativo).
+"""
+import argparse
+import csv
+import io
+import itertools
+import sys
+from contextlib import contextmanager
+
+from config import CHANGE_LOG_RETENTION_DAYS, DUE_BUCKET_LABELS, IMPORT_BATCH_SIZE, TASK_STATUS
+from database import DatabaseInitializer, TaskRepository, SORT_KEYS
+from task_io import (CSV_HEADERS, is_jsonl_path, read_csv_tasks, read_jsonl_tasks, write_changes_csv,
+                     write_changes_jsonl, write_csv_rows, write_jsonl_rows)
+
+def positive_int(text: str) -> int:
+    """Tipo do argparse para inteiros maiores que zero"""
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"número inteiro inválido: '{text}'")
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"deve ser maior que zero: {value}")
+    return value
+
+def add_filter_arguments(parser: argparse.ArgumentParser) -> None:
+    """Filtros comuns de export, list e stats (os mesmos da lista de tarefas)"""
+    parser.add_argument("--title", help="trecho do título")
+    parser.add_argument("--tag", help="trecho da tag")
+    parser.add_argument("--tags", help="tarefas com alguma destas tags (separadas por vírgula)")
+    parser.add_argument("--all-tags", action="store_true", help="exige todas as tags de --tags")
+    parser.add_argument("--status", choices=TASK_STATUS, help="status exato")
+    parser.add_argument("--text", help="palavras buscadas em título, descrição e tag")
+    parser.add_argument("--from", dest="due_from", metavar="DATA", help="data limite mínima (DD/MM/YYYY)")
+    parser.add_argument("--to", dest="due_to", metavar="DATA", help="data limite máxima (DD/MM/YYYY)")
+
+def filters_from(args) -> dict:
+    return {
+        "title_contains": args.title,
+        "tag_contains": args.tag,
+        "tags": args.tags,
+        "all_tags": args.all_tags,
+        "status": args.status,
+        "text": args.text,
+        "due_from": args.due_from,
+        "due_to": args.due_to
+    }
+
+@contextmanager
+def open_text(path: str, mode: str):
+    """Abre o arquivo em texto UTF-8 ('-' usa a entrada/saída padrão, sem fechá-la)"""
+    if path != "-":
+        with open(path, mode, encoding="utf-8", newline="") as file:
+            yield file
+        return
+    stream = sys.stdin if "r" in mode else sys.stdout
+    stream.flush()
+    file = io.TextIOWrapper(stream.buffer, encoding="utf-8", newline="")
+    try:
+        yield file
+    finally:
+        file.flush()
+        file.detach()
+
+def file_format(args) -> str:
+    """Formato do arquivo: --format ou, sem ele, pela extensão (padrão: csv)"""
+    return args.format or ("jsonl" if is_jsonl_path(args.file) else "csv")
+
+def cmd_import(repo: TaskRepository, args) -> int:
+    """Importa um CSV ou JSON Lines em lotes, lendo o arquivo sob demanda"""
+    import_many = repo.upsert_many if args.upsert else repo.add_many
+    jsonl = file_format(args) == "jsonl"
+    try:
+        with open_text(args.file, "r") as file:
+            report = import_many((read_jsonl_tasks if jsonl else read_csv_tasks)(file),
+                                 batch_size=args.batch_size)
+    except ValueError as e:
+        # JSON inválido: a importação é desfeita por completo
+        print(f"{e}; nenhuma tarefa foi importada", file=sys.stderr)
+        return 1
+    for line, message in report.errors:
+        # +1 pelo cabeçalho do CSV
+        print(f"Linha {line + (0 if jsonl else 1)}: {message}", file=sys.stderr)
+    if args.upsert:
+        print(f"{report.inserted} tarefas incluídas, {report.updated} atualizadas, "
+              f"{report.unchanged} sem alteração, {len(report.errors)} linhas com erro", file=sys.stderr)
+    else:
+        print(f"{report.inserted} tarefas importadas, {len(report.errors)} linhas com erro", file=sys.stderr)
+    return 1 if report.errors else 0
+
+def cmd_export(repo: TaskRepository, args) -> int:
+    """Exporta as tarefas filtradas para CSV ou JSON Lines, em blocos"""
+    write_rows = write_jsonl_rows if file_format(args) == "jsonl" else write_csv_rows
+    # Lido antes da exportação: alterações feitas durante ela entram também na próxima
+    seq = repo.change_seq()
+    with open_text(args.file, "w") as file:
+        written = write_rows(file, repo.iter_display_rows(order_by=args.order_by, **filters_from(args)))
+    print(f"{written} tarefas exportadas (alteração {seq}; use --since {seq} em export-changes)",
+          file=sys.stderr)
+    return 0
+
+def cmd_export_changes(repo: TaskRepository, args) -> int:
+    """Exporta só as tarefas incluídas, alteradas ou excluídas depois da alteração --since"""
+    fmt = file_format(args)
+    until = repo.change_seq()
+    try:
+        changes = repo.iter_changes(args.since, until)
+        first = next(changes, [])  # Valida --since antes de criar o arquivo
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    write = write_changes_jsonl if fmt == "jsonl" else write_changes_csv
+    with open_text(args.file, "w") as file:
+        written = write(file, itertools.chain([first], changes))
+    print(f"{written} alterações exportadas; próxima exportação: --since {until}", file=sys.stderr)
+    return 0
+
+def cmd_snapshot(repo: TaskRepository, args) -> int:
+    """Grava uma cópia consistente do banco, mesmo com o aplicativo aberto"""
+    db_init = DatabaseInitializer(args.db)
+    try:
+        db_init.backup(args.file)
+    finally:
+        db_init.close()
+    print(f"Snapshot gravado em {args.file}", file=sys.stderr)
+    return 0
+
+def cmd_compact_changes(repo: TaskRepository, args) -> int:
+    """Remove do registro as alterações antigas ou substituídas por outras mais novas"""
+    removed = repo.compact_changes(args.keep_days)
+    print(f"{removed} alterações removidas do registro; exportações de alterações devem partir de "
+          f"--since {repo.change_log_horizon()} ou mais", file=sys.stderr)
+    return 0
+
+def cmd_list(repo: TaskRepository, args) -> int:
+    """Lista as tarefas filtradas, uma por linha (TSV ou CSV)"""
+    with open_text("-", "w") as file:
+        writer = csv.writer(file, dialect="excel-tab" if args.format == "tsv" else "excel")
+        writer.writerow(CSV_HEADERS)
+        listed = 0
+        for rows in repo.iter_display_rows(order_by=args.order_by, **filters_from(args)):
+            if args.limit is not None:
+                rows = rows[:args.limit - listed]
+            writer.writerows(rows)
+            listed += len(rows)
+            if args.limit is not None and listed >= args.limit:
+                break
+    return 0
+
+def cmd_stats(repo: TaskRepository, args) -> int:
+    """Mostra totais por status, prioridade, tag e prazo (uma tarefa conta em cada uma de suas tags)"""
+    summary = repo.stats(**filters_from(args))
+    print(f"Total: {summary['total']}")
+    print("Por status:")
+    for status in TASK_STATUS:
+        print(f"  {status:<18}{summary['status'].get(status, 0):>10}")
+    for title, counts in (("Por prioridade:", summary["priority"]), ("Por tag:", summary["tag"])):
+        print(title)
+        for value, total in sorted(counts.items(), key=lambda item: -item[1]):
+            print(f"  {value or '(sem tag)':<18}{total:>10}")
+    print("Não concluídas por prazo:")
+    for bucket, label in DUE_BUCKET_LABELS.items():
+        print(f"  {label:<18}{summary['due'][bucket]:>10}")
+    print(f"Sem data limite: {summary['no_due_date']}")
+    return 0
+
+def cmd_tags(repo: TaskRepository, args) -> int:
+    """Lista as tags em uso (ou as que começam pelo prefixo), uma por linha"""
+    for name in repo.tag_names(args.prefix, args.limit):
+        print(name)
+    return 0
+
+def cmd_rebuild_stats(repo: TaskRepository, args) -> int:
+    """Recalcula a tabela de resumo das estatísticas"""
+    repo.rebuild_stats()
+    print("Estatísticas recalculadas", file=sys.stderr)
+    return 0
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m planner", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", help="arquivo do banco de dados")
+    parser.add_argument("--instrument", metavar="ARQUIVO",
+                        help="grava em ARQUIVO (JSON) os tempos das operações e os comandos SQL executados")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    formats = argparse.ArgumentParser(add_help=False)
+    formats.add_argument("--format", choices=["csv", "jsonl"],
+                         help="formato (padrão: pela extensão do arquivo, ou csv)")
+
+    command = commands.add_parser("import", parents=[formats], help="importa tarefas de um CSV ou JSON Lines")
+    command.add_argument("file", help="arquivo CSV ou JSON Lines ('-' para a entrada padrão)")
+    command.add_argument("--batch-size", type=positive_int, default=IMPORT_BATCH_SIZE, help="tarefas por lote de inserção")
+    command.add_argument("--upsert", action="store_true",
+                         help="atualiza as tarefas existentes em vez de duplicá-las (chave: ID ou título e descrição)")
+    command.set_defaults(handler=cmd_import)
+
+    order = argparse.ArgumentParser(add_help=False)
+    order.add_argument("--order-by", choices=list(SORT_KEYS), default="due_date")
+
+    command = commands.add_parser("export", parents=[order, formats], help="exporta tarefas para CSV ou JSON Lines")
+    command.add_argument("file", help="arquivo CSV ou JSON Lines ('-' para a saída padrão)")
+    add_filter_arguments(command)
+    command.set_defaults(handler=cmd_export)
+
+    command = commands.add_parser("list", parents=[order], help="lista tarefas")
+    command.add_argument("--limit", type=positive_int, help="número máximo de tarefas")
+    command.add_argument("--format", choices=["tsv", "csv"], default="tsv")
+    add_filter_arguments(command)
+    command.set_defaults(handler=cmd_list)
+
+    command = commands.add_parser("stats", help="mostra totais por status, prioridade, tag e prazo")
+    add_filter_arguments(command)
+    command.set_defaults(handler=cmd_stats)
+
+    command = commands.add_parser("tags", help="lista as tags em uso")
+    command.add_argument("prefix", nargs="?", default="", help="início do nome da tag")
+    command.add_argument("--limit", type=positive_int, help="número máximo de tags")
+    command.set_defaults(handler=cmd_tags)
+
+    command = commands.add_parser("rebuild-stats", help="recalcula o resumo usado pelas estatísticas")
+    command.set_defaults(handler=cmd_rebuild_stats)
+
+    command = commands.add_parser("export-changes", parents=[formats],
+                                  help="exporta as alterações feitas desde uma alteração")
+    command.add_argument("file", help="arquivo CSV ou JSON Lines ('-' para a saída padrão)")
+    command.add_argument("--since", type=int, required=True, metavar="N",
+                         help="número informado pela exportação anterior")
+    command.set_defaults(handler=cmd_export_changes)
+
+    command = commands.add_parser("snapshot", help="grava uma cópia de segurança do banco")
+    command.add_argument("file", help="arquivo de destino")
+    command.set_defaults(handler=cmd_snapshot)
+
+    command = commands.add_parser("compact-changes", help="compacta o registro de alterações")
+    command.add_argument("--keep-days", type=int, default=CHANGE_LOG_RETENTION_DAYS,
+                         help=f"dias de alterações mantidos (padrão: {CHANGE_LOG_RETENTION_DAYS})")
+    command.set_defaults(handler=cmd_compact_changes)
+    return parser
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    recorder = None
+    if args.instrument:
+        import instrumentation
+        recorder = instrumentation.enable()
+    db_init = DatabaseInitializer(args.db)
+    db_init.initialize_schema()
+    try:
+        return args.handler(TaskRepository(db_init), args)
+    except BrokenPipeError:
+        return 0  # Saída redirecionada para um comando que parou de ler (ex.: head)
+    finally:
+        db_init.close()
+        if recorder:
+            recorder.dump(args.instrument)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,26 @@
+import sys
+import time
+
+class StartupProfile:
+    """
+    Tempos das fases de inicialização do aplicativo (python main.py --profile-startup).
+    Cada fase vai do fim da fase anterior até a chamada de mark().
+    """
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases: list[tuple[str, float]] = []
+        self._last = self.start
+
+    def mark(self, name: str) -> None:
+        """Encerra a fase atual com o nome informado"""
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last))
+        self._last = now
+
+    def report(self, file=None) -> None:
+        """Escreve a tabela de fases e o tempo total"""
+        file = file or sys.stderr
+        print(f"{'fase':<44}{'ms':>10}", file=file)
+        for name, seconds in self.phases:
+            print(f"{name:<44}{seconds * 1000:>10.1f}", file=file)
+        print(f"{'total':<44}{(self._last - self.start) * 1000:>10.1f}", file=file)
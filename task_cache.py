@@ -0,0 +1,169 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date
+
+from config import QUERY_CACHE_SIZE
+from database import TaskRepository
+
+class CachedTaskRepository:
+    """
+    Cache de leitura na frente de um TaskRepository.
+    Guarda os resultados das consultas (lista completa, filtros, contagens,
+    páginas, resumos do calendário) em um LRU limitado. O cache é invalidado:
+    - pelas escritas feitas por este mesmo repositório;
+    - por PRAGMA data_version, quando outra conexão (outra thread ou outro
+      processo) altera o arquivo do banco de dados.
+    Resultados que dependem da data atual (stats: atrasadas, hoje, semana)
+    são guardados junto com a data e deixam de valer na virada do dia.
+    Os resultados são compartilhados entre chamadas: as listas retornadas são
+    cópias, mas os objetos Task dentro delas não devem ser modificados.
+    Métodos não cobertos pelo cache (ex.: iter_display_rows) são repassados
+    diretamente ao repositório.
+    """
+    def __init__(self, repo: TaskRepository, max_entries: int = QUERY_CACHE_SIZE):
+        """
+        :param repo: Repositório cujas leituras serão guardadas em cache
+        :param max_entries: Número máximo de resultados mantidos
+        """
+        self.repo = repo
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._data_version = self._read_data_version()
+
+    def __getattr__(self, name):
+        return getattr(self.repo, name)
+
+    # Leituras
+
+    def get(self, task_id):
+        return self._cached("get", task_id)
+
+    def get_all(self):
+        return self._cached("get_all")
+
+    def query(self, *args, **kwargs):
+        return self._cached("query", *args, **kwargs)
+
+    def count(self, **filters):
+        return self._cached("count", **filters)
+
+    def stats(self, **filters):
+        return self._cached("stats", _day=date.today(), **filters)
+
+    def day_summary(self, *args, **kwargs):
+        return self._cached("day_summary", *args, **kwargs)
+
+    def page(self, *args, **kwargs):
+        return self._cached("page", *args, **kwargs)
+
+    def page_rows(self, *args, **kwargs):
+        return self._cached("page_rows", *args, **kwargs)
+
+    def locate(self, *args, **kwargs):
+        return self._cached("locate", *args, **kwargs)
+
+    def locate_row(self, *args, **kwargs):
+        return self._cached("locate_row", *args, **kwargs)
+
+    def search(self, *args, **kwargs):
+        return self._cached("search", *args, **kwargs)
+
+    def tag_names(self, *args, **kwargs):
+        return self._cached("tag_names", *args, **kwargs)
+
+    def exists(self, task_id):
+        return self._cached("exists", task_id)
+
+    # Escritas
+
+    def add(self, *args, **kwargs):
+        return self._write("add", *args, **kwargs)
+
+    def add_many(self, *args, **kwargs):
+        return self._write("add_many", *args, **kwargs)
+
+    def upsert_many(self, *args, **kwargs):
+        return self._write("upsert_many", *args, **kwargs)
+
+    def update(self, *args, **kwargs):
+        return self._write("update", *args, **kwargs)
+
+    def update_many(self, *args, **kwargs):
+        return self._write("update_many", *args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        return self._write("delete", *args, **kwargs)
+
+    def delete_many(self, *args, **kwargs):
+        return self._write("delete_many", *args, **kwargs)
+
+    def set_status_many(self, *args, **kwargs):
+        return self._write("set_status_many", *args, **kwargs)
+
+    def rebuild_stats(self):
+        return self._write("rebuild_stats")
+
+    @contextmanager
+    def transaction(self):
+        """Como TaskRepository.transaction(); invalida o cache ao terminar (commit ou rollback)"""
+        try:
+            with self.repo.transaction():
+                yield self
+        finally:
+            self.invalidate()
+
+    def invalidate(self) -> None:
+        """Descarta todos os resultados guardados"""
+        self._entries.clear()
+
+    def _cached(self, method: str, *args, _day: date | None = None, **kwargs):
+        """
+        Retorna o resultado guardado para a chamada, consultando o banco só quando necessário
+        :param _day: Data de que o resultado depende; entra só na chave do cache
+        """
+        if self.repo.conn.in_transaction:
+            # Dentro de uma transação os dados podem ainda ser desfeitos
+            return getattr(self.repo, method)(*args, **kwargs)
+
+        version = self._read_data_version()
+        if version != self._data_version:
+            self._data_version = version
+            self.invalidate()
+
+        key = (method, _day, args, tuple(sorted(kwargs.items())))
+        try:
+            result = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            result = getattr(self.repo, method)(*args, **kwargs)
+            self._entries[key] = result
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        except TypeError:
+            # Argumentos não hasheáveis (ex.: listas): consulta sem cache
+            return getattr(self.repo, method)(*args, **kwargs)
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        return _copy(result)
+
+    def _write(self, method: str, *args, **kwargs):
+        try:
+            return getattr(self.repo, method)(*args, **kwargs)
+        finally:
+            self.invalidate()
+
+    def _read_data_version(self) -> int:
+        return self.repo.data_version()
+
+def _copy(result):
+    """Copia as listas do resultado para que o chamador possa alterá-las sem afetar o cache"""
+    if isinstance(result, list):
+        return list(result)
+    if isinstance(result, dict):
+        return dict(result)  # day_summary()
+    if isinstance(result, tuple) and len(result) == 2 and isinstance(result[0], list):
+        return list(result[0]), list(result[1])  # page() e page_rows()
+    return result
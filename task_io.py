@@ -0,0 +1,161 @@
+import csv
+import json
+from collections.abc import Callable, Iterable, Iterator
+from typing import TextIO
+
+from models import Task
+
+# Cabeçalho usado na exportação e esperado na importação de CSV
+CSV_HEADERS = ['ID', 'Título', 'Descrição', 'Status', 'Tag', 'Data Limite', 'Prioridade']
+
+def task_from_csv_row(row: dict) -> Task:
+    """
+    Converte uma linha do CSV (lida por csv.DictReader) em Task.
+    Colunas ausentes viram texto vazio; a validação fica a cargo do repositório.
+    O ID só é usado pela importação com atualização (TaskRepository.upsert_many).
+    """
+    try:
+        task_id = int(row.get('ID') or '')
+    except ValueError:
+        task_id = None
+    return Task(
+        id=task_id,
+        titulo=(row.get('Título') or '').strip(),
+        description=(row.get('Descrição') or '').strip(),
+        status=(row.get('Status') or '').strip(),
+        tag=(row.get('Tag') or '').strip() or None,
+        due_date=(row.get('Data Limite') or '').strip() or None,
+        priority=(row.get('Prioridade') or '').strip()
+    )
+
+# Cabeçalho da exportação de alterações: número da alteração, operação
+# ('upsert' ou 'delete') e os campos da tarefa (vazios nas exclusões)
+CHANGE_CSV_HEADERS = ['Alteração', 'Operação'] + CSV_HEADERS
+
+# Extensões de arquivo tratadas como JSON Lines (as demais são CSV)
+JSONL_EXTENSIONS = ('.jsonl', '.ndjson')
+
+def is_jsonl_path(path: str) -> bool:
+    return path.lower().endswith(JSONL_EXTENSIONS)
+
+# Campos das tarefas em JSON (API HTTP), na ordem de TASK_COLUMNS
+JSON_FIELDS = ('id', 'titulo', 'description', 'status', 'tag', 'due_date', 'priority')
+
+def task_from_dict(data: dict, task_id: int | None = None) -> Task:
+    """
+    Converte um objeto JSON em Task. Status e prioridade ausentes recebem os
+    valores padrão da tarefa; a validação fica a cargo do repositório.
+    :param task_id: ID da tarefa (o campo 'id' do objeto é ignorado)
+    """
+    if not isinstance(data, dict):
+        raise ValueError("A tarefa deve ser um objeto JSON")
+
+    def text(field: str) -> str:
+        value = data.get(field)
+        return value.strip() if isinstance(value, str) else ''
+
+    task = Task(
+        id=task_id,
+        titulo=text('titulo'),
+        description=text('description'),
+        tag=text('tag') or None,
+        due_date=text('due_date') or None
+    )
+    task.status = text('status') or task.status
+    task.priority = text('priority') or task.priority
+    return task
+
+def row_to_dict(row: tuple) -> dict:
+    """Converte uma linha no formato exibido (DISPLAY_COLUMNS) em objeto JSON"""
+    item = dict(zip(JSON_FIELDS, row))
+    item['tag'] = item['tag'] or None
+    item['due_date'] = item['due_date'] or None
+    return item
+
+def read_csv_tasks(file: TextIO) -> Iterator[Task]:
+    """Lê as tarefas de um arquivo CSV sob demanda, uma linha por vez"""
+    for row in csv.DictReader(file):
+        yield task_from_csv_row(row)
+
+def write_csv_rows(file: TextIO, chunks: Iterable[list[tuple]],
+                   progress: Callable[[int], None] | None = None, cancel=None) -> int:
+    """
+    Escreve o CSV de tarefas a partir de blocos de linhas já formatadas
+    (como os de TaskRepository.iter_display_rows), sem montar objetos Task
+    :param progress: Chamado após cada bloco com o total de linhas escritas
+    :param cancel: Objeto com is_set(); interrompe a escrita quando sinalizado
+    :return: Número de linhas escritas
+    """
+    writer = csv.writer(file)
+    writer.writerow(CSV_HEADERS)
+    written = 0
+    for rows in chunks:
+        writer.writerows(rows)
+        written += len(rows)
+        if progress:
+            progress(written)
+        if cancel is not None and cancel.is_set():
+            break
+    return written
+
+def read_jsonl_tasks(file: TextIO) -> Iterator[Task]:
+    """
+    Lê as tarefas de um arquivo JSON Lines (um objeto por linha, como os de
+    write_jsonl_rows) sob demanda; linhas em branco são ignoradas
+    """
+    for number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+            task_id = data.get('id') if isinstance(data, dict) else None
+            yield task_from_dict(data, task_id if isinstance(task_id, int) else None)
+        except ValueError as e:
+            raise ValueError(f"Linha {number}: {e}") from None
+
+def write_jsonl_rows(file: TextIO, chunks: Iterable[list[tuple]],
+                     progress: Callable[[int], None] | None = None, cancel=None) -> int:
+    """
+    Como write_csv_rows, mas em JSON Lines: um objeto por tarefa, com o id
+    numérico e null nos campos vazios
+    :return: Número de linhas escritas
+    """
+    written = 0
+    for rows in chunks:
+        file.write("".join(json.dumps(row_to_dict(row), ensure_ascii=False) + "\n" for row in rows))
+        written += len(rows)
+        if progress:
+            progress(written)
+        if cancel is not None and cancel.is_set():
+            break
+    return written
+
+def write_changes_csv(file: TextIO, chunks: Iterable[list[tuple]]) -> int:
+    """
+    Escreve as alterações (blocos de TaskRepository.iter_changes) em CSV
+    :return: Número de linhas escritas
+    """
+    writer = csv.writer(file)
+    writer.writerow(CHANGE_CSV_HEADERS)
+    written = 0
+    for rows in chunks:
+        writer.writerows(rows)
+        written += len(rows)
+    return written
+
+def write_changes_jsonl(file: TextIO, chunks: Iterable[list[tuple]]) -> int:
+    """
+    Escreve as alterações em JSON Lines: {"seq", "op", ...campos da tarefa}
+    para inclusões e alterações e {"seq", "op": "delete", "id"} para exclusões
+    :return: Número de linhas escritas
+    """
+    written = 0
+    for rows in chunks:
+        lines = []
+        for row in rows:
+            seq, op, fields = row[0], row[1], row[2:]
+            item = row_to_dict(fields) if op == 'upsert' else {'id': fields[0]}
+            lines.append(json.dumps({'seq': seq, 'op': op, **item}, ensure_ascii=False))
+        file.write("\n".join(lines) + "\n")
+        written += len(rows)
+    return written
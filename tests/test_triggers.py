@@ -0,0 +1,217 @@
+"""
+Tabelas mantidas por triggers (resumo das estatísticas, registro de alterações
+e tags): depois de inclusões, alterações e exclusões, e depois das migrações a
+partir de bancos antigos, devem coincidir com uma recontagem feita a partir de tasks.
+
+Uso: python -m pytest tests
+"""
+import os
+import sys
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import migrations
+from database import DatabaseInitializer, TaskRepository, split_tags, to_storage_date
+from migrations import rebuild_stats, rebuild_tag_stats
+from models import Task
+
+# Tarefas variadas: várias tags, grafias da mesma tag, tags vazias, com e sem data
+TASKS = [
+    Task(None, "Planejar sprint", "Reunião de planejamento", tag="Ágil, trabalho", due_date="10/01/2025"),
+    Task(None, "Revisar código", "Pull requests abertos", "em andamento", "ágil", "15/08/2030", "alta"),
+    Task(None, "Pagar contas", "Luz e água", "concluído", "casa", "05/02/2025", "baixa"),
+    Task(None, "Comprar pão", "Padaria", tag=" , casa ,CASA"),
+    Task(None, "Ler livro", "Capítulo 3", "concluído"),
+    Task(None, "Ligar para o banco", "Cartão", tag="", due_date="20/03/2025", priority="alta"),
+]
+
+@pytest.fixture
+def repo(tmp_path):
+    db_init = DatabaseInitializer(str(tmp_path / "tasks.db"))
+    db_init.initialize_schema()
+    yield TaskRepository(db_init)
+    db_init.close()
+
+def assert_stats_match(conn):
+    """task_stats e task_tag_stats iguais ao resultado de rebuild_stats() e rebuild_tag_stats(), desfeitos em seguida"""
+    maintained = [conn.execute(f"SELECT * FROM {table} ORDER BY 1, 2, 3, 4").fetchall()
+                  for table in ("task_stats", "task_tag_stats")]
+    conn.execute("SAVEPOINT recount")
+    rebuild_stats(conn)
+    rebuild_tag_stats(conn)
+    recounted = [conn.execute(f"SELECT * FROM {table} ORDER BY 1, 2, 3, 4").fetchall()
+                 for table in ("task_stats", "task_tag_stats")]
+    conn.execute("ROLLBACK TO recount")
+    conn.execute("RELEASE recount")
+    assert maintained == recounted
+
+def assert_tags_match(conn):
+    """task_tags e tags iguais às tags de tasks.tag separadas por split_tags(), sem tags órfãs"""
+    expected = {}
+    for task_id, text in conn.execute("SELECT id, tag FROM tasks"):
+        names = {name.casefold() for name in split_tags(text)}
+        if names:
+            expected[task_id] = names
+    linked = {}
+    for task_id, folded in conn.execute(
+            "SELECT task_id, tags.folded FROM task_tags JOIN tags ON tags.id = task_tags.tag_id"):
+        linked.setdefault(task_id, set()).add(folded)
+    assert linked == expected
+    assert conn.execute("SELECT COUNT(*) FROM task_tags").fetchone()[0] == sum(map(len, expected.values()))
+    tags = conn.execute("SELECT name, folded FROM tags").fetchall()
+    assert all(name.casefold() == folded for name, folded in tags)
+    assert {folded for _, folded in tags} == set().union(*expected.values())
+
+def assert_change_log_matches(conn):
+    """
+    A última alteração de cada tarefa posterior ao início do registro
+    (compacted_seq) está em task_changes, com o número gravado em tasks.change_seq
+    ou em task_tombstones
+    """
+    current, horizon = conn.execute("SELECT seq, compacted_seq FROM change_counter").fetchone()
+    log = {seq: (task_id, op) for seq, task_id, op in conn.execute("SELECT seq, task_id, op FROM task_changes")}
+    assert all(seq <= current for seq in log)
+    tasks = dict(conn.execute("SELECT id, change_seq FROM tasks"))
+    tombstones = dict(conn.execute("SELECT id, change_seq FROM task_tombstones"))
+    for task_id, seq in tasks.items():
+        if seq > horizon:
+            assert log[seq][0] == task_id and log[seq][1] in ("insert", "update")
+    # Exclusões anteriores ao registro só são descartadas pela compactação
+    for task_id, seq in tombstones.items():
+        assert task_id not in tasks
+        if seq > horizon:
+            assert log[seq] == (task_id, "delete")
+    last = {}
+    for seq, (task_id, op) in sorted(log.items()):
+        last[task_id] = (seq, op)
+    for task_id, (seq, op) in last.items():
+        assert (tombstones if op == "delete" else tasks)[task_id] == seq
+
+def assert_consistent(conn):
+    assert_stats_match(conn)
+    assert_tags_match(conn)
+    assert_change_log_matches(conn)
+
+def test_writes_keep_trigger_tables_consistent(repo):
+    ids = repo.add_many(TASKS).ids
+    assert len(ids) == len(TASKS)
+    assert_consistent(repo.conn)
+
+    single = repo.add(Task(None, "Avulsa", "Criada pelo formulário", tag="Trabalho, novo"))
+    assert_consistent(repo.conn)
+
+    # Tag, status, data e prioridade alterados; uma alteração sem mudanças não é registrada
+    changed = repo.get(ids[0])
+    changed.tag, changed.status, changed.due_date, changed.priority = "CASA", "concluído", "01/01/2026", "baixa"
+    assert repo.update(changed)
+    seq = repo.change_seq()
+    assert repo.update(repo.get(ids[1]))
+    assert repo.change_seq() == seq
+    assert_consistent(repo.conn)
+
+    tasks = [repo.get(task_id) for task_id in ids[2:5]]
+    for task in tasks:
+        task.tag = (task.tag or "") + ", extra"
+    assert repo.update_many(tasks) == 3
+    assert repo.set_status_many([ids[3], single], "em andamento") == 2
+    assert_consistent(repo.conn)
+
+    assert repo.delete(single)
+    assert repo.delete_many(ids[:2]) == 2
+    assert_consistent(repo.conn)
+
+    repo.compact_changes(keep_days=None)
+    assert_consistent(repo.conn)
+    assert repo.conn.execute("SELECT COUNT(*) FROM task_stats").fetchone()[0] > 0
+
+def test_upsert_many_counts(repo):
+    report = repo.upsert_many(TASKS)
+    assert (report.inserted, report.updated, report.unchanged) == (len(TASKS), 0, 0)
+    assert_consistent(repo.conn)
+
+    report = repo.upsert_many(TASKS)
+    assert (report.inserted, report.updated, report.unchanged, report.ids) == (0, 0, len(TASKS), [])
+    assert_consistent(repo.conn)
+
+    # Por hash: uma tarefa muda para uma tag existente, outra muda de status, uma é nova
+    # e a última aparece duas vezes no arquivo (a segunda ocorrência conta como existente)
+    edited = [Task(None, task.titulo, task.description, task.status, task.tag, task.due_date, task.priority)
+              for task in TASKS]
+    edited[0].tag = "casa"
+    edited[1].status = "concluído"
+    new = Task(None, "Nova", "Só no arquivo", tag="trabalho")
+    report = repo.upsert_many(edited + [new, new])
+    assert (report.inserted, report.updated, report.unchanged) == (1, 2, len(TASKS) - 2 + 1)
+    assert len(report.ids) == 3
+    assert_consistent(repo.conn)
+
+    # Por id: uma tarefa existente alterada, uma igual e um id ainda não usado
+    first, second = repo.get(report.ids[0]), repo.get(report.ids[1])
+    first.tag = "Ágil"
+    report = repo.upsert_many([first, second, Task(9999, "Com id", "Do CSV", tag="ÁGIL")])
+    assert (report.inserted, report.updated, report.unchanged) == (1, 1, 1)
+    assert sorted(report.ids) == sorted([first.id, 9999])
+    assert_consistent(repo.conn)
+
+def recount_stats(repo, **filters):
+    """Contagens por tag de stats(), recalculadas em Python a partir das tarefas filtradas"""
+    today = date.today().isoformat()
+    tags, overdue_by_tag = {}, {}
+    for task in repo.query(**filters):
+        names = {name.casefold(): name for name in reversed(split_tags(task.tag))}
+        late = task.status != "concluído" and task.due_date and to_storage_date(task.due_date) < today
+        for folded in names or [""]:
+            name = repo.conn.execute("SELECT name FROM tags WHERE folded = ?", (folded,)).fetchone()
+            name = name[0] if name else ""
+            tags[name] = tags.get(name, 0) + 1
+            if late:
+                by_priority = overdue_by_tag.setdefault(name, {})
+                by_priority[task.priority or ""] = by_priority.get(task.priority or "", 0) + 1
+    return tags, overdue_by_tag
+
+def test_stats_by_tag_match_recount(repo):
+    """Sem filtros ou só por status (task_tag_stats) e com outros filtros (task_tags)"""
+    ids = repo.add_many(TASKS + [Task(None, "Atrasada", "Sem tag", due_date="01/01/2020", priority="alta")]).ids
+    changed = repo.get(ids[1])
+    changed.tag, changed.due_date = "casa, Ágil", "02/01/2020"
+    assert repo.update(changed)
+    assert repo.delete(ids[2])
+    for filters in ({}, {"status": "não iniciado"}, {"status": "concluído"}, {"title_contains": "a"}):
+        summary = repo.stats(**filters)
+        assert (summary["tag"], summary["overdue_by_tag"]) == recount_stats(repo, **filters)
+        assert summary["tag"].get("", 0) <= summary["total"] <= sum(summary["tag"].values())
+
+@pytest.mark.parametrize("version", range(4, migrations.LATEST_VERSION))
+def test_migrations_keep_trigger_tables_consistent(tmp_path, monkeypatch, version):
+    """Banco criado e alterado na versão informada e depois migrado até a atual"""
+    db_init = DatabaseInitializer(str(tmp_path / "old.db"))
+    monkeypatch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS[:version])
+    monkeypatch.setattr(migrations, "LATEST_VERSION", version)
+    db_init.initialize_schema()
+    conn = db_init.connect()
+    conn.executemany(
+        "INSERT INTO tasks (titulo, description, status, tag, due_date, priority) VALUES (?, ?, ?, ?, ?, ?)",
+        [(task.titulo, task.description, task.status, task.tag,
+          "-".join(reversed(task.due_date.split("/"))) if task.due_date else None, task.priority)
+         for task in TASKS]
+    )
+    conn.execute("UPDATE tasks SET tag = 'Ágil, casa', status = 'concluído' WHERE id = 2")
+    conn.execute("DELETE FROM tasks WHERE id = 3")
+    conn.commit()
+    monkeypatch.undo()
+
+    db_init.initialize_schema()
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == migrations.LATEST_VERSION
+    assert_consistent(conn)
+
+    repo = TaskRepository(db_init)
+    ids = repo.add_many(TASKS[:3]).ids
+    task = repo.get(1)
+    task.tag = "ágil, Trabalho"
+    assert repo.update(task)
+    assert repo.delete(ids[0])
+    assert_consistent(conn)
+    db_init.close()